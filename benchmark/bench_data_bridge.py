@@ -0,0 +1,78 @@
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from benchmark.synthetic import make_level_data, make_result
+from factor_cli.data_bridge import to_engine_frame, result_to_frame
+
+
+def _measure(func, repeat: int):
+    """返回 (平均耗时秒, 峰值新增内存字节)"""
+    func()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat, peak
+
+
+def _load_engine():
+    try:
+        sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib'))
+        import factor_framework as ff
+        return ff
+    except Exception:
+        return None
+
+
+def run(rows: int, repeat: int, factor_name: str = 'RMI') -> dict:
+    level = make_level_data(rows)
+    result = make_result(rows)
+    report = {'rows': rows, 'repeat': repeat}
+
+    # 输出：旧路径 pd.DataFrame(result) 会合并成二维块产生拷贝
+    report['result_before'] = dict(zip(('seconds', 'peak_bytes'), _measure(lambda: pd.DataFrame(result), repeat)))
+    report['result_after'] = dict(zip(('seconds', 'peak_bytes'), _measure(lambda: result_to_frame(result), repeat)))
+
+    # 输入：从单一二维块 DataFrame 准备 set_data 的输入
+    report['input_after'] = dict(zip(('seconds', 'peak_bytes'), _measure(lambda: to_engine_frame(level), repeat)))
+
+    ff = _load_engine()
+    if ff is not None:
+        def before():
+            factor = ff.create_factor(factor_name)
+            factor.set_data(level)
+            factor.set_params([factor_name])
+            factor.run()
+            return pd.DataFrame(factor.get_result())
+
+        def after():
+            factor = ff.create_factor(factor_name)
+            factor.set_data(to_engine_frame(level))
+            factor.set_params([factor_name])
+            factor.run()
+            return result_to_frame(factor.get_result())
+
+        report['engine_before'] = dict(zip(('seconds', 'peak_bytes'), _measure(before, repeat)))
+        report['engine_after'] = dict(zip(('seconds', 'peak_bytes'), _measure(after, repeat)))
+    else:
+        report['engine'] = 'factor_framework 不可用，跳过端到端对比'
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='pandas 与因子引擎数据交换基准测试')
+    parser.add_argument('--rows', type=int, default=20000, help='模拟一天盘口数据行数')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--factor', default='RMI')
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeat, args.factor), indent=2, ensure_ascii=False))
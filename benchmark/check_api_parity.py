@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+FACTOR = 'PARITY'
+CODES = ['000001', '000002', '000003']
+DAYS = ['20250701', '20250702']
+
+# 与数据库时间相关、两次运行必然不同的列
+VOLATILE_COLUMNS = ('id', 'created_at', 'updated_at')
+
+
+def _extra_info(code: str, day: str) -> dict:
+    return {
+        'stages_ms': {'raw_load': 1.0 + len(code), 'run': float(day[-1])},
+        'total_ms': 10.0,
+        'rss': 1024,
+        'rss_delta': 0,
+        'fingerprint': {'key': f'{code}-{day}'},
+    }
+
+
+def _record(code: str, day: str, version: str = 'v1') -> dict:
+    return {'factor_name': FACTOR, 'version': version, 'code': code, 'day': day, 'data_type': '100',
+            'factor_path': f'100/{FACTOR}/{version}/{day}/{code}.parquet', 'extra_info': _extra_info(code, day)}
+
+
+# (名称, 方法, 参数)：同步与异步接口按相同顺序执行，逐条比较返回值
+OPERATIONS = [
+    ('create_v1', 'create_factor_info',
+     ({'factor_name': FACTOR, 'version': 'v1', 'factor_type': '100', 'submitted_by': 'parity',
+       'factor_args': {'window': 14}},)),
+    ('create_v1_duplicate', 'create_factor_info',
+     ({'factor_name': FACTOR, 'version': 'v1', 'factor_type': '100', 'submitted_by': 'parity'},)),
+    ('create_v2', 'create_factor_info',
+     ({'factor_name': FACTOR, 'version': 'v2', 'factor_type': '100', 'submitted_by': 'parity'},)),
+    ('pending_before_approve', 'get_factor_pending_status', (FACTOR,)),
+    ('approve_v1', 'update_factor_status', (FACTOR, 'v1')),
+    ('approve_v1_again', 'update_factor_status', (FACTOR, 'v1')),
+    ('approve_missing', 'update_factor_status', (FACTOR, 'missing')),
+    ('pending_after_approve', 'get_factor_pending_status', (FACTOR, 'v2')),
+    ('all_versions', 'get_all_factor_version', (FACTOR,)),
+    ('all_names', 'get_all_factor_name', ()),
+    ('newest', 'get_new_factor_name', (FACTOR,)),
+    ('newest_missing', 'get_new_factor_name', ('MISSING',)),
+    ('newest_many', 'get_new_factor_names', ([FACTOR, 'MISSING'],)),
+    ('args', 'get_factor_args', (FACTOR, 'v1')),
+    ('args_missing', 'get_factor_args', (FACTOR, 'missing')),
+    ('exists_factor', 'factor_exists', (FACTOR,)),
+    ('exists_version', 'factor_exists', (FACTOR, 'v2')),
+    ('exists_missing_version', 'factor_exists', (FACTOR, 'missing')),
+    ('write_one', 'write_node_factor_data',
+     (FACTOR, 'v1', CODES[0], '2025-07-01', '100', f'100/{FACTOR}/v1/20250701/{CODES[0]}.parquet',
+      1, _extra_info(CODES[0], DAYS[0]))),
+    ('write_bulk', 'write_node_factor_data_bulk', ([_record(code, day) for day in DAYS for code in CODES[1:]],)),
+    ('write_failures', 'write_node_factor_failures',
+     ([dict(_record(CODES[0], DAYS[0]), error='boom'), dict(_record(CODES[0], DAYS[1]), error='boom')],)),
+    ('exists_result', 'exists_source_code_data', (FACTOR, 'v1', CODES[0], '2025-07-01')),
+    ('exists_result_failed', 'exists_source_code_data', (FACTOR, 'v1', CODES[0], DAYS[1])),
+    ('exists_range', 'get_exists_node_factor_data', (FACTOR, 'v1', CODES, DAYS[0], DAYS[-1], 2)),
+    ('missing', 'get_missing_node_factor_data', (FACTOR, 'v1', CODES, DAYS, 2)),
+    ('paths', 'get_node_factor_paths', (FACTOR, 'v1', CODES, DAYS[0], DAYS[-1], 2)),
+    ('fingerprints', 'get_node_factor_fingerprints', (FACTOR, 'v1', 2)),
+    ('exists_versions', 'get_exists_factor_versions', ({FACTOR: 'v1', 'MISSING': 'v1'}, CODES[1], DAYS[0])),
+    ('watermarks', 'get_factor_watermarks', (FACTOR, 'v1')),
+    ('failed', 'get_failed_node_factor_data', (FACTOR, 'v1')),
+    ('stage_stats', 'get_factor_stage_stats', (FACTOR,)),
+    ('create_derived', 'create_factor_info',
+     ({'factor_name': FACTOR, 'version': 'v1-r', 'factor_type': '100', 'submitted_by': 'parity',
+       'derived_from': 'v1'},)),
+    ('approve_derived', 'update_factor_status', (FACTOR, 'v1-r')),
+    ('newest_with_derived', 'get_new_factor_name', (FACTOR,)),
+    ('pending_with_derived', 'get_factor_pending_status', (FACTOR,)),
+]
+
+
+def normalize(value):
+    """转换为可以直接比较的结构：集合排序，时间转字符串，去掉数据库生成的列"""
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items() if key not in VOLATILE_COLUMNS}
+    if isinstance(value, (set, frozenset)):
+        return sorted((normalize(item) for item in value), key=repr)
+    if isinstance(value, (list, tuple)):
+        items = [normalize(item) for item in value]
+        # 查询结果的行顺序不保证一致
+        return sorted(items, key=repr) if all(isinstance(item, dict) for item in items) else items
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return value.decode('utf-8')
+    return value
+
+
+def _outcome(call):
+    try:
+        return {'result': normalize(call())}
+    except Exception as e:
+        return {'error': type(e).__name__}
+
+
+def run_sync(path: str) -> dict:
+    from benchmark.sqlite_backend import use_sqlite
+    from database.mysql_database import GetFactorDataAPI
+
+    use_sqlite(path)
+    api = GetFactorDataAPI()
+    # 元数据缓存是进程内共享的，关闭后比较的才是两边的 SQL
+    api.cache = None
+    return {name: _outcome(lambda: getattr(api, method)(*args)) for name, method, args in OPERATIONS}
+
+
+async def run_async(path: str) -> dict:
+    from benchmark.sqlite_backend import use_sqlite_async
+    from database.async_mysql_database import AsyncGetFactorDataAPI
+
+    api = use_sqlite_async(AsyncGetFactorDataAPI(pool_size=2, max_overflow=0), path)
+    api.cache = None
+    results = {}
+    async with api:
+        for name, method, args in OPERATIONS:
+            try:
+                results[name] = {'result': normalize(await getattr(api, method)(*args))}
+            except Exception as e:
+                results[name] = {'error': type(e).__name__}
+    return results
+
+
+def check_parity(workdir: str) -> dict:
+    """同步与异步接口在同样的操作序列下返回值是否一致，返回 {'operations', 'mismatches'}"""
+    sync_results = run_sync(os.path.join(workdir, 'parity_sync.db'))
+    async_results = asyncio.run(run_async(os.path.join(workdir, 'parity_async.db')))
+    mismatches = {
+        name: {'sync': sync_results[name], 'async': async_results[name]}
+        for name, _, _ in OPERATIONS if sync_results[name] != async_results[name]
+    }
+    return {'operations': len(OPERATIONS), 'mismatches': mismatches}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='检查 GetFactorDataAPI 与 AsyncGetFactorDataAPI 的行为一致')
+    parser.parse_args()
+    try:
+        import aiomysql  # noqa: F401
+    except ImportError:
+        print("未安装 aiomysql，无法检查异步接口")
+        sys.exit(0)
+    report = check_parity(tempfile.mkdtemp(prefix='factor_parity_'))
+    for name, values in report['mismatches'].items():
+        print(f"❌ {name}\n    sync:  {values['sync']}\n    async: {values['async']}")
+    print(f"{report['operations'] - len(report['mismatches'])}/{report['operations']} 个操作结果一致")
+    sys.exit(1 if report['mismatches'] else 0)
@@ -0,0 +1,129 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+FACTOR = 'BUFFER'
+VERSION = 'v1'
+
+
+def _record(code: str, day: str = '20250701', **overrides) -> dict:
+    record = {'factor_name': FACTOR, 'version': VERSION, 'code': code, 'day': day, 'data_type': '100',
+              'factor_path': f'100/{FACTOR}/{VERSION}/{day}/{code}.parquet', 'extra_info': {'check': True}}
+    record.update(overrides)
+    return record
+
+
+def _stored(api, codes, day: str = '20250701') -> int:
+    return sum(1 for code in codes if api.exists_source_code_data(FACTOR, VERSION, code, day))
+
+
+def _writer_thread_alive() -> bool:
+    return any(thread.name == 'FactorResultBufferWriter' for thread in threading.enumerate())
+
+
+def check_row_threshold(api) -> dict:
+    """缓冲达到 max_rows 条时才批量写入"""
+    from database.mysql_database import FactorResultBufferWriter
+
+    codes = ['100001', '100002', '100003']
+    writer = FactorResultBufferWriter(api, max_rows=3, max_interval=0, background=False)
+    writer.add(_record(codes[0]))
+    writer.add(_record(codes[1]))
+    before = _stored(api, codes)
+    writer.add(_record(codes[2]))
+    return {'buffered_below_threshold': before == 0, 'flushed_at_threshold': _stored(api, codes) == 3,
+            'written': writer.written == 3}
+
+
+def check_age_flush(api) -> dict:
+    """background=False：最早的记录等待超过 max_interval 后，flush_if_due / 下一次 add 触发写入"""
+    from database.mysql_database import FactorResultBufferWriter
+
+    codes = ['200001', '200002', '200003']
+    writer = FactorResultBufferWriter(api, max_rows=100, max_interval=0.2, background=False)
+    writer.add(_record(codes[0]))
+    not_due = writer.flush_if_due() == [] and _stored(api, codes) == 0
+    time.sleep(0.25)
+    due = len(writer.flush_if_due()) == 1 and _stored(api, codes[:1]) == 1
+    writer.add(_record(codes[1]))
+    time.sleep(0.25)
+    # 超时后的 add 一并写入之前缓冲的记录
+    writer.add(_record(codes[2]))
+    return {'not_due_before_interval': not_due, 'flush_if_due_after_interval': due,
+            'add_flushes_when_due': _stored(api, codes) == 3}
+
+
+def check_background_flush(api) -> dict:
+    """background=True：生产者停顿时后台线程按时写入，close 后线程退出"""
+    from database.mysql_database import FactorResultBufferWriter
+
+    codes = ['300001']
+    writer = FactorResultBufferWriter(api, max_rows=100, max_interval=0.2)
+    writer.add(_record(codes[0]))
+    deadline = time.monotonic() + 2.0
+    while _stored(api, codes) == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    flushed = _stored(api, codes) == 1
+    writer.close()
+    return {'flushed_without_add': flushed, 'thread_stopped': not _writer_thread_alive()}
+
+
+def check_close_flushes(api) -> dict:
+    """with 退出时写入剩余记录"""
+    from database.mysql_database import FactorResultBufferWriter
+
+    codes = ['400001', '400002']
+    with FactorResultBufferWriter(api, max_rows=100, max_interval=60) as writer:
+        for code in codes:
+            writer.add(_record(code))
+        buffered = _stored(api, codes) == 0
+    return {'buffered_until_close': buffered, 'flushed_on_exit': _stored(api, codes) == 2}
+
+
+def check_failures(api) -> dict:
+    """写入失败的记录进入 failures，同一批次的其他记录照常入库"""
+    from database.mysql_database import FactorResultBufferWriter
+
+    codes = ['500001', '500002', '500003']
+    with FactorResultBufferWriter(api, max_rows=100, background=False) as writer:
+        writer.add(_record(codes[0]))
+        # data_type 不能为空
+        writer.add(_record(codes[1], data_type=None))
+        writer.add(_record(codes[2]))
+    return {'failure_reported': [f['code'] for f in writer.failures] == [codes[1]],
+            'others_stored': _stored(api, [codes[0], codes[2]]) == 2, 'written': writer.written == 2}
+
+
+CHECKS = [
+    ('row_threshold', check_row_threshold),
+    ('age_flush', check_age_flush),
+    ('background_flush', check_background_flush),
+    ('close_flushes', check_close_flushes),
+    ('failures', check_failures),
+]
+
+
+def check_buffer_writer(workdir: str) -> dict:
+    """在 SQLite 上检查 FactorResultBufferWriter 的按条数 / 按时间写入与失败记录，返回 {'checks', 'results', 'failures'}"""
+    from benchmark.checks import run_checks
+    from benchmark.sqlite_backend import use_sqlite
+    from database.mysql_database import GetFactorDataAPI
+
+    use_sqlite(os.path.join(workdir, 'buffer_writer.db'))
+    api = GetFactorDataAPI()
+    api.cache = None
+    return run_checks(CHECKS, api)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='检查 FactorResultBufferWriter 的写入时机与失败处理')
+    parser.parse_args()
+    from benchmark.checks import exit_with_report
+
+    exit_with_report(check_buffer_writer(tempfile.mkdtemp(prefix='factor_buffer_writer_')))
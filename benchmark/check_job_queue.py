@@ -0,0 +1,136 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+FACTOR = 'QUEUE'
+DAY = '20250701'
+# SQLite 的 NOW() 精确到秒，租约至少要等过一个整秒才算过期
+LEASE_SECONDS = 1
+
+
+def _records(version: str, codes) -> list:
+    return [{'factor_name': FACTOR, 'version': version, 'code': code, 'day': DAY, 'data_type': '100',
+             'factor_path': f'100/{FACTOR}/{version}/{DAY}/{code}.parquet'} for code in codes]
+
+
+def _queue(api, worker_id: str, max_retries: int = 3, retry_delay: float = 0.0, lease_seconds: int = 600):
+    from database.job_queue import FactorJobQueue
+
+    return FactorJobQueue(api, lease_seconds=lease_seconds, worker_id=worker_id,
+                          retry_config={'max_retries': max_retries, 'retry_delay': retry_delay,
+                                        'backoff_factor': 2.0})
+
+
+def _codes(jobs) -> set:
+    return {job['code'] for job in jobs}
+
+
+def check_enqueue(api) -> dict:
+    """重复入队不产生重复任务"""
+    queue = _queue(api, 'enqueue')
+    first = queue.enqueue(_records('enqueue', ['000001', '000002']))
+    second = queue.enqueue(_records('enqueue', ['000001', '000002', '000003']))
+    return {'first': first == 2, 'only_new': second == 1,
+            'pending': queue.stats(FACTOR, 'enqueue')['pending'] == 3}
+
+
+def check_claim_exclusive(api) -> dict:
+    """租约有效期内，其他 worker 领不到同一个任务"""
+    codes = [f'{i:06d}' for i in range(6)]
+    first, second = _queue(api, 'worker-a'), _queue(api, 'worker-b')
+    first.enqueue(_records('exclusive', codes))
+    jobs_a = first.claim(FACTOR, 'exclusive', 4)
+    jobs_b = second.claim(FACTOR, 'exclusive', 4)
+    return {'disjoint': not (_codes(jobs_a) & _codes(jobs_b)),
+            'all_claimed': _codes(jobs_a) | _codes(jobs_b) == set(codes),
+            'leased': first.stats(FACTOR, 'exclusive')['leased'] == len(codes)}
+
+
+def check_lease_expiry(api) -> dict:
+    """worker 没有完成任务、租约过期后任务可被重新领取；原 worker 再回写时不覆盖"""
+    codes = ['000001', '000002']
+    crashed = _queue(api, 'crashed', lease_seconds=LEASE_SECONDS)
+    other = _queue(api, 'other')
+    crashed.enqueue(_records('lease', codes))
+    jobs = crashed.claim(FACTOR, 'lease', 10)
+    blocked = other.claim(FACTOR, 'lease', 10) == []
+    time.sleep(LEASE_SECONDS + 1.1)
+    reclaimed = other.claim(FACTOR, 'lease', 10)
+    # 原 worker 的租约已被接管，complete 不生效
+    stale_complete = crashed.complete(jobs[0], extra_info={'worker': 'crashed'})
+    completed = all(other.complete(job, extra_info={'worker': 'other'}) for job in reclaimed)
+    stats = other.stats(FACTOR, 'lease')
+    return {'blocked_while_leased': blocked, 'reclaimed_after_expiry': _codes(reclaimed) == set(codes),
+            'stale_complete_rejected': not stale_complete, 'completed': completed,
+            'all_success': stats['success'] == len(codes) and stats['leased'] == 0}
+
+
+def check_renew(api) -> dict:
+    """续约后租约不会按原时间过期"""
+    queue = _queue(api, 'renew', lease_seconds=LEASE_SECONDS)
+    other = _queue(api, 'other')
+    queue.enqueue(_records('renew', ['000001']))
+    jobs = queue.claim(FACTOR, 'renew', 10)
+    queue.lease_seconds = 600
+    renewed = queue.renew(jobs) == 1
+    time.sleep(LEASE_SECONDS + 1.1)
+    return {'renewed': renewed, 'not_reclaimed': other.claim(FACTOR, 'renew', 10) == []}
+
+
+def check_retry_backoff(api) -> dict:
+    """失败后按退避时间等待，期间不被领取"""
+    queue = _queue(api, 'backoff', retry_delay=600)
+    queue.enqueue(_records('backoff', ['000001']))
+    job = queue.claim(FACTOR, 'backoff', 10)[0]
+    retry_count = queue.fail(job, 'boom')
+    return {'retry_count': retry_count == 1, 'waiting_for_backoff': queue.claim(FACTOR, 'backoff', 10) == [],
+            'failed': queue.stats(FACTOR, 'backoff')['failed'] == 1}
+
+
+def check_retry_exhaustion(api) -> dict:
+    """失败任务在退避结束后重新领取，重试次数达到 max_retries 后不再领取"""
+    queue = _queue(api, 'exhaust', max_retries=2)
+    queue.enqueue(_records('exhaust', ['000001']))
+    counts = []
+    for _ in range(3):
+        jobs = queue.claim(FACTOR, 'exhaust', 10)
+        if not jobs:
+            break
+        counts.append(queue.fail(jobs[0], 'boom'))
+    return {'retried_until_limit': counts == [1, 2],
+            'not_claimed_after_limit': queue.claim(FACTOR, 'exhaust', 10) == []}
+
+
+CHECKS = [
+    ('enqueue', check_enqueue),
+    ('claim_exclusive', check_claim_exclusive),
+    ('lease_expiry', check_lease_expiry),
+    ('renew', check_renew),
+    ('retry_backoff', check_retry_backoff),
+    ('retry_exhaustion', check_retry_exhaustion),
+]
+
+
+def check_job_queue(workdir: str) -> dict:
+    """在 SQLite 上检查 FactorJobQueue 的领取、租约过期接管与重试，返回 {'checks', 'results', 'failures'}"""
+    from benchmark.checks import run_checks
+    from benchmark.sqlite_backend import use_sqlite
+    from database.mysql_database import GetFactorDataAPI
+
+    use_sqlite(os.path.join(workdir, 'job_queue.db'))
+    api = GetFactorDataAPI()
+    api.cache = None
+    return run_checks(CHECKS, api)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='检查 FactorJobQueue 的租约、接管与重试')
+    parser.parse_args()
+    from benchmark.checks import exit_with_report
+
+    exit_with_report(check_job_queue(tempfile.mkdtemp(prefix='factor_job_queue_')))
@@ -0,0 +1,113 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+FACTOR_TYPE = '100'
+FACTOR = 'LOCAL'
+CODES = ['000001', '000002', '000003']
+DAYS = ['20250701', '20250702']
+
+
+def _frame(value: float, rows: int = 3) -> pd.DataFrame:
+    return pd.DataFrame({'value': [value] * rows, 'seq': list(range(rows))})
+
+
+def _values(storage, version: str, code: str, day: str) -> list:
+    path = storage.path_for(FACTOR_TYPE, FACTOR, version, code, day)
+    return storage.read_path(path, code, day)['value'].tolist()
+
+
+def check_single_rewrite(storage) -> dict:
+    """同一个 (code, day) 重复 write 只保留最后一次的结果"""
+    code, day = CODES[0], DAYS[0]
+    storage.write(_frame(1.0), FACTOR_TYPE, FACTOR, 'single', code, day)
+    storage.write(_frame(2.0), FACTOR_TYPE, FACTOR, 'single', code, day)
+    return {'latest_only': _values(storage, 'single', code, day) == [2.0] * 3}
+
+
+def check_batch_rewrite(storage) -> dict:
+    """write_batch 重写部分 code：被重写的只保留新结果，其他 code 不受影响，单条 write 覆盖批量写入的结果"""
+    frames = {(code, day): _frame(1.0) for day in DAYS for code in CODES}
+    storage.write_batch(frames, FACTOR_TYPE, FACTOR, 'batch')
+    storage.write_batch({(CODES[0], DAYS[0]): _frame(2.0)}, FACTOR_TYPE, FACTOR, 'batch')
+    storage.write(_frame(3.0), FACTOR_TYPE, FACTOR, 'batch', CODES[1], DAYS[0])
+    return {
+        'batch_rewrite_latest_only': _values(storage, 'batch', CODES[0], DAYS[0]) == [2.0] * 3,
+        'single_overrides_batch': _values(storage, 'batch', CODES[1], DAYS[0]) == [3.0] * 3,
+        'others_unchanged': all(_values(storage, 'batch', code, day) == [1.0] * 3
+                                for code, day in [(CODES[2], DAYS[0]), (CODES[0], DAYS[1])]),
+        'row_count': len(storage.read_range(FACTOR_TYPE, FACTOR, 'batch')) == len(frames) * 3,
+    }
+
+
+def check_concurrent_writes(storage) -> dict:
+    """多个线程同时写入同一分区，结果不丢失"""
+    day = DAYS[0]
+    codes = [f'{i:06d}' for i in range(100, 116)]
+    threads = [threading.Thread(target=storage.write, args=(_frame(float(i)), FACTOR_TYPE, FACTOR, 'concurrent',
+                                                              code, day))
+               for i, code in enumerate(codes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {'all_present': all(_values(storage, 'concurrent', code, day) == [float(i)] * 3
+                               for i, code in enumerate(codes))}
+
+
+def check_versions_isolated(storage) -> dict:
+    """不同版本写入不同的数据集，新版本重算不覆盖旧版本"""
+    code, day = CODES[0], DAYS[0]
+    storage.write(_frame(1.0), FACTOR_TYPE, FACTOR, 'v1', code, day)
+    storage.write(_frame(2.0), FACTOR_TYPE, FACTOR, 'v2', code, day)
+    return {'v1_kept': _values(storage, 'v1', code, day) == [1.0] * 3,
+            'v2_written': _values(storage, 'v2', code, day) == [2.0] * 3}
+
+
+def check_read_range(storage) -> dict:
+    """read_range 按 code 列表与日期区间过滤"""
+    frames = {(code, day): _frame(float(i)) for i, (code, day) in
+              enumerate((code, day) for day in DAYS for code in CODES)}
+    storage.write_batch(frames, FACTOR_TYPE, FACTOR, 'range')
+    df = storage.read_range(FACTOR_TYPE, FACTOR, 'range', codes=CODES[:2], start_day=DAYS[1], end_day=DAYS[1])
+    pairs = set(df[['code', 'day']].drop_duplicates().itertuples(index=False, name=None))
+    return {'filtered': pairs == {(code, DAYS[1]) for code in CODES[:2]}, 'rows': len(df) == 2 * 3}
+
+
+CHECKS = [
+    ('single_rewrite', check_single_rewrite),
+    ('batch_rewrite', check_batch_rewrite),
+    ('concurrent_writes', check_concurrent_writes),
+    ('versions_isolated', check_versions_isolated),
+    ('read_range', check_read_range),
+]
+
+
+def check_local_storage(workdir: str) -> dict:
+    """按 day 与按 code 分区各检查一遍 LocalDatasetStorage，返回 {'checks', 'results', 'failures'}"""
+    from benchmark.checks import run_checks
+    from factor_cli.storage import LocalDatasetStorage
+
+    checks = []
+    for partition_by in ('day', 'code'):
+        # 较小的 row group，读取时的谓词下推覆盖多个 row group
+        storage = LocalDatasetStorage(os.path.join(workdir, f'local_storage_{partition_by}'),
+                                      partition_by=partition_by, row_group_size=2)
+        checks.extend((f'{partition_by}.{name}', lambda check=check, storage=storage: check(storage))
+                      for name, check in CHECKS)
+    return run_checks(checks)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='检查 LocalDatasetStorage 的幂等重写、版本隔离与谓词下推读取')
+    parser.parse_args()
+    from benchmark.checks import exit_with_report
+
+    exit_with_report(check_local_storage(tempfile.mkdtemp(prefix='factor_local_storage_')))
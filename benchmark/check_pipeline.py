@@ -0,0 +1,188 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+FACTOR = 'RMI'
+FACTOR_TYPE = '100'
+VERSION = 'pipeline'
+CODES = [f'{i:06d}' for i in range(6)]
+DAYS = ['20250701', '20250702']
+# 原始数据缺少 price 列，计算阶段必然失败
+BAD_CODE = '999999'
+
+
+class _CountingGetLS:
+    """记录读取次数与读取时尚未写完的任务数（在途任务），BAD_CODE 返回无法计算的数据"""
+
+    def __init__(self, get_ls, storage):
+        self.get_ls = get_ls
+        self.storage = storage
+        self.calls = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def read_ls(self, code: str, day: str) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+            self.max_in_flight = max(self.max_in_flight, self.calls - self.storage.writes)
+        if code == BAD_CODE:
+            return pd.DataFrame({'volume': [1.0, 2.0]})
+        return self.get_ls.read_ls(code, day)
+
+
+class _SlowStorage:
+    """每次写入前等待 delay 秒，模拟上传比计算慢"""
+
+    def __init__(self, storage, delay: float):
+        self.storage = storage
+        self.delay = delay
+        self.writes = 0
+        self._lock = threading.Lock()
+
+    def write(self, df, factor_type, factor_name, version, code, day):
+        time.sleep(self.delay)
+        path = self.storage.write(df, factor_type, factor_name, version, code, day)
+        with self._lock:
+            self.writes += 1
+        return path
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+
+class _DataApi:
+    def __init__(self, get_ls):
+        self.getLS = get_ls
+
+
+def _pipeline(api, fastpai, delay: float = 0.0, queue_size: int = 8):
+    from factor_cli.pipeline import FactorPipeline
+    from factor_cli.storage import RemoteStorage
+
+    storage = _SlowStorage(RemoteStorage(data_api=fastpai), delay)
+    get_ls = _CountingGetLS(fastpai.getLS, storage)
+    pipeline = FactorPipeline(FACTOR, FACTOR_TYPE, version=VERSION, prefetch_workers=1, compute_workers=1,
+                              write_workers=1, queue_size=queue_size, data_api=_DataApi(get_ls), api=api,
+                              storage=storage, write_batch_size=4)
+    return pipeline, get_ls, storage
+
+
+def _stage_threads():
+    # 流水线各阶段线程的 target 是 worker / feed，缓冲写入器的线程名为 FactorResultBufferWriter
+    return [thread for thread in threading.enumerate()
+            if thread.name.endswith(('(worker)', '(feed)')) or thread.name == 'FactorResultBufferWriter']
+
+
+def _wait_threads_exit(timeout: float = 5.0) -> int:
+    deadline = time.monotonic() + timeout
+    while _stage_threads() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return len(_stage_threads())
+
+
+def check_end_to_end(api, fastpai) -> dict:
+    """全部成功：结果入库、可按记录的路径读回，且与直接计算一致"""
+    from factor_cli import cli
+
+    pairs = [(code, day) for day in DAYS for code in CODES]
+    pipeline, _, storage = _pipeline(api, fastpai)
+    results = list(pipeline.run(pairs))
+    missing = api.get_missing_node_factor_data(FACTOR, VERSION, CODES, DAYS)
+    code, day = pairs[0]
+    rows = api.get_node_factor_paths(FACTOR, VERSION, [code], day, day)
+    stored = storage.read_path(rows[0]['factor_path'], code, day) if rows else None
+    expected = cli.compute_factor(cli.load_factor_framework(VERSION), FACTOR, fastpai.getLS.read_ls(code, day))
+    return {
+        'results': len(results) == len(pairs) and all(r['status'] == 'success' for r in results),
+        'no_missing': missing == [],
+        'stored_matches_compute': stored is not None and stored.reset_index(drop=True).equals(
+            expected.reset_index(drop=True)),
+        'threads_exit': _wait_threads_exit() == 0,
+    }
+
+
+def check_backpressure(api, fastpai) -> dict:
+    """上传变慢时预取被有界队列挡住：读取了但没写完的任务数不超过 队列容量 + 各阶段 worker 数"""
+    queue_size = 1
+    pairs = [(code, day) for day in DAYS for code in CODES]
+    pipeline, get_ls, _ = _pipeline(api, fastpai, delay=0.02, queue_size=queue_size)
+    results = list(pipeline.run(pairs))
+    # 预取 -> 计算、计算 -> 上传两个队列，加上三个阶段各一个 worker 手里的任务
+    bound = 2 * queue_size + 3
+    return {
+        'results': len(results) == len(pairs),
+        'bounded_in_flight': get_ls.max_in_flight <= bound,
+        'max_in_flight': get_ls.max_in_flight,
+        'bound': bound,
+    }
+
+
+def check_compute_failure(api, fastpai) -> dict:
+    """计算失败的任务作为 failed 产出，不影响其他任务，也不会卡住流水线"""
+    pairs = [(CODES[0], DAYS[0]), (BAD_CODE, DAYS[0]), (CODES[1], DAYS[0])]
+    pipeline, _, _ = _pipeline(api, fastpai)
+    results = {r['code']: r for r in pipeline.run(pairs)}
+    return {
+        'failed_reported': results.get(BAD_CODE, {}).get('status') == 'failed',
+        'others_succeed': all(results.get(code, {}).get('status') == 'success' for code in CODES[:2]),
+        'failure_recorded': [f['code'] for f in pipeline.failures] == [BAD_CODE],
+        'threads_exit': _wait_threads_exit() == 0,
+    }
+
+
+def check_early_close(api, fastpai) -> dict:
+    """调用方提前结束迭代：各阶段线程退出，已产出的成功结果已经入库"""
+    pairs = [(code, '20250703') for code in CODES]
+    pipeline, _, _ = _pipeline(api, fastpai, delay=0.02, queue_size=1)
+    iterator = pipeline.run(pairs)
+    yielded = [next(iterator), next(iterator)]
+    iterator.close()
+    return {
+        'yielded_stored': all(api.exists_source_code_data(FACTOR, VERSION, r['code'], r['day'])
+                              for r in yielded if r['status'] == 'success'),
+        'threads_exit': _wait_threads_exit() == 0,
+    }
+
+
+CHECKS = [
+    ('end_to_end', check_end_to_end),
+    ('backpressure', check_backpressure),
+    ('compute_failure', check_compute_failure),
+    ('early_close', check_early_close),
+]
+
+
+def check_pipeline(workdir: str) -> dict:
+    """用 SQLite 与本地存储替身端到端运行 FactorPipeline，返回 {'checks', 'results', 'failures'}"""
+    from benchmark import fake_fastpai
+    from benchmark.checks import run_checks
+    from benchmark.sqlite_backend import use_sqlite
+    from database.mysql_database import GetFactorDataAPI
+
+    use_sqlite(os.path.join(workdir, 'pipeline.db'))
+    fastpai = fake_fastpai.LocalFastpai(os.path.join(workdir, 'pipeline_storage'), rows=500)
+    api = GetFactorDataAPI()
+    api.cache = None
+    api.create_factor_info({'factor_name': FACTOR, 'version': VERSION, 'factor_type': FACTOR_TYPE,
+                            'submitted_by': 'check'})
+    return run_checks(CHECKS, api, fastpai)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='用 SQLite 与本地存储替身端到端检查 FactorPipeline')
+    parser.parse_args()
+    from benchmark.checks import exit_with_report
+    from benchmark.reference_engine import load_engine
+    from factor_cli import cli
+
+    engine, engine_name = load_engine()
+    cli.load_factor_framework = lambda version=None: engine
+    exit_with_report(check_pipeline(tempfile.mkdtemp(prefix='factor_pipeline_')), engine_name)
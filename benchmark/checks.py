@@ -0,0 +1,28 @@
+import sys
+
+
+def run_checks(checks, *args) -> dict:
+    """
+    依次执行 [(名称, 函数)]，函数返回 {检查项: bool 或说明值}
+    任何一项为 False 或抛出异常即记为失败，返回 {'checks', 'results', 'failures'}
+    """
+    report = {}
+    for name, check in checks:
+        try:
+            report[name] = check(*args)
+        except Exception as e:
+            report[name] = {'error': repr(e)}
+    failures = {
+        name: result for name, result in report.items()
+        if 'error' in result or not all(value for value in result.values() if isinstance(value, bool))
+    }
+    return {'checks': len(checks), 'results': report, 'failures': failures}
+
+
+def exit_with_report(report: dict, label: str = ''):
+    """命令行入口：打印不通过的检查，有失败时返回非 0"""
+    for name, result in report['failures'].items():
+        print(f"❌ {name}: {result}")
+    suffix = f"（{label}）" if label else ''
+    print(f"{report['checks'] - len(report['failures'])}/{report['checks']} 项检查通过{suffix}")
+    sys.exit(1 if report['failures'] else 0)
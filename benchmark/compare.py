@@ -0,0 +1,59 @@
+import argparse
+import json
+import sys
+
+# 越小越好的指标
+LOWER_IS_BETTER = ('_ms', 'seconds')
+# 越大越好的指标
+HIGHER_IS_BETTER = ('_per_second',)
+
+
+def _flatten(data: dict, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(old: dict, new: dict, threshold: float):
+    """返回 [(指标, 旧值, 新值, 变化比例, 是否退化)]"""
+    old_flat = _flatten(old['results'])
+    new_flat = _flatten(new['results'])
+    rows = []
+    for name in sorted(old_flat.keys() & new_flat.keys()):
+        before, after = old_flat[name], new_flat[name]
+        if before == 0:
+            continue
+        change = (after - before) / before
+        if name.endswith(LOWER_IS_BETTER):
+            regressed = change > threshold
+        elif name.endswith(HIGHER_IS_BETTER):
+            regressed = change < -threshold
+        else:
+            continue
+        rows.append((name, before, after, change, regressed))
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='对比两次基准测试结果')
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.2, help='超过该比例视为退化')
+    args = parser.parse_args()
+    with open(args.old, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(args.new, encoding='utf-8') as f:
+        new = json.load(f)
+
+    print(f"{old['meta'].get('commit')} -> {new['meta'].get('commit')}")
+    regressions = 0
+    for name, before, after, change, regressed in compare(old, new, args.threshold):
+        flag = '❌' if regressed else '  '
+        regressions += regressed
+        print(f"{flag} {name:<60} {before:>14.4f} {after:>14.4f} {change:+8.1%}")
+    sys.exit(1 if regressions else 0)
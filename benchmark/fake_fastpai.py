@@ -0,0 +1,96 @@
+import os
+import threading
+import time
+import zlib
+
+import pandas as pd
+
+from benchmark.synthetic import make_level_data
+
+
+class _LocalGetLS:
+    """getLS 的本地实现：优先读取 root/ls/{day}/{code}.parquet，不存在时生成模拟数据"""
+
+    def __init__(self, root: str, rows: int, latency: float):
+        self.root = root
+        self.rows = rows
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def read_ls(self, code: str, day: str) -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        path = os.path.join(self.root, 'ls', str(day), f"{code}.parquet")
+        if os.path.exists(path):
+            return pd.read_parquet(path)
+        seed = zlib.crc32(f"{code}{day}".encode('utf-8'))
+        return make_level_data(self.rows, seed=seed)
+
+
+class _LocalPutAPI:
+    """putAPI 的本地实现：结果写入 root 下对应路径"""
+
+    def __init__(self, root: str, latency: float):
+        self.root = root
+        self.latency = latency
+        self.bytes_written = 0
+        self._lock = threading.Lock()
+
+    def put_parquet(self, df: pd.DataFrame, path: str, verbose: int = 0) -> dict:
+        if self.latency:
+            time.sleep(self.latency)
+        full_path = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        df.to_parquet(full_path)
+        with self._lock:
+            self.bytes_written += os.path.getsize(full_path)
+        return {'success': True, 'path': path}
+
+
+class _LocalGetAPI:
+    """getAPI 的本地实现，读取路径与 node_factor 一致（122/data2/... 映射到 122/...）"""
+
+    def __init__(self, root: str, latency: float):
+        self.root = root
+        self.latency = latency
+
+    def get_df(self, path: str) -> pd.DataFrame:
+        if self.latency:
+            time.sleep(self.latency)
+        path = path.replace('122/data2/', '122/', 1)
+        return pd.read_parquet(os.path.join(self.root, path))
+
+
+class LocalFastpai:
+    """
+    dw_data.fastpai 的本地文件系统替身，提供 getLS / putAPI / getAPI
+    latency 用于模拟网络延迟（秒）
+    """
+
+    def __init__(self, root: str, rows: int = 5000, read_latency: float = 0.0,
+                 write_latency: float = 0.0):
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.getLS = _LocalGetLS(root, rows, read_latency)
+        self.putAPI = _LocalPutAPI(root, write_latency)
+        self.getAPI = _LocalGetAPI(root, read_latency)
+
+
+def install(fastpai: LocalFastpai):
+    """把本地替身注册为 dw_data.fastpai，node_factor 等代码无需修改即可使用"""
+    import sys
+    import types
+
+    package = types.ModuleType('dw_data')
+    module = types.ModuleType('dw_data.fastpai')
+    module.getLS = fastpai.getLS
+    module.putAPI = fastpai.putAPI
+    module.getAPI = fastpai.getAPI
+    module.getOrig = None
+    package.fastpai = module
+    sys.modules['dw_data'] = package
+    sys.modules['dw_data.fastpai'] = module
+    return module
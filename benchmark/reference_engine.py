@@ -0,0 +1,128 @@
+import numpy as np
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    cumsum = np.cumsum(np.insert(values, 0, 0.0))
+    out[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return out
+
+
+def _strength_index(momentum: np.ndarray, window: int) -> np.ndarray:
+    momentum = np.nan_to_num(momentum)
+    gain = _rolling_mean(np.clip(momentum, 0, None), window)
+    loss = _rolling_mean(np.clip(-momentum, 0, None), window)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return 100 * gain / (gain + loss)
+
+
+def rsi(price: np.ndarray, window: int = 14) -> np.ndarray:
+    momentum = np.diff(price, prepend=price[:1])
+    return _strength_index(momentum, window)
+
+
+def rmi(price: np.ndarray, window: int = 14, lag: int = 5) -> np.ndarray:
+    momentum = np.zeros(len(price))
+    momentum[lag:] = price[lag:] - price[:-lag]
+    return _strength_index(momentum, window)
+
+
+FACTORS = {'RSI': rsi, 'RMI': rmi}
+
+# 每个因子计算一个点需要的历史行数
+LOOKBACK = {'RSI': 14, 'RMI': 14 + 5}
+
+
+class ReferenceFactor:
+    """与 factor_framework.create_factor 返回对象接口一致的 NumPy 实现"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._price = None
+        self._result = None
+
+    def set_data(self, df):
+        self._price = np.ascontiguousarray(df['price'].to_numpy(), dtype=np.float64)
+
+    def set_params(self, params):
+        pass
+
+    def run(self):
+        self._result = {self.name: FACTORS[self.name](self._price)}
+
+    def get_result(self):
+        return self._result
+
+
+class ReferenceManager:
+    """与 factor_framework.FactorManager 接口一致的 NumPy 实现"""
+
+    def __init__(self):
+        self._factors = {}
+
+    def add_factors(self, names):
+        for name in names:
+            self._factors[name] = ReferenceFactor(name)
+
+    def set_data(self, df):
+        for factor in self._factors.values():
+            factor.set_data(df)
+
+    def set_all_params(self, params):
+        pass
+
+    def run_all(self, n_threads: int = 1):
+        if n_threads > 1:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                list(executor.map(lambda factor: factor.run(), self._factors.values()))
+            return
+        for factor in self._factors.values():
+            factor.run()
+
+    def get_merged_results(self):
+        merged = {}
+        for factor in self._factors.values():
+            merged.update(factor.get_result())
+        return merged
+
+    def get_factor_cols(self, name):
+        return [name]
+
+
+class ReferenceEngine:
+    """factor_framework 不可用时基准测试使用的参照实现（RSI / RMI）"""
+
+    __version__ = 'reference'
+
+    @staticmethod
+    def create_factor(name: str):
+        if name not in FACTORS:
+            raise ValueError(f"未注册的因子 {name}")
+        return ReferenceFactor(name)
+
+    @staticmethod
+    def create_manager():
+        return ReferenceManager()
+
+    @staticmethod
+    def list_factors():
+        return list(FACTORS)
+
+
+def load_engine():
+    """优先加载 lib/factor_framework，失败时返回参照实现，返回 (engine, 名称)"""
+    import os
+    import sys
+
+    lib_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lib')
+    if lib_dir not in sys.path:
+        sys.path.append(lib_dir)
+    try:
+        import factor_framework as ff
+        return ff, 'factor_framework'
+    except Exception:
+        return ReferenceEngine(), 'reference'
@@ -0,0 +1,614 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from benchmark import fake_fastpai
+from benchmark.reference_engine import load_engine
+from benchmark.synthetic import make_level_data
+
+
+def _latency(func, n: int) -> dict:
+    """执行 n 次，返回每次调用耗时的 p50 / p95 / mean（毫秒）"""
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        'n': n,
+        'p50_ms': samples[len(samples) // 2],
+        'p95_ms': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        'mean_ms': sum(samples) / len(samples),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+def setup_backend(backend: str, workdir: str):
+    """sqlite：本地临时库；mysql：使用 env 中的数据库配置（建议指向本地测试库）"""
+    if backend == 'sqlite':
+        from benchmark.sqlite_backend import use_sqlite
+        use_sqlite(os.path.join(workdir, 'factor_platform.db'))
+
+
+def bench_round_trips(api) -> dict:
+    """单次调用发往数据库的往返次数（不走元数据缓存）"""
+    factor_name = 'BENCH_RT'
+
+    def count(func):
+        api.invalidate_cache()
+        with api.count_round_trips() as counter:
+            func()
+        return counter.count
+
+    return {
+        'create_factor_info': count(lambda: api.create_factor_info(
+            {'factor_name': factor_name, 'version': 'v1', 'factor_type': '100', 'submitted_by': 'bench'})),
+        'get_new_factor_name_not_approved': count(lambda: api.get_new_factor_name(factor_name)),
+        'update_factor_status': count(lambda: api.update_factor_status(factor_name, 'v1')),
+        'update_factor_status_already_approved': count(lambda: api.update_factor_status(factor_name, 'v1')),
+        'update_factor_status_not_found': count(lambda: api.update_factor_status(factor_name, 'missing')),
+        'get_new_factor_name': count(lambda: api.get_new_factor_name(factor_name)),
+        'factor_exists': count(lambda: api.factor_exists(factor_name, 'v1')),
+        'get_all_factor_version': count(lambda: api.get_all_factor_version(factor_name)),
+        'get_factor_pending_status': count(lambda: api.get_factor_pending_status(factor_name)),
+        'write_node_factor_data': count(lambda: api.write_node_factor_data(
+            factor_name, 'v1', '000001', '20250701', '100', 'bench/path.parquet')),
+        'exists_source_code_data': count(lambda: api.exists_source_code_data(factor_name, 'v1', '000001', '20250701')),
+        # 10 条失败记录应当是一条多行 INSERT，不随条数增加
+        'write_node_factor_failures_10': count(lambda: api.write_node_factor_failures([
+            {'factor_name': factor_name, 'version': 'v1', 'code': f'{i:06d}', 'day': '20250702', 'data_type': '100',
+             'factor_path': 'bench/path.parquet', 'error': 'bench'} for i in range(10)])),
+    }
+
+
+# 未命名唯一键在 MySQL / SQLite 下的索引名
+UNIQUE_KEYS = ('factor_name', 'sqlite_autoindex_factor_info_1', 'sqlite_autoindex_factor_result_1')
+
+# 热点查询期望使用的索引，None 表示只要求不是全表扫描
+EXPECTED_INDEXES = {
+    # EXISTS 子查询走 (factor_name, version) 唯一键同样是覆盖索引
+    'get_new_factor_name': ('idx_name_status_updated', *UNIQUE_KEYS),
+    'get_new_factor_names': ('idx_name_status_updated',),
+    # 单点查询：两个组合索引都能用满 5 个等值条件
+    'exists_source_code_data': ('idx_status_code_date', 'idx_code_date', *UNIQUE_KEYS),
+    'get_missing_node_factor_data': ('idx_status_code_date', 'idx_status_date_code'),
+    'get_node_factor_paths': None,
+    'get_factor_watermarks': ('idx_status_code_date',),
+    'get_failed_node_factor_data': ('idx_status_code_date', 'idx_status_date_code'),
+    'get_exists_factor_versions': ('idx_code_date',),
+}
+
+
+class _RecordingCursor:
+    def __init__(self, cursor, statements):
+        self._cursor = cursor
+        self._statements = statements
+
+    def execute(self, sql, params=None):
+        self._statements.append((sql, params))
+        return self._cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _RecordingConnection:
+    def __init__(self, conn, statements):
+        self._conn = conn
+        self._statements = statements
+
+    def cursor(self):
+        return _RecordingCursor(self._conn.cursor(), self._statements)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+@contextlib.contextmanager
+def capture_sql(api):
+    """记录 with 块内 api.connection() 上执行的语句"""
+    statements = []
+    original = api.connection
+
+    @contextlib.contextmanager
+    def connection():
+        with original() as conn:
+            yield _RecordingConnection(conn, statements)
+
+    api.connection = connection
+    try:
+        yield statements
+    finally:
+        del api.connection
+
+
+def explain(api, backend: str, sql: str, params) -> dict:
+    """返回语句用到的索引、是否覆盖索引、是否有全表扫描"""
+    with api.connection() as conn:
+        cursor = conn.cursor()
+        if backend == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            details = [row['detail'] for row in cursor.fetchall()]
+            indexes = [name for detail in details for name in re.findall(r'USING (?:COVERING )?INDEX (\w+)', detail)]
+            covering = bool(details) and all('COVERING INDEX' in d for d in details if 'factor_' in d)
+            full_scan = any(re.match(r'SCAN factor_\w+$', d) for d in details)
+        else:
+            cursor.execute('EXPLAIN ' + sql, params)
+            rows = [row for row in cursor.fetchall() if row.get('table')]
+            indexes = [row['key'] for row in rows if row.get('key')]
+            covering = bool(rows) and all('Using index' in (row.get('Extra') or '') for row in rows)
+            full_scan = any(row.get('type') == 'ALL' for row in rows)
+    return {'indexes': indexes, 'covering': covering, 'full_scan': full_scan}
+
+
+def bench_explain(api, backend: str, codes, days) -> dict:
+    """EXPLAIN 热点查询，确认走了预期的组合索引"""
+    factor_name, version = 'BENCH_API', 'v1'
+    calls = {
+        'get_new_factor_name': lambda: api._get_new_factor_name(factor_name),
+        'get_new_factor_names': lambda: api.get_new_factor_names([factor_name, 'RMI']),
+        'exists_source_code_data': lambda: api.exists_source_code_data(factor_name, version, codes[0], days[0]),
+        'get_missing_node_factor_data': lambda: api.get_missing_node_factor_data(factor_name, version, codes, days),
+        'get_node_factor_paths': lambda: api.get_node_factor_paths(factor_name, version, codes, days[0], days[-1]),
+        'get_factor_watermarks': lambda: api.get_factor_watermarks(factor_name, version),
+        'get_failed_node_factor_data': lambda: api.get_failed_node_factor_data(factor_name, version),
+        'get_exists_factor_versions': lambda: api.get_exists_factor_versions(
+            {factor_name: version, 'RMI': 'bench'}, codes[0], days[0]),
+    }
+    results = {}
+    api.invalidate_cache()
+    for label, call in calls.items():
+        with capture_sql(api) as statements:
+            call()
+        plans = [explain(api, backend, sql, params) for sql, params in statements]
+        expected = EXPECTED_INDEXES[label]
+        indexes = [name for plan in plans for name in plan['indexes']]
+        ok = bool(plans) and not any(plan['full_scan'] for plan in plans)
+        if expected is not None:
+            ok = ok and bool(indexes) and all(name in expected for name in indexes)
+        results[label] = {
+            'indexes': sorted(set(indexes)),
+            'covering': all(plan['covering'] for plan in plans),
+            'ok': ok,
+        }
+    results['all_ok'] = all(item['ok'] for item in results.values())
+    return results
+
+
+def bench_api(api, codes, days, n: int) -> dict:
+    """GetFactorDataAPI 单次调用延迟"""
+    factor_name, version = 'BENCH_API', 'v1'
+    api.create_factor_info({'factor_name': factor_name, 'version': version,
+                            'factor_type': '100', 'submitted_by': 'bench'})
+    api.update_factor_status(factor_name, version)
+    results = {}
+
+    results['get_new_factor_name_cached'] = _latency(lambda i: api.get_new_factor_name(factor_name), n)
+
+    def uncached(i):
+        api.invalidate_cache()
+        api.get_new_factor_name(factor_name)
+    results['get_new_factor_name_uncached'] = _latency(uncached, n)
+
+    def write(i):
+        api.write_node_factor_data(factor_name, version, codes[i % len(codes)], days[i // len(codes) % len(days)],
+                                   '100', 'bench/path.parquet')
+    results['write_node_factor_data'] = _latency(write, min(n, len(codes) * len(days)))
+    results['exists_source_code_data'] = _latency(
+        lambda i: api.exists_source_code_data(factor_name, version, codes[i % len(codes)], days[0]), n)
+
+    records = [
+        {'factor_name': factor_name, 'version': 'v2', 'code': code, 'day': day,
+         'data_type': '100', 'factor_path': 'bench/path.parquet'}
+        for day in days for code in codes
+    ]
+    start = time.perf_counter()
+    api.write_node_factor_data_bulk(records)
+    elapsed = time.perf_counter() - start
+    results['write_node_factor_data_bulk'] = {'rows': len(records), 'seconds': elapsed,
+                                              'rows_per_second': len(records) / elapsed}
+
+    start = time.perf_counter()
+    api.get_missing_node_factor_data(factor_name, version, codes, days)
+    results['get_missing_node_factor_data'] = {'pairs': len(codes) * len(days),
+                                               'seconds': time.perf_counter() - start}
+    results['round_trips'] = bench_round_trips(api)
+    results['pool'] = api.pool_stats()
+    return results
+
+
+def bench_node_factor(cli, codes, days) -> dict:
+    """node_factor 端到端吞吐：首次计算与结果已存在时的读取"""
+    factor_name, version = 'RMI', 'bench'
+    cli.get_api().create_factor_info({'factor_name': factor_name, 'version': version,
+                                   'factor_type': '100', 'submitted_by': 'bench'})
+    cli.get_api().update_factor_status(factor_name, version)
+    pairs = [(code, day) for day in days for code in codes]
+
+    results = {}
+    for label in ('compute', 'read_existing'):
+        start = time.perf_counter()
+        for code, day in pairs:
+            cli.node_factor(code, day, factor_name, '100')
+        elapsed = time.perf_counter() - start
+        results[label] = {'calls': len(pairs), 'seconds': elapsed, 'calls_per_second': len(pairs) / elapsed}
+    return results
+
+
+STARTUP_TARGETS = {
+    'import_factor_cli': 'import factor_cli',
+    'import_database': 'import database',
+    'import_cli_module': 'from factor_cli import cli',
+    'import_node_factor': 'from factor_cli import node_factor',
+}
+
+
+def bench_startup(repeat: int) -> dict:
+    """新解释器中导入各入口的耗时，以及是否带入了 pandas / pymysql"""
+    results = {}
+    for label, statement in STARTUP_TARGETS.items():
+        code = (
+            "import sys, time, json\n"
+            "start = time.perf_counter()\n"
+            f"{statement}\n"
+            "print(json.dumps([time.perf_counter() - start, 'pandas' in sys.modules, 'pymysql' in sys.modules]))"
+        )
+        samples = []
+        for _ in range(repeat):
+            output = subprocess.check_output([sys.executable, '-c', code], cwd=ROOT, text=True)
+            seconds, loads_pandas, loads_pymysql = json.loads(output.strip().splitlines()[-1])
+            samples.append(seconds * 1000)
+        results[label] = {'min_ms': min(samples), 'mean_ms': sum(samples) / len(samples),
+                          'loads_pandas': loads_pandas, 'loads_pymysql': loads_pymysql}
+    return results
+
+
+def bench_async_api(workdir: str, tasks: int, latency: float, concurrency: int) -> dict:
+    """
+    模拟网络延迟下 tasks 个 (检查存在 + 写入结果) 的总耗时
+    对比：同步接口 + 线程池 与 AsyncGetFactorDataAPI 单事件循环并发
+    """
+    import asyncio
+    from concurrent.futures import ThreadPoolExecutor
+
+    from benchmark.sqlite_backend import use_sqlite, use_sqlite_async
+    from database.async_mysql_database import AsyncGetFactorDataAPI, AsyncFactorResultBufferWriter
+    from database.mysql_database import GetFactorDataAPI
+
+    pairs = [(f'{i % 500:06d}', f'2025{(i // 500) % 12 + 1:02d}01') for i in range(tasks)]
+    results = {'tasks': tasks, 'latency_ms': latency * 1000, 'concurrency': concurrency}
+
+    use_sqlite(os.path.join(workdir, 'async_sync.db'), latency=latency, pool_size=concurrency)
+    api = GetFactorDataAPI()
+
+    def sync_task(pair):
+        code, day = pair
+        if not api.exists_source_code_data('BENCH_ASYNC', 'v1', code, day):
+            api.write_node_factor_data('BENCH_ASYNC', 'v1', code, day, '100', 'bench/path.parquet')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(sync_task, pairs))
+    results['sync_threads_seconds'] = time.perf_counter() - start
+
+    async def run_async():
+        async_api = use_sqlite_async(AsyncGetFactorDataAPI(pool_size=concurrency, max_overflow=0),
+                                     os.path.join(workdir, 'async.db'), latency=latency)
+        async with async_api, AsyncFactorResultBufferWriter(async_api, max_rows=500) as writer:
+            async def async_task(pair):
+                code, day = pair
+                if not await async_api.exists_source_code_data('BENCH_ASYNC', 'v1', code, day):
+                    await writer.add({'factor_name': 'BENCH_ASYNC', 'version': 'v1', 'code': code, 'day': day,
+                                      'data_type': '100', 'factor_path': 'bench/path.parquet'})
+
+            start = time.perf_counter()
+            await asyncio.gather(*(async_task(pair) for pair in pairs))
+            await writer.flush()
+            elapsed = time.perf_counter() - start
+            missing = await async_api.get_missing_node_factor_data('BENCH_ASYNC', 'v1', *zip(*pairs))
+        return elapsed, writer.written, len(missing)
+
+    elapsed, written, missing = asyncio.run(run_async())
+    results['async_seconds'] = elapsed
+    results['async_written'] = written
+    results['async_missing_after'] = missing
+    return results
+
+
+def _raw_cache_worker(root: str, rows: int, latency: float, cache_dir: str, factor_name: str, pairs):
+    """子进程：一个因子计算全部 (code, day)，返回下载次数、耗时与峰值 RSS"""
+    import resource
+
+    from factor_cli.cli import compute_factor
+    from factor_cli.raw_cache import RawDataCache
+
+    getLS = fake_fastpai.LocalFastpai(root, rows=rows, read_latency=latency).getLS
+    cache = RawDataCache(cache_dir) if cache_dir else None
+    start = time.perf_counter()
+    for code, day in pairs:
+        df = cache.get_or_load(code, day, getLS.read_ls) if cache else getLS.read_ls(code, day)
+        compute_factor(_raw_cache_engine, factor_name, df)
+    return getLS.calls, time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+_raw_cache_engine = None
+
+
+def bench_raw_cache(engine, workdir: str, codes, days, rows: int, latency: float, processes: int) -> dict:
+    """
+    多进程多因子回补：processes 个进程各算一个因子，输入为同一批 (code, day)
+    对比不缓存（每个进程各自下载）与本机共享原始数据缓存
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _raw_cache_engine
+    _raw_cache_engine = engine
+    pairs = [(code, day) for day in days for code in codes]
+    factor_names = [('RMI', 'RSI')[i % 2] for i in range(processes)]
+    root = os.path.join(workdir, 'raw_cache_storage')
+    results = {'processes': processes, 'pairs': len(pairs), 'read_latency_ms': latency * 1000}
+    cache_dir = os.path.join(workdir, 'raw_cache')
+    # warm：同一批数据随后再被其他因子使用
+    for label, cache_dir in (('no_cache', None), ('shared_cache', cache_dir), ('shared_cache_warm', cache_dir)):
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork')) as executor:
+            outcomes = list(executor.map(_raw_cache_worker, *zip(*[
+                (root, rows, latency, cache_dir, name, pairs) for name in factor_names])))
+        elapsed = time.perf_counter() - start
+        results[label] = {
+            'seconds': elapsed,
+            'read_ls_calls': sum(calls for calls, _, _ in outcomes),
+            'max_worker_rss_kb': max(rss for _, _, rss in outcomes),
+        }
+    return results
+
+
+def bench_streaming(cli, engine_name: str, rows: int, chunk_sizes) -> dict:
+    """
+    流式计算与整天 run() 的一致性（RMI / RSI），engine_name 为实际使用的因子库（factor_framework 或参照实现）
+    lookback 按生产流程登记在因子版本的 factor_args 中再查询，没有登记的版本应被 stream_factor 拒绝；
+    不同块大小下逐块计算后拼接，与整天结果比较，并记录块之间保留的状态行数
+    """
+    import numpy as np
+
+    from benchmark.reference_engine import LOOKBACK
+    from factor_cli.cli import compute_factor
+    from factor_cli.streaming import StreamingFactor, factor_lookback, iter_chunks, stream_factor
+
+    version = 'bench_stream'
+    df = make_level_data(rows)
+    results = {}
+    for name in ('RMI', 'RSI'):
+        cli.get_api().create_factor_info({'factor_name': name, 'version': version, 'factor_type': '100',
+                                          'submitted_by': 'bench', 'factor_args': {'lookback': LOOKBACK[name]}})
+        ff = cli.load_factor_framework(version)
+        batch = compute_factor(ff, name, df)
+        for chunk_rows in chunk_sizes:
+            # 与 stream_factor 相同：lookback 取登记的 factor_args，这里保留对象以记录状态行数
+            streaming = StreamingFactor(ff, name, factor_lookback(name, version))
+            start = time.perf_counter()
+            streamed = pd.concat(list(streaming.stream(iter_chunks(df, chunk_rows))))
+            elapsed = time.perf_counter() - start
+            expected, actual = batch.to_numpy(dtype=float), streamed.to_numpy(dtype=float)
+            same_shape = expected.shape == actual.shape and streamed.index.equals(batch.index)
+            results[f'{name}_{chunk_rows}'] = {
+                'chunk_rows': chunk_rows,
+                'seconds': elapsed,
+                'state_rows': len(streaming._tail),
+                # 滚动窗口用累加和实现，重新起算会有浮点误差
+                'max_abs_diff': float(np.nanmax(np.abs(expected - actual))) if same_shape else None,
+                'parity': bool(same_shape and np.allclose(expected, actual, rtol=1e-9, atol=1e-9, equal_nan=True)),
+            }
+    # 没有登记 lookback 的因子版本不能流式计算
+    try:
+        stream_factor('RMI', iter_chunks(df, chunk_sizes[0]), version='bench')
+    except ValueError:
+        unbounded_rejected = True
+    else:
+        unbounded_rejected = False
+    results['all_parity'] = all(item['parity'] for item in results.values())
+    results['unbounded_rejected'] = unbounded_rejected
+    results['engine'] = engine_name
+    return results
+
+
+def _naive_postprocess(long: pd.DataFrame, exposure_cols) -> pd.Series:
+    """常见的逐日 groupby().apply 写法：去极值 -> 标准化 -> 中性化 -> 排名"""
+    import numpy as np
+
+    def per_day(group):
+        x = group['value']
+        median = x.median()
+        mad = (x - median).abs().median()
+        x = x.clip(median - 3 * 1.4826 * mad, median + 3 * 1.4826 * mad)
+        x = (x - x.mean()) / x.std()
+        exog = np.column_stack([np.ones(len(group)), group[exposure_cols].to_numpy()])
+        beta = np.linalg.lstsq(exog, x.to_numpy(), rcond=None)[0]
+        x = pd.Series(x.to_numpy() - exog @ beta, index=group.index)
+        return x.rank(pct=True)
+
+    return long.groupby('day', group_keys=False).apply(per_day)
+
+
+def bench_postprocess(n_days: int, n_codes: int, repeat: int) -> dict:
+    """截面后处理：NumPy 日期 x code 矩阵批量计算 与 pandas 逐日 groupby().apply 的耗时与结果差异"""
+    import numpy as np
+
+    from factor_cli.postprocess import apply_transforms
+
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_t(3, size=(n_days, n_codes))
+    exposures = rng.normal(size=(n_days, n_codes, 2))
+    steps = ['winsorize', 'zscore', 'neutralize', 'rank']
+    long = pd.DataFrame({
+        'day': np.repeat(np.arange(n_days), n_codes),
+        'value': matrix.ravel(),
+        'exp0': exposures[:, :, 0].ravel(),
+        'exp1': exposures[:, :, 1].ravel(),
+    })
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        vectorized = apply_transforms(matrix, steps, exposures)
+    vectorized_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    naive = _naive_postprocess(long, ['exp0', 'exp1'])
+    naive_seconds = time.perf_counter() - start
+    diff = np.abs(vectorized.ravel() - naive.sort_index().to_numpy())
+    return {
+        'rows': n_days * n_codes,
+        'numpy_seconds': vectorized_seconds,
+        'pandas_groupby_seconds': naive_seconds,
+        'speedup': naive_seconds / vectorized_seconds,
+        'max_abs_diff': float(diff.max()),
+    }
+
+
+def bench_threads(engine, rows: int, tasks: int, max_threads: int) -> dict:
+    """
+    进程内线程池计算多个 (code, day) 的扩展性，输入数据在线程间共享、不复制
+    efficiency 接近 1 说明引擎在 run 期间释放了 GIL，接近 1 / 线程数说明计算被 GIL 串行化
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from factor_cli.cli import compute_factor
+
+    frames = [make_level_data(rows, seed=i) for i in range(tasks)]
+    thread_counts = sorted({1, *[2 ** i for i in range(1, max_threads.bit_length())], max_threads})
+    results = {'tasks': tasks, 'rows': rows, 'cpu_count': os.cpu_count()}
+    baseline = None
+    for n_threads in thread_counts:
+        with ThreadPoolExecutor(max_workers=n_threads) as executor:
+            start = time.perf_counter()
+            list(executor.map(lambda df: compute_factor(engine, 'RMI', df), frames))
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        results[f'threads_{n_threads}'] = {
+            'seconds': elapsed,
+            'tasks_per_second': tasks / elapsed,
+            'speedup': baseline / elapsed,
+            'efficiency': baseline / elapsed / n_threads,
+        }
+    return results
+
+
+def bench_engine(engine, sizes, repeat: int) -> dict:
+    """factor_framework 计算耗时（RMI / RSI）"""
+    from factor_cli.cli import compute_factor
+
+    results = {}
+    for rows in sizes:
+        df = make_level_data(rows)
+        for name in ('RMI', 'RSI'):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                compute_factor(engine, name, df)
+            results[f'{name}_{rows}'] = {'rows': rows, 'seconds': (time.perf_counter() - start) / repeat}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='因子平台基准测试')
+    parser.add_argument('--backend', choices=['sqlite', 'mysql'], default='sqlite')
+    parser.add_argument('--codes', type=int, default=20)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--rows', type=int, default=5000, help='模拟一天盘口数据行数')
+    parser.add_argument('--calls', type=int, default=200, help='每个接口的调用次数')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--async-tasks', type=int, default=2000, help='异步接口基准的任务数')
+    parser.add_argument('--latency', type=float, default=0.002, help='异步接口基准模拟的数据库往返延迟(秒)')
+    parser.add_argument('--concurrency', type=int, default=20, help='异步接口基准的连接数 / 线程数')
+    parser.add_argument('--raw-latency', type=float, default=0.005, help='原始数据缓存基准模拟的下载延迟(秒)')
+    parser.add_argument('--processes', type=int, default=4, help='原始数据缓存基准的进程数')
+    parser.add_argument('--post-days', type=int, default=250, help='截面后处理基准的交易日数')
+    parser.add_argument('--post-codes', type=int, default=4000, help='截面后处理基准的 code 数')
+    parser.add_argument('--thread-tasks', type=int, default=64, help='线程扩展性基准的 (code, day) 任务数')
+    parser.add_argument('--max-threads', type=int, default=os.cpu_count(), help='线程扩展性基准的最大线程数')
+    parser.add_argument('--output', help='结果 JSON 文件，默认打印到标准输出')
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='factor_bench_')
+    setup_backend(args.backend, workdir)
+    fake_fastpai.install(fake_fastpai.LocalFastpai(os.path.join(workdir, 'storage'), rows=args.rows))
+    engine, engine_name = load_engine()
+
+    from factor_cli import cli
+    cli.load_factor_framework = lambda version=None: engine
+
+    codes = [f'{i:06d}' for i in range(args.codes)]
+    days = [d.strftime('%Y%m%d') for d in pd.bdate_range('2025-07-01', periods=args.days)]
+
+    # node_factor 的进度输出转到 stderr，stdout 只保留 JSON 结果
+    with contextlib.redirect_stdout(sys.stderr):
+        results = {
+            'startup': bench_startup(args.repeat),
+            'api': bench_api(cli.get_api(), codes, days, args.calls),
+            'node_factor': bench_node_factor(cli, codes, days),
+            'explain': bench_explain(cli.get_api(), args.backend, codes, days),
+            'raw_cache': bench_raw_cache(engine, workdir, codes, days, args.rows, args.raw_latency,
+                                         args.processes),
+            'streaming': bench_streaming(cli, engine_name, args.rows, [10, 100, 1000]),
+            'postprocess': bench_postprocess(args.post_days, args.post_codes, args.repeat),
+            'threads': bench_threads(engine, args.rows * 10, args.thread_tasks, args.max_threads),
+            'engine': bench_engine(engine, [args.rows, args.rows * 10], args.repeat),
+        }
+        # 以下检查与异步接口基准都会替换同步连接池，放在最后
+        from benchmark.check_buffer_writer import check_buffer_writer
+        from benchmark.check_job_queue import check_job_queue
+        from benchmark.check_local_storage import check_local_storage
+        from benchmark.check_pipeline import check_pipeline
+        results['pipeline_check'] = check_pipeline(workdir)
+        results['buffer_writer_check'] = check_buffer_writer(workdir)
+        results['local_storage_check'] = check_local_storage(workdir)
+        results['job_queue_check'] = check_job_queue(workdir)
+        try:
+            import aiomysql  # noqa: F401
+        except ImportError:
+            print("未安装 aiomysql，跳过异步接口基准")
+        else:
+            from benchmark.check_api_parity import check_parity
+            results['api_parity'] = check_parity(workdir)
+            results['async_api'] = bench_async_api(workdir, args.async_tasks, args.latency, args.concurrency)
+    report = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'backend': args.backend,
+            'engine': engine_name,
+            'args': vars(args),
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,331 @@
+import asyncio
+import datetime
+import re
+import sqlite3
+import time
+
+from pymysql.constants import SERVER_STATUS
+from pymysql.cursors import RE_INSERT_VALUES
+
+from database.mysql_database import record_round_trip
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS factor_info (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    factor_name VARCHAR(64) NOT NULL,
+    version VARCHAR(16) NOT NULL,
+    factor_args TEXT,
+    factor_type VARCHAR(128) NOT NULL,
+    factor_status TEXT NOT NULL,
+    submitted_by VARCHAR(32),
+    review_by VARCHAR(32),
+    review_notes TEXT DEFAULT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (factor_name, version)
+);
+CREATE TABLE IF NOT EXISTS factor_result (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    factor_name VARCHAR(64) NOT NULL,
+    version VARCHAR(16) NOT NULL,
+    code VARCHAR(50) NOT NULL,
+    data_type VARCHAR(128) NOT NULL,
+    factor_path VARCHAR(500) NOT NULL,
+    calculated_date DATE NOT NULL,
+    data_status TINYINT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    extra_info TEXT DEFAULT NULL,
+    retry_count INT NOT NULL DEFAULT 0,
+    lease_owner VARCHAR(64) DEFAULT NULL,
+    lease_expires_at TIMESTAMP NULL DEFAULT NULL,
+    next_retry_at TIMESTAMP NULL DEFAULT NULL,
+    UNIQUE (factor_name, version, code, calculated_date)
+);
+CREATE TRIGGER IF NOT EXISTS factor_info_updated_at AFTER UPDATE ON factor_info
+BEGIN
+    UPDATE factor_info SET updated_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+END;
+CREATE INDEX IF NOT EXISTS idx_name_status_updated ON factor_info (factor_name, factor_status, updated_at, version);
+CREATE INDEX IF NOT EXISTS idx_status_code_date ON factor_result (factor_name, version, data_status, code, calculated_date);
+CREATE INDEX IF NOT EXISTS idx_status_date_code ON factor_result (factor_name, version, data_status, calculated_date, code);
+CREATE INDEX IF NOT EXISTS idx_code_date ON factor_result (code, calculated_date, factor_name, version, data_status);
+CREATE INDEX IF NOT EXISTS idx_job_queue ON factor_result (factor_name, version, data_status, lease_expires_at);
+"""
+
+_DATE_PARAM = re.compile(r'^(\d{4})(\d{2})(\d{2})$')
+_DATE_VALUE = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+_DATETIME_VALUE = re.compile(r'^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(\.\d+)?$')
+
+
+def translate_sql(sql: str) -> str:
+    """把 GetFactorDataAPI 用到的 MySQL 语法转换为 SQLite 语法"""
+    sql = sql.replace('`', '"')
+    sql = re.sub(r'NOW\(\)\s*\+\s*INTERVAL\s+%s\s+SECOND', "datetime('now', '+' || %s || ' seconds')", sql)
+    sql = sql.replace('NOW()', 'CURRENT_TIMESTAMP')
+    sql = re.sub(r'FOR\s+UPDATE(\s+SKIP\s+LOCKED)?', '', sql)
+    sql = re.sub(r'INSERT\s+IGNORE', 'INSERT OR IGNORE', sql)
+    if 'ON DUPLICATE KEY UPDATE' in sql:
+        sql = sql.replace('ON DUPLICATE KEY UPDATE', 'ON CONFLICT DO UPDATE SET')
+        sql = re.sub(r'VALUES\((\w+)\)', r'excluded.\1', sql)
+    return sql.replace('%s', '?')
+
+
+def _param(value):
+    """YYYYMMDD 形式的日期参数转换为 SQLite 中保存的 YYYY-MM-DD"""
+    if isinstance(value, str):
+        match = _DATE_PARAM.match(value)
+        if match:
+            return '-'.join(match.groups())
+    if isinstance(value, (dict, list)):
+        return str(value)
+    return value
+
+
+def _value(value):
+    """与 pymysql 一致，DATE / TIMESTAMP 列返回 date / datetime"""
+    if isinstance(value, str):
+        if _DATE_VALUE.match(value):
+            return datetime.date.fromisoformat(value)
+        if _DATETIME_VALUE.match(value):
+            return datetime.datetime.fromisoformat(value)
+    return value
+
+
+class SQLiteCursor:
+    def __init__(self, connection):
+        self._cursor = connection._conn.cursor()
+        self._connection = connection
+        self.rowcount = -1
+        self.lastrowid = None
+
+    def _rows(self):
+        names = [col[0] for col in self._cursor.description or []]
+        return [{name: _value(value) for name, value in zip(names, row)} for row in self._cursor.fetchall()]
+
+    def execute(self, sql, params=None):
+        self._connection._round_trip()
+        self._connection._insert_id = None
+        self._cursor.execute(translate_sql(sql), [_param(p) for p in (params or [])])
+        self.rowcount = self._cursor.rowcount
+        # 与 MySQL 一致：语句中调用了 LAST_INSERT_ID(expr) 时返回 expr，其他非 INSERT 语句为 0
+        insert_id = self._connection._insert_id
+        if insert_id is not None:
+            self.lastrowid = insert_id
+        else:
+            self.lastrowid = self._cursor.lastrowid if sql.lstrip().upper().startswith('INSERT') else 0
+        return self.rowcount
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        # 与 pymysql 一致：VALUES 全部是 %s 的 INSERT 改写为一条多行语句，其他语句逐行执行
+        round_trips = 1 if RE_INSERT_VALUES.match(sql) else max(len(seq_of_params), 1)
+        for _ in range(round_trips):
+            self._connection._round_trip()
+        self._cursor.executemany(translate_sql(sql), [[_param(p) for p in params] for params in seq_of_params])
+        self.rowcount = self._cursor.rowcount
+        return self.rowcount
+
+    def fetchall(self):
+        return self._rows()
+
+    def fetchone(self):
+        rows = self._rows()
+        return rows[0] if rows else None
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteConnection:
+    """
+    pymysql.Connection 的 SQLite 替身，只实现 GetFactorDataAPI 用到的接口
+    用于没有 MySQL 的环境下跑基准测试
+    """
+
+    def __init__(self, path: str, latency: float = 0.0):
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.create_function('LAST_INSERT_ID', 1, self._last_insert_id)
+        self._insert_id = None
+        self.open = True
+        self.round_trips = 0
+        # 模拟网络往返延迟（秒）
+        self.latency = latency
+
+    def _last_insert_id(self, value):
+        """MySQL LAST_INSERT_ID(expr)：返回 expr，并作为本条语句的 lastrowid"""
+        self._insert_id = value
+        return value
+
+    def _round_trip(self):
+        self.round_trips += 1
+        record_round_trip()
+        if self.latency:
+            time.sleep(self.latency)
+
+    @property
+    def server_status(self):
+        return SERVER_STATUS.SERVER_STATUS_IN_TRANS if self._conn.in_transaction else 0
+
+    def cursor(self):
+        return SQLiteCursor(self)
+
+    def begin(self):
+        self._round_trip()
+        self._conn.execute('BEGIN')
+
+    def commit(self):
+        self._round_trip()
+        if self._conn.in_transaction:
+            self._conn.execute('COMMIT')
+
+    def rollback(self):
+        self._round_trip()
+        if self._conn.in_transaction:
+            self._conn.execute('ROLLBACK')
+
+    def ping(self, reconnect=False):
+        self._round_trip()
+
+    def close(self):
+        self.open = False
+        self._conn.close()
+
+
+def create_schema(path: str):
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.close()
+
+
+def use_sqlite(path: str, latency: float = 0.0, pool_size: int = 8):
+    """让 DatabaseConnectionManager 的连接池改用 SQLite 连接"""
+    from database.mysql_database import DatabaseConnectionManager, ConnectionPool
+
+    create_schema(path)
+    manager = DatabaseConnectionManager()
+
+    def create_pool():
+        return ConnectionPool(lambda: SQLiteConnection(path, latency), pool_size=pool_size, max_overflow=pool_size,
+                              pool_pre_ping=False, logger=manager.logging)
+
+    manager._create_pool = create_pool
+    manager.pool = create_pool()
+    return manager
+
+
+class AsyncSQLiteCursor:
+    """aiomysql 游标的替身，网络延迟用 asyncio.sleep 模拟，不阻塞事件循环"""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self._cursor = SQLiteCursor(connection._conn)
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    async def _wait(self):
+        if self._connection.latency:
+            await asyncio.sleep(self._connection.latency)
+
+    async def execute(self, sql, params=None):
+        await self._wait()
+        return self._cursor.execute(sql, params)
+
+    async def executemany(self, sql, seq_of_params):
+        await self._wait()
+        return self._cursor.executemany(sql, seq_of_params)
+
+    async def fetchall(self):
+        return self._cursor.fetchall()
+
+    async def fetchone(self):
+        return self._cursor.fetchone()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self._cursor.close()
+
+
+class AsyncSQLiteConnection:
+    """aiomysql.Connection 的替身"""
+
+    def __init__(self, path: str, latency: float = 0.0):
+        self._conn = SQLiteConnection(path)
+        self.latency = latency
+
+    @property
+    def round_trips(self):
+        return self._conn.round_trips
+
+    def cursor(self):
+        return AsyncSQLiteCursor(self)
+
+    async def begin(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._conn.begin()
+
+    async def commit(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._conn.commit()
+
+    async def rollback(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._conn.rollback()
+
+
+class AsyncSQLitePool:
+    """aiomysql.Pool 的替身，只实现 AsyncGetFactorDataAPI 用到的接口"""
+
+    def __init__(self, path: str, maxsize: int = 10, latency: float = 0.0):
+        self._path = path
+        self._latency = latency
+        self.maxsize = maxsize
+        self._free = []
+        self._semaphore = asyncio.Semaphore(maxsize)
+        self.size = 0
+
+    @property
+    def freesize(self):
+        return len(self._free)
+
+    async def acquire(self):
+        await self._semaphore.acquire()
+        if self._free:
+            return self._free.pop()
+        self.size += 1
+        return AsyncSQLiteConnection(self._path, self._latency)
+
+    def release(self, conn):
+        self._free.append(conn)
+        self._semaphore.release()
+
+    def close(self):
+        for conn in self._free:
+            conn._conn.close()
+        self._free.clear()
+
+    async def wait_closed(self):
+        pass
+
+
+def use_sqlite_async(api, path: str, latency: float = 0.0):
+    """让 AsyncGetFactorDataAPI 改用 SQLite 连接池"""
+    create_schema(path)
+
+    async def create_pool():
+        return AsyncSQLitePool(path, maxsize=api.pool_size + api.max_overflow, latency=latency)
+
+    api._create_pool = create_pool
+    return api
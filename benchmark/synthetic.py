@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+
+
+def make_level_data(rows: int = 5000, levels: int = 10, seed: int = 0) -> pd.DataFrame:
+    """生成一天的模拟盘口数据，列结构参照 getLS.read_ls 的 level 数据"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp('2025-07-01 09:30:00').value
+    data = {
+        'time': start + np.sort(rng.integers(0, 4 * 3600 * 10 ** 9, rows)),
+        'price': 10 + np.cumsum(rng.normal(0, 0.01, rows)),
+        'volume': rng.integers(100, 10000, rows).astype(np.float64),
+        'amount': rng.uniform(1e3, 1e6, rows),
+    }
+    mid = data['price']
+    for i in range(1, levels + 1):
+        data[f'bid_price{i}'] = mid - 0.01 * i
+        data[f'ask_price{i}'] = mid + 0.01 * i
+        data[f'bid_volume{i}'] = rng.integers(100, 50000, rows).astype(np.float64)
+        data[f'ask_volume{i}'] = rng.integers(100, 50000, rows).astype(np.float64)
+    return pd.DataFrame(data)
+
+
+def make_result(rows: int = 5000, cols: int = 4, seed: int = 0) -> dict:
+    """模拟 get_result 的输出 {列名: 数组}"""
+    rng = np.random.default_rng(seed)
+    return {f'factor_{i}': rng.normal(size=rows) for i in range(cols)}
@@ -1,3 +1,25 @@
-from .mysql_database import GetFactorDataAPI
+import importlib
 
-__all__ = ['GetFactorDataAPI']
\ No newline at end of file
+# 公开接口所在的子模块，首次访问时才导入
+_EXPORTS = {
+    'GetFactorDataAPI': 'mysql_database',
+    'FactorResultBufferWriter': 'mysql_database',
+    'FactorJobQueue': 'job_queue',
+    'AsyncGetFactorDataAPI': 'async_mysql_database',
+    'AsyncFactorResultBufferWriter': 'async_mysql_database',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'{__name__}.{module_name}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,577 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+
+try:
+    import aiomysql
+except ImportError:  # 可选依赖，只有异步接口需要
+    aiomysql = None
+
+from database.factor_cache import factor_info_cache
+from database.mysql_database import GetFactorDataAPI, PoolTimeoutError
+from env import (
+    get_db_config,
+    RETRY_CONFIG,
+    CONNECTION_POOL_CONFIG,
+    FACTOR_CACHE_CONFIG,
+    factor_logger
+)
+
+_MISSING = object()
+
+
+class AsyncGetFactorDataAPI:
+    """
+    GetFactorDataAPI 的 asyncio 版本，基于 aiomysql 连接池，方法与同步接口一一对应
+    SQL 语句与结果整理都复用 GetFactorDataAPI 的 _xxx_query 等静态方法，这里只负责异步执行
+    连接池在第一次使用时于当前事件循环内创建，同一个实例只能在一个事件循环中使用
+    """
+
+    def __init__(self, pool_size: int = None, max_overflow: int = None):
+        if aiomysql is None:
+            raise ImportError("AsyncGetFactorDataAPI 需要 aiomysql，请先 pip install aiomysql")
+        self.db_config = get_db_config()
+        self.retry_config = RETRY_CONFIG
+        self.pool_config = CONNECTION_POOL_CONFIG
+        self.pool_size = pool_size or self.pool_config['pool_size']
+        self.max_overflow = self.pool_config['max_overflow'] if max_overflow is None else max_overflow
+        self.logging = factor_logger(self.__class__.__name__)
+        self.cache = factor_info_cache if FACTOR_CACHE_CONFIG['enabled'] else None
+        self.pool = None
+        self._pool_lock = None
+
+    async def _create_pool(self):
+        """创建连接池，带重试机制"""
+        last_exception = None
+        for attempt in range(self.retry_config['max_retries']):
+            try:
+                return await aiomysql.create_pool(
+                    minsize=1,
+                    maxsize=self.pool_size + self.max_overflow,
+                    pool_recycle=self.pool_config['pool_recycle'],
+                    host=self.db_config['host'],
+                    port=self.db_config['port'],
+                    user=self.db_config['user'],
+                    password=self.db_config['password'],
+                    db=self.db_config['database'],
+                    charset=self.db_config['charset'],
+                    connect_timeout=self.db_config['connect_timeout'],
+                    autocommit=True,  # 单条语句直接提交，多条语句的事务由 transaction() 显式 BEGIN
+                    cursorclass=aiomysql.DictCursor,
+                )
+            except Exception as e:
+                last_exception = e
+                wait_time = self.retry_config['retry_delay'] * (self.retry_config['backoff_factor'] ** attempt)
+                self.logging.warning(
+                    f"Database connection attempt {attempt + 1} failed: {e}. "
+                    f"Retrying in {wait_time} seconds..."
+                )
+                if attempt < self.retry_config['max_retries'] - 1:
+                    await asyncio.sleep(wait_time)
+        raise ConnectionError(
+            f"Failed to connect to database after {self.retry_config['max_retries']} attempts. "
+            f"Last error: {last_exception}"
+        )
+
+    async def connect(self):
+        """创建连接池，不调用时在第一次查询时自动创建"""
+        if self.pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self.pool is None:
+                    self.pool = await self._create_pool()
+                    self.logging.info("AsyncGetFactorDataAPI pool initialized")
+        return self.pool
+
+    @asynccontextmanager
+    async def connection(self):
+        """借出自动提交的连接，只读查询与单条写入语句不需要 BEGIN / COMMIT"""
+        pool = await self.connect()
+        try:
+            conn = await asyncio.wait_for(pool.acquire(), self.pool_config['pool_timeout'])
+        except asyncio.TimeoutError:
+            raise PoolTimeoutError(f"{self.pool_config['pool_timeout']} 秒内没有可用的数据库连接")
+        try:
+            yield conn
+        finally:
+            pool.release(conn)
+
+    @asynccontextmanager
+    async def transaction(self):
+        """多条语句需要原子执行时使用"""
+        async with self.connection() as conn:
+            try:
+                await conn.begin()  # 开启事务
+                yield conn
+                await conn.commit()  # 提交事务
+                self.logging.debug("Transaction committed successfully")
+            except Exception as e:
+                await conn.rollback()  # 事务回滚
+                self.logging.error(f"Transaction rolled back due to error: {e}")
+                raise
+
+    async def _execute(self, sql: str, params=None) -> int:
+        """执行单条写入语句，返回影响行数"""
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return cursor.rowcount
+
+    async def _fetchall(self, sql: str, params=None):
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchall()
+
+    async def _fetchone(self, sql: str, params=None):
+        async with self.connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(sql, params)
+                return await cursor.fetchone()
+
+    def pool_stats(self) -> dict:
+        """连接池统计信息"""
+        if self.pool is None:
+            return {'size': 0, 'idle': 0, 'in_use': 0, 'maxsize': self.pool_size + self.max_overflow}
+        return {
+            'size': self.pool.size,
+            'idle': self.pool.freesize,
+            'in_use': self.pool.size - self.pool.freesize,
+            'maxsize': self.pool.maxsize,
+        }
+
+    async def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            await self.pool.wait_closed()
+            self.pool = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    # ------------------------------------------------------------------
+    # 因子元数据
+    # ------------------------------------------------------------------
+
+    async def _cached(self, key, loader, cache_if=bool):
+        """读穿缓存，与同步接口共用同一个进程内缓存"""
+        if self.cache is None:
+            return await loader()
+        value = self.cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = await loader()
+        if cache_if(value):
+            self.cache.set(key, value)
+        return value
+
+    def invalidate_cache(self, factor_name: str = None):
+        """使因子元数据缓存失效，factor_name 为空时清空全部"""
+        if self.cache is None:
+            return
+        if factor_name is None:
+            self.cache.invalidate()
+        else:
+            self.cache.invalidate(lambda key: key[0] == 'names' or key[1] == factor_name)
+
+    async def warm_factor_info_cache(self):
+        """一次查询加载整张 factor_info 表预热缓存"""
+        if self.cache is None:
+            return
+        try:
+            rows = await self._fetchall(*GetFactorDataAPI._warm_cache_query())
+        except Exception as e:
+            self.logging.error(f"函数 {self.warm_factor_info_cache.__name__} 内 预热因子缓存失败， {e}")
+            raise
+        count = GetFactorDataAPI._fill_factor_info_cache(self.cache, rows)
+        self.logging.info(f"因子元数据缓存预热完成，共 {count} 个因子 {len(rows)} 个版本")
+
+    def _factor_info_params(self, factor_info: dict):
+        """解析参数内容，与同步接口不同，不写到实例属性上，避免并发提交互相覆盖"""
+        if type(factor_info) is not dict:
+            self.logging.error("传递参数不符合要求")
+            raise TypeError(f"factor_info 参数类型错误，期望是 dict，实际是 {type(factor_info).__name__}")
+        missing = [key for key in ('factor_name', 'version', 'factor_type', 'submitted_by') if key not in factor_info]
+        if missing:
+            self.logging.error("缺失必填参数类型, factor_name, version, factor_type, submitted_by")
+            raise ValueError("缺失必填参数")
+        return (
+            factor_info['factor_name'],
+            factor_info['version'],
+            json.dumps(factor_info.get('factor_args', {})),  # 转换为字符串存储
+            factor_info['factor_type'],
+            '3' if factor_info.get('derived_from') else '0',  # 派生版本，见 GetFactorDataAPI._analysis_input_dict
+            factor_info['submitted_by'],
+            factor_info.get('review_by', 'http://feishudizhi.com'),
+            factor_info.get('review_notes', None)
+        )
+
+    async def create_factor_info(self, factor_info: dict):
+        """提交因子信息"""
+        params = self._factor_info_params(factor_info)
+        factor_name, version = params[0], params[1]
+        try:
+            await self._execute(*GetFactorDataAPI._create_factor_info_query(params))
+            self.logging.info(f"因子: {factor_name} 版本: {version} 入库成功")
+            self.invalidate_cache(factor_name)
+        except Exception as e:
+            if "1062" in str(e):
+                self.logging.warning(f"因子: {factor_name} 版本: {version} 存在库中")
+                return
+            self.logging.error(f"因子: {factor_name} 版本: {version} 入库失败， {e}")
+            raise
+
+    async def update_factor_status(self, factor_name: str, factor_version: str):
+        """审批因子版本，一次数据库往返，返回值与同步接口相同"""
+        try:
+            async with self.connection() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.execute(*GetFactorDataAPI._update_factor_status_query(factor_name, factor_version))
+                    status = GetFactorDataAPI._approval_status(cursor.lastrowid)
+        except Exception as e:
+            self.logging.error(f"函数 {self.update_factor_status.__name__} 审批因子失败, {e}")
+            raise
+        self._log_approval(factor_name, factor_version, status)
+        return status
+
+    _log_approval = GetFactorDataAPI._log_approval
+
+    async def get_all_factor_version(self, factor_name):
+        """获取因子所有版本"""
+        return await self._cached(('versions', factor_name), lambda: self._fetchall(
+            *GetFactorDataAPI._all_factor_version_query(factor_name)))
+
+    async def get_all_factor_name(self):
+        """获取所有因子名称"""
+        return await self._cached(('names',), lambda: self._fetchall(*GetFactorDataAPI._all_factor_name_query()))
+
+    async def get_new_factor_name(self, factor_name: str):
+        """获取因子的最新版本"""
+        return await self._cached(('newest', factor_name), lambda: self._get_new_factor_name(factor_name))
+
+    async def _get_new_factor_name(self, factor_name: str):
+        result = await self._fetchone(*GetFactorDataAPI._new_factor_name_query(factor_name))
+        if not result['factor_exists']:
+            self.logging.warning(f"{factor_name} 因子不存在")
+            return
+        if result['version'] is None:
+            return
+        return {'version': result['version']}
+
+    async def get_new_factor_names(self, factor_names):
+        """批量获取多个因子的最新审批通过版本，返回 {factor_name: version}，没有通过版本的因子不返回"""
+        factor_names = list(dict.fromkeys(factor_names))
+        versions = {}
+        missing = []
+        for name in factor_names:
+            cached = self.cache.get(('newest', name)) if self.cache is not None else None
+            if cached:
+                versions[name] = cached['version']
+            else:
+                missing.append(name)
+        if not missing:
+            return versions
+        try:
+            rows = await self._fetchall(*GetFactorDataAPI._new_factor_names_query(missing))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_new_factor_names.__name__} 内 批量获取因子版本失败， {e}")
+            raise
+        for name, version in GetFactorDataAPI._newest_versions(rows).items():
+            versions[name] = version
+            if self.cache is not None:
+                self.cache.set(('newest', name), {'version': version})
+        return versions
+
+    async def get_factor_pending_status(self, factor_name: str = None, factor_version: str = None):
+        """获取处于审核状态的因子"""
+        try:
+            return await self._fetchall(*GetFactorDataAPI._factor_pending_status_query(factor_name, factor_version))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_factor_pending_status.__name__}内 获取审核因子失败，{e}")
+            raise
+
+    async def get_factor_args(self, factor_name: str, factor_version: str):
+        """获取因子版本登记的 factor_args，版本不存在返回 None"""
+        return await self._cached(('args', factor_name, factor_version),
+                                  lambda: self._get_factor_args(factor_name, factor_version),
+                                  cache_if=lambda value: value is not None)
+
+    async def _get_factor_args(self, factor_name: str, factor_version: str):
+        try:
+            row = await self._fetchone(*GetFactorDataAPI._factor_args_query(factor_name, factor_version))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_factor_args.__name__} 内 获取因子参数失败， {e}")
+            raise
+        return GetFactorDataAPI._parse_factor_args(row)
+
+    async def factor_exists(self, factor_name: str, factor_version: str = None):
+        """判断因子，以及对应的版本是否存在"""
+        return await self._cached(('exists', factor_name, factor_version),
+                                  lambda: self._factor_exists(factor_name, factor_version))
+
+    async def _factor_exists(self, factor_name: str, factor_version: str = None):
+        try:
+            return await self._fetchone(*GetFactorDataAPI._factor_exists_query(factor_name, factor_version)) is not None
+        except Exception as e:
+            self.logging.error(f"函数{self.factor_exists.__name__} 内 获取指定因子失败， {e}")
+            raise
+
+    # ------------------------------------------------------------------
+    # 因子结果
+    # ------------------------------------------------------------------
+
+    _factor_result_params = staticmethod(GetFactorDataAPI._factor_result_params)
+    _UPSERT_RESULT_SQL = GetFactorDataAPI._UPSERT_RESULT_SQL
+
+    async def write_node_factor_data(self, factor_name: str, factor_version: str,
+                                     code: str, day: str, data_type: str, save_path: str,
+                                     data_status: str = 1, extra_info: dict = None):
+        """将计算因子结果信息保存到数据库中"""
+        params = self._factor_result_params({
+            'factor_name': factor_name, 'version': factor_version, 'code': code, 'data_type': data_type,
+            'factor_path': save_path, 'day': day, 'data_status': data_status, 'extra_info': extra_info,
+        })
+        try:
+            start = time.perf_counter()
+            await self._execute(self._UPSERT_RESULT_SQL, params)
+            self.logging.info(f"{factor_name}因子 {factor_version} 版本计算{code} {day}结果入库成功")
+            self.logging.debug(f"db_insert 耗时 {(time.perf_counter() - start) * 1000:.3f} ms")
+        except Exception as e:
+            self.logging.error(f"{factor_name}因子 {factor_version} 版本计算{code} {day}结果入库失败: {e}")
+            raise
+
+    async def write_node_factor_data_bulk(self, records, chunk_size: int = 500):
+        """
+        批量写入因子结果信息，已存在的结果覆盖更新
+        每个分块一个事务，返回与 records 一一对应的结果 [{'code', 'day', 'success', 'error'}]
+        """
+        records = list(records)
+        outcomes = []
+        for i in range(0, len(records), chunk_size):
+            chunk = records[i:i + chunk_size]
+            try:
+                async with self.transaction() as conn:
+                    async with conn.cursor() as cursor:
+                        await cursor.executemany(self._UPSERT_RESULT_SQL, [self._factor_result_params(r) for r in chunk])
+                outcomes.extend({'code': r['code'], 'day': r['day'], 'success': True, 'error': None} for r in chunk)
+            except Exception as e:
+                # 分块失败时逐行重写，定位出错的记录
+                self.logging.warning(f"批量写入 {len(chunk)} 条因子结果失败，改为逐行写入: {e}")
+                for r in chunk:
+                    try:
+                        await self._execute(self._UPSERT_RESULT_SQL, self._factor_result_params(r))
+                        outcomes.append({'code': r['code'], 'day': r['day'], 'success': True, 'error': None})
+                    except Exception as row_e:
+                        outcomes.append({'code': r['code'], 'day': r['day'], 'success': False, 'error': repr(row_e)})
+        success = sum(1 for o in outcomes if o['success'])
+        self.logging.info(f"批量写入因子结果 {success}/{len(records)} 条成功")
+        return outcomes
+
+    async def write_node_factor_failures(self, records):
+        """记录计算失败的结果（data_status = 2），已经计算成功的结果不会被覆盖"""
+        records = list(records)
+        if not records:
+            return 0
+        sql, params = GetFactorDataAPI._failed_result_query(records)
+        try:
+            async with self.transaction() as conn:
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(sql, params)
+        except Exception as e:
+            self.logging.error(f"函数 {self.write_node_factor_failures.__name__} 内 记录失败结果失败， {e}")
+            raise
+        self.logging.info(f"记录计算失败的因子结果 {len(records)} 条")
+        return len(records)
+
+    async def exists_source_code_data(self, factor_name: str, factor_version: str, code: str, day: str):
+        """判定因子结果存在"""
+        try:
+            return await self._fetchone(
+                *GetFactorDataAPI._exists_source_code_data_query(factor_name, factor_version, code, day)) is not None
+        except Exception as e:
+            self.logging.error(f"{e}")
+            raise
+
+    async def get_exists_node_factor_data(self, factor_name: str, factor_version: str, codes,
+                                          start_day: str, end_day: str, chunk_size: int = 1000):
+        """批量获取区间内已存在的因子结果，返回 {(code, 'YYYYMMDD')} 集合，各分块并发查询"""
+        codes = list(dict.fromkeys(codes))
+        start_day = str(start_day).replace('-', '')
+        end_day = str(end_day).replace('-', '')
+
+        async def query(chunk):
+            return await self._fetchall(*GetFactorDataAPI._node_factor_range_query(
+                'code, calculated_date', factor_name, factor_version, chunk, start_day, end_day))
+
+        try:
+            chunks = await asyncio.gather(*(query(codes[i:i + chunk_size]) for i in range(0, len(codes), chunk_size)))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_exists_node_factor_data.__name__} 内 批量查询因子结果失败， {e}")
+            raise
+        return {(row['code'], row['calculated_date'].strftime('%Y%m%d')) for rows in chunks for row in rows}
+
+    async def get_missing_node_factor_data(self, factor_name: str, factor_version: str, codes, days,
+                                           chunk_size: int = 1000):
+        """批量判定因子结果是否存在，返回缺失的 [(code, 'YYYYMMDD')] 列表"""
+        codes = list(dict.fromkeys(codes))
+        days = sorted({str(day).replace('-', '') for day in days})
+        if not codes or not days:
+            return []
+        exists = await self.get_exists_node_factor_data(
+            factor_name, factor_version, codes, days[0], days[-1], chunk_size
+        )
+        return [(code, day) for day in days for code in codes if (code, day) not in exists]
+
+    async def get_node_factor_paths(self, factor_name: str, factor_version: str, codes,
+                                    start_day: str, end_day: str, chunk_size: int = 1000):
+        """批量获取区间内计算成功的因子结果存储路径 [{'code', 'calculated_date', 'data_type', 'factor_path'}]"""
+        codes = list(dict.fromkeys(codes))
+        start_day = str(start_day).replace('-', '')
+        end_day = str(end_day).replace('-', '')
+
+        async def query(chunk):
+            return await self._fetchall(*GetFactorDataAPI._node_factor_range_query(
+                'code, calculated_date, data_type, factor_path', factor_name, factor_version, chunk, start_day, end_day))
+
+        try:
+            chunks = await asyncio.gather(*(query(codes[i:i + chunk_size]) for i in range(0, len(codes), chunk_size)))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_node_factor_paths.__name__} 内 获取因子结果路径失败， {e}")
+            raise
+        return [row for rows in chunks for row in rows]
+
+    async def get_exists_factor_versions(self, factor_versions: dict, code: str, day: str):
+        """判定同一 (code, day) 下多个 {factor_name: version} 的结果是否存在，返回已存在的 {factor_name: factor_path}"""
+        if not factor_versions:
+            return {}
+        try:
+            rows = await self._fetchall(*GetFactorDataAPI._exists_factor_versions_query(factor_versions, code, day))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_exists_factor_versions.__name__} 内 批量查询因子结果失败， {e}")
+            raise
+        return {row['factor_name']: row['factor_path'] for row in rows}
+
+    async def get_node_factor_fingerprints(self, factor_name: str, factor_version: str, page_size: int = 5000):
+        """获取版本下计算成功的结果及其指纹，返回格式与同步接口相同"""
+        results = {}
+        last_id = 0
+        try:
+            while True:
+                rows = await self._fetchall(
+                    *GetFactorDataAPI._fingerprint_query(factor_name, factor_version, last_id, page_size))
+                results.update(GetFactorDataAPI._fingerprint_entries(rows))
+                if len(rows) < page_size:
+                    return results
+                last_id = rows[-1]['id']
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_node_factor_fingerprints.__name__} 内 获取因子结果指纹失败， {e}")
+            raise
+
+    async def get_factor_watermarks(self, factor_name: str, factor_version: str):
+        """获取每个 code 最新计算成功的日期 {code: 'YYYYMMDD'}"""
+        try:
+            rows = await self._fetchall(*GetFactorDataAPI._factor_watermarks_query(factor_name, factor_version))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_factor_watermarks.__name__} 内 获取因子水位失败， {e}")
+            raise
+        return {row['code']: row['watermark'].strftime('%Y%m%d') for row in rows}
+
+    async def get_failed_node_factor_data(self, factor_name: str, factor_version: str):
+        """获取计算失败（data_status = 2）的 [(code, 'YYYYMMDD')]"""
+        try:
+            rows = await self._fetchall(*GetFactorDataAPI._failed_node_factor_query(factor_name, factor_version))
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_failed_node_factor_data.__name__} 内 获取失败因子结果失败， {e}")
+            raise
+        return [(row['code'], row['calculated_date'].strftime('%Y%m%d')) for row in rows]
+
+    async def get_factor_stage_stats(self, factor_name: str, factor_version: str = None,
+                                     start_day: str = None, end_day: str = None):
+        """汇总 extra_info 中的分阶段耗时，返回格式与同步接口相同"""
+        sql, params = GetFactorDataAPI._stage_stats_query(factor_name, factor_version, start_day, end_day)
+        try:
+            rows = await self._fetchall(sql, params)
+        except Exception as e:
+            self.logging.error(f"函数 {self.get_factor_stage_stats.__name__} 内 汇总因子耗时失败， {e}")
+            raise
+        return GetFactorDataAPI._summarize_stage_stats(rows)
+
+
+class AsyncFactorResultBufferWriter:
+    """
+    FactorResultBufferWriter 的 asyncio 版本
+    大量并发任务各自 add 结果记录，攒够条数或时间阈值后合并成一次批量写入
+    async with 期间后台任务按时间阈值检查，任务停顿时缓冲的记录也会按时入库
+    """
+
+    def __init__(self, api: AsyncGetFactorDataAPI, max_rows: int = 500,
+                 max_interval: float = 5.0, chunk_size: int = 500):
+        self.api = api
+        self.max_rows = max_rows
+        self.max_interval = max_interval
+        self.chunk_size = chunk_size
+        self.failures = []
+        self.written = 0
+        self._buffer = []
+        # 缓冲区中最早一条记录加入的时间，缓冲区为空时为 None
+        self._oldest = None
+        self._task = None
+
+    def _due(self) -> bool:
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.max_interval
+
+    async def add(self, record: dict):
+        """加入一条结果记录，必要时触发 flush"""
+        if not self._buffer:
+            self._oldest = time.monotonic()
+        self._buffer.append(record)
+        if len(self._buffer) >= self.max_rows or self._due():
+            return await self.flush()
+        return []
+
+    async def flush_if_due(self):
+        """最早的记录已经等待超过 max_interval 秒时 flush"""
+        if self._due():
+            return await self.flush()
+        return []
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.max_interval / 2)
+            try:
+                await self.flush_if_due()
+            except Exception as e:
+                self.api.logging.error(f"函数 {self._flush_loop.__name__} 内 定时写入因子结果失败， {e}")
+
+    async def flush(self):
+        """写入缓冲区中所有记录，返回本次写入的结果"""
+        # 单线程事件循环内交换缓冲区即可，不需要加锁
+        records, self._buffer = self._buffer, []
+        self._oldest = None
+        if not records:
+            return []
+        outcomes = await self.api.write_node_factor_data_bulk(records, self.chunk_size)
+        self.written += sum(1 for o in outcomes if o['success'])
+        self.failures.extend(o for o in outcomes if not o['success'])
+        return outcomes
+
+    async def __aenter__(self):
+        if self.max_interval and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._flush_loop())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
@@ -0,0 +1,73 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from env import FACTOR_CACHE_CONFIG
+
+
+class TTLCache:
+    """
+    进程内 TTL + LRU 缓存，线程安全
+    超过 ttl 秒的条目视为过期，超过 maxsize 时淘汰最久未使用的条目
+    """
+
+    _MISSING = object()
+
+    def __init__(self, ttl: float = 300, maxsize: int = 4096):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, self._MISSING)
+            if item is self._MISSING or item[0] < time.monotonic():
+                if item is not self._MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            # 返回副本，避免调用方修改缓存内容
+            return copy.deepcopy(item[1])
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, copy.deepcopy(value))
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_load(self, key, loader, cache_if=bool):
+        """读穿缓存：未命中时调用 loader，结果满足 cache_if 才写入缓存"""
+        value = self.get(key, self._MISSING)
+        if value is not self._MISSING:
+            return value
+        value = loader()
+        if cache_if(value):
+            self.set(key, value)
+        return value
+
+    def invalidate(self, predicate=None):
+        """删除满足 predicate(key) 的条目，predicate 为空时清空缓存"""
+        with self._lock:
+            if predicate is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if predicate(k)]:
+                del self._data[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+
+# 同一进程内所有 GetFactorDataAPI 实例共享的因子元数据缓存
+factor_info_cache = TTLCache(
+    ttl=FACTOR_CACHE_CONFIG['ttl'],
+    maxsize=FACTOR_CACHE_CONFIG['maxsize'],
+)
@@ -4,13 +4,14 @@ create table factor_info (
   version	 VARCHAR(16) NOT NULL COMMENT '版本信息',
   factor_args JSON COMMENT '描述信息',
   factor_type VARCHAR(128) NOT NULL COMMENT '因子类型',
-  factor_status ENUM('0', '1', '2') NOT NULL COMMENT '0=待审, 1=通过, 2=拒绝',
+  factor_status ENUM('0', '1', '2', '3') NOT NULL COMMENT '0=待审, 1=通过, 2=拒绝, 3=派生',
   submitted_by VARCHAR(32) COMMENT '提交人',
   review_by VARCHAR(32) COMMENT '审核人',
   review_notes TEXT DEFAULT NULL COMMENT '审核备注',
   created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP COMMENT '入库时间',
   updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
-  UNIQUE (factor_name, version) -- 约束键，因子名 + 版本号
+  UNIQUE (factor_name, version), -- 约束键，因子名 + 版本号
+  INDEX idx_name_status_updated (factor_name, factor_status, updated_at, version) -- 索引：最新审批通过版本
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT '因子信息表';
 
 
@@ -26,8 +27,14 @@ CREATE TABLE factor_result (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,   -- 创建时间
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP, -- 更新时间
     extra_info JSON DEFAULT NULL,                     -- 额外信息（JSON格式）
+    retry_count INT NOT NULL DEFAULT 0,               -- 失败重试次数
+    lease_owner VARCHAR(64) DEFAULT NULL,             -- 领取任务的 worker
+    lease_expires_at TIMESTAMP NULL DEFAULT NULL,     -- 任务租约到期时间，过期后可被其他 worker 重新领取
+    next_retry_at TIMESTAMP NULL DEFAULT NULL,        -- 失败任务下次可重试时间
     UNIQUE (factor_name, version, code, calculated_date), -- 唯一约束
-    INDEX idx_factor_name (factor_name),              -- 索引：因子名称
-    INDEX idx_calculated_date (calculated_date),      -- 索引：计算日期
-    INDEX idx_code (code)                             -- 索引：标的代码
+    INDEX idx_status_code_date (factor_name, version, data_status, code, calculated_date), -- 索引：按 code 跨日期
+    INDEX idx_status_date_code (factor_name, version, data_status, calculated_date, code), -- 索引：按日期跨 code
+    INDEX idx_code_date (code, calculated_date, factor_name, version, data_status),        -- 索引：同一 code 日期多个因子
+    INDEX idx_job_queue (factor_name, version, data_status, lease_expires_at) -- 索引：任务队列领取
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='因子计算结果存储表';
+-- 可选的按日期分区见 migrations/003_factor_result_partition_optional.sql
@@ -0,0 +1,150 @@
+import json
+import os
+import socket
+import uuid
+
+from database.mysql_database import GetFactorDataAPI
+from env import RETRY_CONFIG, FACTOR_INFO_TABLE_NAME, factor_logger
+
+
+class FactorJobQueue:
+    """
+    基于 factor_result.data_status 的持久化任务队列
+    0=待计算（可被领取），1=成功，2=失败（按 RETRY_CONFIG 退避后重试，超过次数不再领取）
+    多台机器上的 worker 通过 SELECT ... FOR UPDATE SKIP LOCKED 原子领取一批任务并加租约，
+    worker 异常退出时租约到期，任务自动回到可领取状态
+    """
+
+    def __init__(self, api: GetFactorDataAPI = None, lease_seconds: int = 600,
+                 worker_id: str = None, retry_config: dict = None):
+        self.api = api or GetFactorDataAPI()
+        self.lease_seconds = lease_seconds
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.retry_config = retry_config or RETRY_CONFIG
+        self.table = FACTOR_INFO_TABLE_NAME.get('factor_result')
+        self.logging = factor_logger(self.__class__.__name__)
+
+    def enqueue(self, records, chunk_size: int = 1000):
+        """
+        预先插入待计算任务（data_status = 0），已存在的行保持不变
+        records: [{'factor_name', 'version', 'code', 'day', 'data_type', 'factor_path'}]
+        """
+        records = list(records)
+        sql = f"""
+            INSERT IGNORE INTO {self.table} (
+                factor_name, version, code, data_type, factor_path, calculated_date, data_status
+            ) VALUES (%s, %s, %s, %s, %s, %s, 0)
+        """
+        inserted = 0
+        for i in range(0, len(records), chunk_size):
+            chunk = records[i:i + chunk_size]
+            params = [
+                (r['factor_name'], r['version'], r['code'], r['data_type'], r['factor_path'],
+                 str(r['day']).replace('-', ''))
+                for r in chunk
+            ]
+            with self.api.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(sql, params)
+                inserted += cursor.rowcount
+        self.logging.info(f"任务入队 {inserted}/{len(records)} 条")
+        return inserted
+
+    def claim(self, factor_name: str, factor_version: str, batch_size: int = 50):
+        """原子领取一批可计算的任务并加租约"""
+        with self.api.transaction() as conn:
+            cursor = conn.cursor()
+            sql = f"""
+                SELECT id, factor_name, version, code, data_type, factor_path, calculated_date, retry_count
+                FROM {self.table}
+                WHERE `factor_name` = %s AND `version` = %s AND `data_status` IN (0, 2)
+                AND `retry_count` < %s
+                AND (`lease_expires_at` IS NULL OR `lease_expires_at` < NOW())
+                AND (`next_retry_at` IS NULL OR `next_retry_at` <= NOW())
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """
+            cursor.execute(sql, (factor_name, factor_version, self.retry_config['max_retries'], batch_size))
+            jobs = cursor.fetchall()
+            if not jobs:
+                return []
+            sql = f"""
+                UPDATE {self.table}
+                SET `lease_owner` = %s, `lease_expires_at` = NOW() + INTERVAL %s SECOND
+                WHERE id IN ({', '.join(['%s'] * len(jobs))})
+            """
+            cursor.execute(sql, [self.worker_id, self.lease_seconds, *[job['id'] for job in jobs]])
+        for job in jobs:
+            job['day'] = job['calculated_date'].strftime('%Y%m%d')
+        return jobs
+
+    def renew(self, jobs):
+        """延长当前 worker 持有任务的租约"""
+        if not jobs:
+            return 0
+        with self.api.connection() as conn:
+            cursor = conn.cursor()
+            sql = f"""
+                UPDATE {self.table} SET `lease_expires_at` = NOW() + INTERVAL %s SECOND
+                WHERE `lease_owner` = %s AND id IN ({', '.join(['%s'] * len(jobs))})
+            """
+            cursor.execute(sql, [self.lease_seconds, self.worker_id, *[job['id'] for job in jobs]])
+            return cursor.rowcount
+
+    def complete(self, job: dict, factor_path: str = None, extra_info: dict = None):
+        """任务计算成功"""
+        with self.api.connection() as conn:
+            # 带上分区键 calculated_date，分区表只需定位一个分区
+            sql = f"""
+                UPDATE {self.table}
+                SET `data_status` = 1, `factor_path` = %s, `extra_info` = %s,
+                    `lease_owner` = NULL, `lease_expires_at` = NULL, `next_retry_at` = NULL
+                WHERE id = %s AND `calculated_date` = %s AND `lease_owner` = %s
+            """
+            cursor = conn.cursor()
+            cursor.execute(sql, (factor_path or job['factor_path'], json.dumps(extra_info),
+                                 job['id'], job['day'], self.worker_id))
+            if cursor.rowcount == 0:
+                self.logging.warning(f"任务 {job['id']} 租约已过期，结果可能被其他 worker 覆盖")
+            return cursor.rowcount == 1
+
+    def fail(self, job: dict, error: str):
+        """任务计算失败：状态置为 2，错误写入 extra_info，按退避时间安排下次重试"""
+        retry_count = job['retry_count'] + 1
+        delay = self.retry_config['retry_delay'] * (self.retry_config['backoff_factor'] ** job['retry_count'])
+        extra_info = {'error': error, 'retry_count': retry_count, 'worker': self.worker_id}
+        with self.api.connection() as conn:
+            # 带上分区键 calculated_date，分区表只需定位一个分区
+            sql = f"""
+                UPDATE {self.table}
+                SET `data_status` = 2, `extra_info` = %s, `retry_count` = %s,
+                    `next_retry_at` = NOW() + INTERVAL %s SECOND,
+                    `lease_owner` = NULL, `lease_expires_at` = NULL
+                WHERE id = %s AND `calculated_date` = %s AND `lease_owner` = %s
+            """
+            cursor = conn.cursor()
+            cursor.execute(sql, (json.dumps(extra_info, ensure_ascii=False), retry_count, delay,
+                                 job['id'], job['day'], self.worker_id))
+        if retry_count >= self.retry_config['max_retries']:
+            self.logging.error(f"任务 {job['code']} {job['day']} 重试 {retry_count} 次仍失败，不再重试: {error}")
+        return retry_count
+
+    def stats(self, factor_name: str, factor_version: str) -> dict:
+        """各状态任务数"""
+        with self.api.connection() as conn:
+            sql = f"""
+                SELECT data_status, COUNT(*) AS cnt,
+                    SUM(`lease_expires_at` IS NOT NULL AND `lease_expires_at` >= NOW()) AS leased
+                FROM {self.table} WHERE `factor_name` = %s AND `version` = %s
+                GROUP BY data_status
+            """
+            cursor = conn.cursor()
+            cursor.execute(sql, (factor_name, factor_version))
+            rows = cursor.fetchall()
+        names = {0: 'pending', 1: 'success', 2: 'failed'}
+        result = {'pending': 0, 'success': 0, 'failed': 0, 'leased': 0}
+        for row in rows:
+            result[names.get(row['data_status'], str(row['data_status']))] = row['cnt']
+            result['leased'] += int(row['leased'] or 0)
+        return result
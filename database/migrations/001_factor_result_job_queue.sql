@@ -0,0 +1,7 @@
+-- factor_result 作为任务队列：租约、重试次数与退避时间
+ALTER TABLE factor_result
+    ADD COLUMN retry_count INT NOT NULL DEFAULT 0 COMMENT '失败重试次数',
+    ADD COLUMN lease_owner VARCHAR(64) DEFAULT NULL COMMENT '领取任务的 worker',
+    ADD COLUMN lease_expires_at TIMESTAMP NULL DEFAULT NULL COMMENT '任务租约到期时间',
+    ADD COLUMN next_retry_at TIMESTAMP NULL DEFAULT NULL COMMENT '失败任务下次可重试时间',
+    ADD INDEX idx_job_queue (factor_name, version, data_status, lease_expires_at);
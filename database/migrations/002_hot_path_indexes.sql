@@ -0,0 +1,17 @@
+-- 热点查询的组合覆盖索引
+-- factor_info: get_new_factor_name / get_new_factor_names 按 (factor_name, factor_status) 过滤、按 updated_at 取最新
+ALTER TABLE factor_info
+    ADD INDEX idx_name_status_updated (factor_name, factor_status, updated_at, version);
+
+-- factor_result:
+--   idx_status_code_date  单个因子版本按 code 跨日期：存在性判断、缺失 / 路径查询、水位、失败重算
+--   idx_status_date_code  单个因子版本按日期跨 code：截面读取
+--   idx_code_date         同一 (code, day) 下多个因子：node_factors 的存在性判断
+-- idx_factor_name 是唯一键的前缀，idx_calculated_date / idx_code 被上面的组合索引取代
+ALTER TABLE factor_result
+    ADD INDEX idx_status_code_date (factor_name, version, data_status, code, calculated_date),
+    ADD INDEX idx_status_date_code (factor_name, version, data_status, calculated_date, code),
+    ADD INDEX idx_code_date (code, calculated_date, factor_name, version, data_status),
+    DROP INDEX idx_factor_name,
+    DROP INDEX idx_calculated_date,
+    DROP INDEX idx_code;
@@ -0,0 +1,19 @@
+-- 可选：factor_result 按 calculated_date 年度分区，需在 002 之后执行
+-- 分区键必须出现在所有唯一键中，因此主键改为 (id, calculated_date)
+-- 大表执行前先在从库 / 低峰期评估耗时；之后每年需要从 pmax 拆出新的年度分区：
+--   ALTER TABLE factor_result REORGANIZE PARTITION pmax INTO (
+--       PARTITION p2027 VALUES LESS THAN ('2028-01-01'),
+--       PARTITION pmax VALUES LESS THAN (MAXVALUE)
+--   );
+ALTER TABLE factor_result
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (id, calculated_date);
+
+ALTER TABLE factor_result
+    PARTITION BY RANGE COLUMNS (calculated_date) (
+        PARTITION p2023 VALUES LESS THAN ('2024-01-01'),
+        PARTITION p2024 VALUES LESS THAN ('2025-01-01'),
+        PARTITION p2025 VALUES LESS THAN ('2026-01-01'),
+        PARTITION p2026 VALUES LESS THAN ('2027-01-01'),
+        PARTITION pmax VALUES LESS THAN (MAXVALUE)
+    );
@@ -0,0 +1,4 @@
+-- factor_status 增加 '3'=派生：postprocess_factor 登记的截面后处理版本
+-- 派生版本的结果由后处理写入，不能用因子库重算，不进入待审列表，也不会被 get_new_factor_name 选为最新版本
+ALTER TABLE factor_info
+    MODIFY factor_status ENUM('0', '1', '2', '3') NOT NULL COMMENT '0=待审, 1=通过, 2=拒绝, 3=派生';
@@ -3,18 +3,232 @@ import threading
 import time
 import json
 import logging
+import contextvars
 import pymysql
 from pymysql.cursors import DictCursor
+from pymysql.constants import SERVER_STATUS
 from contextlib import contextmanager
 
+from database.factor_cache import factor_info_cache
 from env import (
     get_db_config,
     RETRY_CONFIG,
+    CONNECTION_POOL_CONFIG,
+    FACTOR_CACHE_CONFIG,
     factor_logger,
     FACTOR_INFO_TABLE_NAME
 )
 
 
+class PoolTimeoutError(ConnectionError):
+    """连接池在超时时间内没有可用连接"""
+
+
+_active_counters = contextvars.ContextVar('round_trip_counters', default=())
+
+
+class RoundTripCounter:
+    """
+    统计 with 块内发往数据库的往返次数（语句、BEGIN / COMMIT / ROLLBACK、ping）
+    按 contextvars 隔离，线程之间互不影响，块内创建的 asyncio 任务计入同一个计数器
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._token = None
+
+    def __enter__(self):
+        self._token = _active_counters.set(_active_counters.get() + (self,))
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _active_counters.reset(self._token)
+
+
+def record_round_trip():
+    """记录一次数据库往返"""
+    for counter in _active_counters.get():
+        counter.count += 1
+
+
+class _CountingConnection(pymysql.connections.Connection):
+    """所有发往服务端的命令都经过 _execute_command，在这里计数"""
+
+    def _execute_command(self, command, sql):
+        record_round_trip()
+        return super()._execute_command(command, sql)
+
+
+class _PoolEntry:
+    """连接池中的连接及其元信息"""
+
+    __slots__ = ('connection', 'created_at', 'last_used')
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+
+
+class ConnectionPool:
+    """
+    有界连接池
+    pool_size 个常驻连接 + max_overflow 个溢出连接，按 pool_recycle 回收过期连接，
+    空闲超过 ping_interval 秒的连接在取出前才做 ping 检查
+    """
+
+    def __init__(self, creator, pool_size: int = 20, max_overflow: int = 30,
+                 pool_recycle: int = 3600, pool_pre_ping: bool = True,
+                 ping_interval: float = 30.0, pool_timeout: float = 30.0,
+                 pool_reset_session: bool = True, logger=None):
+        self._creator = creator
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.pool_recycle = pool_recycle
+        self.pool_pre_ping = pool_pre_ping
+        self.ping_interval = ping_interval
+        self.pool_timeout = pool_timeout
+        self.pool_reset_session = pool_reset_session
+        self.logging = logger or factor_logger(self.__class__.__name__)
+
+        self._idle = []
+        self._in_use = {}
+        self._cond = threading.Condition(threading.Lock())
+        self._creating = 0
+        # 统计信息
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._timeouts = 0
+        self._recycled = 0
+        self._pings = 0
+
+    @property
+    def _total(self):
+        return len(self._idle) + len(self._in_use) + self._creating
+
+    def _is_usable(self, entry: _PoolEntry) -> bool:
+        """判断空闲连接是否可以直接复用，在锁外调用，统计计数需要加锁"""
+        now = time.monotonic()
+        if self.pool_recycle and now - entry.created_at > self.pool_recycle:
+            with self._cond:
+                self._recycled += 1
+            self._close(entry.connection)
+            return False
+        if self.pool_pre_ping and now - entry.last_used > self.ping_interval:
+            with self._cond:
+                self._pings += 1
+            try:
+                entry.connection.ping(reconnect=False)
+            except Exception as e:
+                self.logging.warning(f"Connection ping failed, recreating: {e}")
+                self._close(entry.connection)
+                return False
+        return True
+
+    def checkout(self, timeout: float = None) -> pymysql.Connection:
+        """从池中取出一个连接，池满时最多等待 timeout 秒"""
+        timeout = self.pool_timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+        while True:
+            entry = None
+            with self._cond:
+                while not self._idle and self._total >= self.pool_size + self.max_overflow:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeoutError(
+                            f"No connection available within {timeout} seconds, "
+                            f"pool_size={self.pool_size}, max_overflow={self.max_overflow}"
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._creating += 1
+
+            # ping / 新建连接在锁外进行，避免阻塞其他线程
+            if entry is not None:
+                if not self._is_usable(entry):
+                    with self._cond:
+                        self._cond.notify()
+                    continue
+            else:
+                try:
+                    entry = _PoolEntry(self._creator())
+                finally:
+                    with self._cond:
+                        self._creating -= 1
+                        self._cond.notify()
+
+            with self._cond:
+                self._in_use[id(entry.connection)] = entry
+                self._checkouts += 1
+                if waited:
+                    wait_time = time.monotonic() - start
+                    self._waits += 1
+                    self._wait_time_total += wait_time
+                    self._wait_time_max = max(self._wait_time_max, wait_time)
+            return entry.connection
+
+    def checkin(self, connection: pymysql.Connection):
+        """归还连接，溢出的连接直接关闭"""
+        with self._cond:
+            entry = self._in_use.pop(id(connection), None)
+            if entry is None:
+                return
+            keep = len(self._idle) < self.pool_size and connection.open
+            if keep:
+                if self.pool_reset_session and connection.server_status & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                    # 仍处于事务中的连接需要回滚后才能复用
+                    try:
+                        connection.rollback()
+                    except Exception:
+                        keep = False
+            if keep:
+                entry.last_used = time.monotonic()
+                self._idle.append(entry)
+            self._cond.notify()
+        if not keep:
+            self._close(connection)
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def dispose(self):
+        """关闭所有空闲连接"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._close(entry.connection)
+
+    def stats(self) -> dict:
+        """连接池统计信息"""
+        with self._cond:
+            return {
+                'pool_size': self.pool_size,
+                'max_overflow': self.max_overflow,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'overflow': max(0, self._total - self.pool_size),
+                'checkouts': self._checkouts,
+                'waits': self._waits,
+                'wait_time_total': self._wait_time_total,
+                'wait_time_max': self._wait_time_max,
+                'wait_time_avg': self._wait_time_total / self._waits if self._waits else 0.0,
+                'timeouts': self._timeouts,
+                'recycled': self._recycled,
+                'pings': self._pings,
+            }
+
+
 class DatabaseConnectionManager:
     """
     数据库连接管理器 - 单例模式
@@ -23,7 +237,6 @@ class DatabaseConnectionManager:
 
     _instance = None
     _lock = threading.Lock()
-    _local = threading.local()
 
     def __new__(cls):
         if cls._instance is None:
@@ -39,23 +252,41 @@ class DatabaseConnectionManager:
 
         self.db_config = get_db_config()
         self.retry_config = RETRY_CONFIG
-        self._initialized = True
+        self.pool_config = CONNECTION_POOL_CONFIG
         self.logging = factor_logger(self.__class__.__name__)
+        self.pool = self._create_pool()
+        self._initialized = True
         self.logging.info("DatabaseConnectionManager initialized")
 
-    def get_connection(self) -> pymysql.Connection:
-        """获取数据库连接，支持连接池和重试机制"""
-        if not hasattr(self._local, 'connection') or self._local.connection is None:
-            self._local.connection = self._create_connection_with_retry()
+    def _create_pool(self) -> ConnectionPool:
+        return ConnectionPool(
+            self._create_connection_with_retry,
+            pool_size=self.pool_config['pool_size'],
+            max_overflow=self.pool_config['max_overflow'],
+            pool_recycle=self.pool_config['pool_recycle'],
+            pool_pre_ping=self.pool_config['pool_pre_ping'],
+            ping_interval=self.pool_config['pool_ping_interval'],
+            pool_timeout=self.pool_config['pool_timeout'],
+            pool_reset_session=self.pool_config['pool_reset_session'],
+            logger=self.logging,
+        )
 
-        # 检查连接是否有效
+    @contextmanager
+    def connection(self):
+        """从连接池借出连接，退出时归还"""
+        conn = self.pool.checkout()
         try:
-            self._local.connection.ping(reconnect=True)
-        except Exception as e:
-            self.logging.warning(f"Connection ping failed, recreating: {e}")
-            self._local.connection = self._create_connection_with_retry()
+            yield conn
+        finally:
+            self.pool.checkin(conn)
+
+    def get_connection(self) -> pymysql.Connection:
+        """从连接池取出连接，调用方需通过 release_connection 归还"""
+        return self.pool.checkout()
 
-        return self._local.connection
+    def release_connection(self, connection: pymysql.Connection):
+        """归还连接"""
+        self.pool.checkin(connection)
 
     def _create_connection_with_retry(self) -> pymysql.Connection:
         """创建数据库连接，带重试机制"""
@@ -65,10 +296,11 @@ class DatabaseConnectionManager:
             try:
                 # 创建连接配置副本，避免参数冲突
                 conn_config = self.db_config.copy()
-                conn_config['autocommit'] = False  # 手动管理事务
+                # 单条语句直接自动提交，多条语句的事务由 transaction() 显式 BEGIN
+                conn_config['autocommit'] = True
                 conn_config['cursorclass'] = DictCursor
 
-                connection = pymysql.connect(**conn_config)
+                connection = _CountingConnection(**conn_config)
                 self.logging.info(f"Database connection created successfully")
                 return connection
 
@@ -91,16 +323,21 @@ class DatabaseConnectionManager:
             f"Last error: {last_exception}"
         )
 
+    def pool_stats(self) -> dict:
+        """连接池统计信息"""
+        return self.pool.stats()
+
     def close_connection(self):
-        """关闭当前线程的数据库连接"""
-        if hasattr(self._local, 'connection') and self._local.connection:
-            try:
-                self._local.connection.close()
-                self.logging.info("Database connection closed")
-            except Exception as e:
-                self.logging.error(f"Error closing database connection: {e}")
-            finally:
-                self._local.connection = None
+        """关闭连接池中所有空闲连接"""
+        try:
+            self.pool.dispose()
+            self.logging.info("Database connection pool disposed")
+        except Exception as e:
+            self.logging.error(f"Error closing database connection: {e}")
+
+    def reset(self):
+        """丢弃连接池但不关闭连接，用于 fork 后的子进程，避免与父进程共用 socket"""
+        self.pool = self._create_pool()
 
 
 class GetFactorDataAPI:
@@ -109,23 +346,95 @@ class GetFactorDataAPI:
     def __init__(self):
         self.db_manager = DatabaseConnectionManager()
         self.logging = factor_logger(self.__class__.__name__)
+        self.cache = factor_info_cache if FACTOR_CACHE_CONFIG['enabled'] else None
+
+    def _cached(self, key, loader, cache_if=bool):
+        """读穿缓存，未启用缓存时直接查询"""
+        if self.cache is None:
+            return loader()
+        return self.cache.get_or_load(key, loader, cache_if)
+
+    def invalidate_cache(self, factor_name: str = None):
+        """使因子元数据缓存失效，factor_name 为空时清空全部"""
+        if self.cache is None:
+            return
+        if factor_name is None:
+            self.cache.invalidate()
+        else:
+            self.cache.invalidate(lambda key: key[0] == 'names' or key[1] == factor_name)
+
+    def warm_factor_info_cache(self):
+        """一次查询加载整张 factor_info 表预热缓存，用于 worker 启动"""
+        if self.cache is None:
+            return
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(*self._warm_cache_query())
+                rows = cursor.fetchall()
+            except Exception as e:
+                self.logging.error(f"函数 {self.warm_factor_info_cache.__name__} 内 预热因子缓存失败， {e}")
+                raise
+        count = self._fill_factor_info_cache(self.cache, rows)
+        self.logging.info(f"因子元数据缓存预热完成，共 {count} 个因子 {len(rows)} 个版本")
+
+    # 以下 _xxx_query 返回 (sql, params)，同步与异步接口（AsyncGetFactorDataAPI）共用，避免两边语句不一致
+
+    @staticmethod
+    def _warm_cache_query():
+        """warm_factor_info_cache 的查询语句与参数"""
+        sql = f"""
+            SELECT factor_name, version, factor_status, updated_at
+            FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')}
+        """
+        return sql, None
 
-    def _get_connection(self):
-        """获取数据库连接"""
-        return self.db_manager.get_connection()
+    @staticmethod
+    def _fill_factor_info_cache(cache, rows):
+        """用整张 factor_info 表的行填充元数据缓存，返回因子个数"""
+        factors = {}
+        for row in rows:
+            factors.setdefault(row['factor_name'], []).append(row)
+        cache.set(('names',), [{'factor_name': name} for name in factors])
+        for name, versions in factors.items():
+            cache.set(('versions', name), [{'version': row['version']} for row in versions])
+            cache.set(('exists', name, None), True)
+            for row in versions:
+                cache.set(('exists', name, row['version']), True)
+            approved = [row for row in versions if row['factor_status'] == '1']
+            if approved:
+                newest = max(approved, key=lambda row: row['updated_at'])
+                cache.set(('newest', name), {'version': newest['version']})
+        return len(factors)
 
     @contextmanager
-    def transaction(self):
-        conn = self._get_connection()
-        try:
-            conn.begin()  # 开启事务
+    def connection(self):
+        """借出自动提交的连接，只读查询与单条写入语句不需要 BEGIN / COMMIT"""
+        with self.db_manager.connection() as conn:
             yield conn
-            conn.commit()  # 提交事务
-            self.logging.debug("Transaction committed successfully")
-        except Exception as e:
-            conn.rollback()  # 事务回滚
-            self.logging.error(f"Transaction rolled back due to error: {e}")
-            raise
+
+    @staticmethod
+    def count_round_trips() -> RoundTripCounter:
+        """with api.count_round_trips() as counter: ...，counter.count 为块内的数据库往返次数"""
+        return RoundTripCounter()
+
+    @contextmanager
+    def transaction(self):
+        """多条语句需要原子执行时使用"""
+        with self.db_manager.connection() as conn:
+            try:
+                conn.begin()  # 开启事务
+                yield conn
+                conn.commit()  # 提交事务
+                self.logging.debug("Transaction committed successfully")
+            except Exception as e:
+                conn.rollback()  # 事务回滚
+                self.logging.error(f"Transaction rolled back due to error: {e}")
+                raise
+
+    def pool_stats(self) -> dict:
+        """连接池统计信息"""
+        return self.db_manager.pool_stats()
 
     def _analysis_input_dict(self, factor_info: dict):
         """解析参数内容"""
@@ -141,21 +450,27 @@ class GetFactorDataAPI:
             self.logging.error("缺失必填参数类型, factor_name, version, factor_type, submitted_by")
             raise ValueError("缺失必填参数")
         self.factor_args = factor_info.get('factor_args', {})
-        self.factor_status = '0'
+        # 带 derived_from 的是截面后处理登记的派生版本，状态为 '3'，不参与审批与最新版本选择
+        self.factor_status = '3' if factor_info.get('derived_from') else '0'
         self.review_by = factor_info.get('review_by', 'http://feishudizhi.com')
         self.review_notes = factor_info.get('review_notes', None)
 
+    @staticmethod
+    def _create_factor_info_query(params):
+        """create_factor_info 的插入语句，params 为 _analysis_input_dict 解析出的字段"""
+        sql = f"""
+            INSERT INTO {FACTOR_INFO_TABLE_NAME.get('factor_info')} (
+                factor_name, version, factor_args, factor_type, factor_status,
+                submitted_by, review_by, review_notes
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """
+        return sql, params
+
     def create_factor_info(self, factor_info: dict):
         """提交因子信息"""
         self._analysis_input_dict(factor_info)
-        with self.transaction() as conn:
+        with self.connection() as conn:
             try:
-                sql = f"""
-                    INSERT INTO {FACTOR_INFO_TABLE_NAME.get('factor_info')} (
-                        factor_name, version, factor_args, factor_type, factor_status,
-                        submitted_by, review_by, review_notes
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """
                 params = (
                     self.factor_name,
                     self.version,
@@ -166,8 +481,9 @@ class GetFactorDataAPI:
                     self.review_by,
                     self.review_notes
                 )
-                conn.cursor().execute(sql, params)
+                conn.cursor().execute(*self._create_factor_info_query(params))
                 self.logging.info(f"因子: {self.factor_name} 版本: {self.version} 入库成功")
+                self.invalidate_cache(self.factor_name)
             except Exception as e:
                 if "1062" in str(e):
                     self.logging.warning(f"因子: {self.factor_name} 版本: {self.version} 存在库中")
@@ -176,167 +492,741 @@ class GetFactorDataAPI:
                 raise
 
     def update_factor_status(self, factor_name: str, factor_version: str):
-        """审批因子"""
-        if not self.factor_exists(factor_name, factor_version):
-            self.logging.warning(f"审批 {factor_name}因子 {factor_version}版本 不存在，请先提交")
-            return
-        if len(self.get_factor_pending_status(factor_name, factor_version)) == 0:
-            self.logging.warning(f"审批 {factor_name}因子 {factor_version}版本 已经通过审批")
-            return
-        """TODO: 需要插入一个函数，审核这个因子是否通过，返回 字符串1，通过。字符串2，不通过"""
-        with self.transaction() as conn:
+        """
+        审批因子版本，一条 UPDATE 完成判断、更新与原因区分，只有一次数据库往返
+        返回 'approved'（本次通过）、'already_approved'（之前已通过）、'rejected'（已被拒绝，不改动）、
+        'derived'（派生版本，不能审批）、'not_found'（版本不存在）
+        """
+        with self.connection() as conn:
             try:
-                sql = f"""
-                    UPDATE {FACTOR_INFO_TABLE_NAME.get('factor_info')} SET `factor_status` = %s
-                        WHERE `factor_name` = %s AND `version` = %s
-                """
-                params = ('1', factor_name, factor_version)
                 cursor = conn.cursor()
-                cursor.execute(sql, params)
-                self.logging.info(f"因子 {factor_name} 版本 {factor_version} 通过审批")
+                cursor.execute(*self._update_factor_status_query(factor_name, factor_version))
+                status = self._approval_status(cursor.lastrowid)
             except Exception as e:
                 self.logging.error(f"函数 {self.update_factor_status.__name__} 审批因子失败, {e}")
                 raise
+        self._log_approval(factor_name, factor_version, status)
+        return status
+
+    # LAST_INSERT_ID(expr) 的值随 UPDATE 的 OK 包返回（cursor.lastrowid），没有匹配的行时为 0
+    _APPROVAL_STATUS = {0: 'not_found', 1: 'approved', 2: 'already_approved', 3: 'rejected', 4: 'derived'}
+
+    @staticmethod
+    def _update_factor_status_query(factor_name: str, factor_version: str):
+        """只把待审核的版本改为通过，同时用 LAST_INSERT_ID 带回更新前的状态"""
+        sql = f"""
+            UPDATE {FACTOR_INFO_TABLE_NAME.get('factor_info')}
+            SET `factor_status` = CASE
+                WHEN LAST_INSERT_ID(CASE `factor_status` WHEN '0' THEN 1 WHEN '1' THEN 2 WHEN '3' THEN 4 ELSE 3 END) = 1
+                THEN '1' ELSE `factor_status` END
+            WHERE `factor_name` = %s AND `version` = %s
+        """
+        return sql, (factor_name, factor_version)
+
+    @classmethod
+    def _approval_status(cls, lastrowid) -> str:
+        return cls._APPROVAL_STATUS.get(lastrowid or 0, 'not_found')
+
+    def _log_approval(self, factor_name: str, factor_version: str, status: str):
+        if status == 'approved':
+            self.logging.info(f"因子 {factor_name} 版本 {factor_version} 通过审批")
+            self.invalidate_cache(factor_name)
+        elif status == 'not_found':
+            self.logging.warning(f"审批 {factor_name}因子 {factor_version}版本 不存在，请先提交")
+        elif status == 'already_approved':
+            self.logging.warning(f"审批 {factor_name}因子 {factor_version}版本 已经通过审批")
+        elif status == 'derived':
+            self.logging.warning(f"审批 {factor_name}因子 {factor_version}版本 是截面后处理的派生版本，不能审批")
+        else:
+            self.logging.warning(f"审批 {factor_name}因子 {factor_version}版本 已被拒绝")
 
     def get_all_factor_version(self, factor_name):
         """获取因子所有版本"""
-        with self.transaction() as conn:
+        return self._cached(('versions', factor_name), lambda: self._get_all_factor_version(factor_name))
+
+    def _get_all_factor_version(self, factor_name):
+        with self.connection() as conn:
             try:
-                sql = f"SELECT version FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_name` = %s"
                 cursor = conn.cursor()
-                cursor.execute(sql, [factor_name,])
+                cursor.execute(*self._all_factor_version_query(factor_name))
                 results = cursor.fetchall()
                 return results
             except Exception as e:
                 raise
 
+    @staticmethod
+    def _all_factor_version_query(factor_name):
+        return f"SELECT version FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_name` = %s", [factor_name]
+
     def get_all_factor_name(self):
         """获取所有因子名称"""
-        with self.transaction() as conn:
+        return self._cached(('names',), self._get_all_factor_name)
+
+    def _get_all_factor_name(self):
+        with self.connection() as conn:
             try:
-                sql = f"SELECT DISTINCT factor_name FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')}"
                 cursor = conn.cursor()
-                cursor.execute(sql)
+                cursor.execute(*self._all_factor_name_query())
                 return cursor.fetchall()
             except Exception as e:
                 raise
 
+    @staticmethod
+    def _all_factor_name_query():
+        return f"SELECT DISTINCT factor_name FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')}", None
+
     def get_new_factor_name(self, factor_name: str):
         """获取因子的最新版本"""
-        if not self.factor_exists(factor_name):
-            self.logging.warning(f"{factor_name} 因子不存在")
-            return
-        with self.transaction() as conn:
+        return self._cached(('newest', factor_name), lambda: self._get_new_factor_name(factor_name))
+
+    def _get_new_factor_name(self, factor_name: str):
+        with self.connection() as conn:
             try:
-                sql = f"""
-                    SELECT version FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_name` = %s
-                        AND `factor_status` = '1' AND `updated_at` = (
-                            SELECT MAX(updated_at) FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} 
-                            WHERE `factor_name` = %s AND `factor_status` = '1'
-                        )
-                """
-                params = (factor_name, factor_name)
                 cursor = conn.cursor()
-                cursor.execute(sql, params)
+                cursor.execute(*self._new_factor_name_query(factor_name))
                 result = cursor.fetchone()
-                return result
             except Exception as e:
                 raise
+        if not result['factor_exists']:
+            self.logging.warning(f"{factor_name} 因子不存在")
+            return
+        if result['version'] is None:
+            return
+        return {'version': result['version']}
 
-    def get_factor_pending_status(self, factor_name: str = None, factor_version: str = None):
-        """获取处于审核状态的因子"""
-        with self.transaction() as conn:
+    @staticmethod
+    def _new_factor_name_query(factor_name: str):
+        """两个子查询都只走 idx_name_status_updated，一次往返同时得到最新版本与因子是否存在"""
+        sql = f"""
+            SELECT (
+                SELECT version FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')}
+                WHERE `factor_name` = %s AND `factor_status` = '1'
+                ORDER BY `updated_at` DESC LIMIT 1
+            ) AS version, EXISTS (
+                SELECT 1 FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_name` = %s
+            ) AS factor_exists
+        """
+        return sql, (factor_name, factor_name)
+
+    def get_new_factor_names(self, factor_names):
+        """批量获取多个因子的最新审批通过版本，返回 {factor_name: version}，没有通过版本的因子不返回"""
+        factor_names = list(dict.fromkeys(factor_names))
+        versions = {}
+        missing = []
+        for name in factor_names:
+            cached = self.cache.get(('newest', name)) if self.cache is not None else None
+            if cached:
+                versions[name] = cached['version']
+            else:
+                missing.append(name)
+        if not missing:
+            return versions
+        with self.connection() as conn:
             try:
-                # 基础查询
-                sql = f"SELECT * FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_status` = %s"
-                params = ['0']  # 用于存储 SQL 参数
+                cursor = conn.cursor()
+                cursor.execute(*self._new_factor_names_query(missing))
+                rows = cursor.fetchall()
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_new_factor_names.__name__} 内 批量获取因子版本失败， {e}")
+                raise
+        for name, version in self._newest_versions(rows).items():
+            versions[name] = version
+            if self.cache is not None:
+                self.cache.set(('newest', name), {'version': version})
+        return versions
 
-                # 添加条件
-                if factor_name is not None:
-                    sql += " AND `factor_name` = %s"
-                    params.append(factor_name)
+    @staticmethod
+    def _new_factor_names_query(factor_names):
+        sql = f"""
+            SELECT factor_name, version, updated_at FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')}
+            WHERE `factor_status` = '1' AND `factor_name` IN ({', '.join(['%s'] * len(factor_names))})
+        """
+        return sql, list(factor_names)
 
-                if factor_version is not None:
-                    sql += " AND `version` = %s"
-                    params.append(factor_version)
+    @staticmethod
+    def _newest_versions(rows):
+        """每个因子取 updated_at 最新的审批通过版本 {factor_name: version}"""
+        newest = {}
+        for row in rows:
+            if row['factor_name'] not in newest or row['updated_at'] > newest[row['factor_name']]['updated_at']:
+                newest[row['factor_name']] = row
+        return {name: row['version'] for name, row in newest.items()}
 
+    def get_factor_pending_status(self, factor_name: str = None, factor_version: str = None):
+        """获取处于审核状态的因子"""
+        with self.connection() as conn:
+            try:
                 cursor = conn.cursor()
-                cursor.execute(sql, params)
+                cursor.execute(*self._factor_pending_status_query(factor_name, factor_version))
                 results = cursor.fetchall()
                 return results
             except Exception as e:
                 self.logging.error(f"函数 {self.get_factor_pending_status.__name__}内 获取审核因子失败，{e}")
                 raise
 
+    @staticmethod
+    def _factor_pending_status_query(factor_name: str = None, factor_version: str = None):
+        # 基础查询
+        sql = f"SELECT * FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_status` = %s"
+        params = ['0']  # 用于存储 SQL 参数
+
+        # 添加条件
+        if factor_name is not None:
+            sql += " AND `factor_name` = %s"
+            params.append(factor_name)
+
+        if factor_version is not None:
+            sql += " AND `version` = %s"
+            params.append(factor_version)
+        return sql, params
+
+    def get_factor_args(self, factor_name: str, factor_version: str):
+        """获取因子版本登记的 factor_args，版本不存在返回 None"""
+        return self._cached(('args', factor_name, factor_version),
+                            lambda: self._get_factor_args(factor_name, factor_version),
+                            cache_if=lambda value: value is not None)
+
+    def _get_factor_args(self, factor_name: str, factor_version: str):
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(*self._factor_args_query(factor_name, factor_version))
+                row = cursor.fetchone()
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_factor_args.__name__} 内 获取因子参数失败， {e}")
+                raise
+        return self._parse_factor_args(row)
+
+    @staticmethod
+    def _factor_args_query(factor_name: str, factor_version: str):
+        sql = f"""
+            SELECT factor_args FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')}
+            WHERE `factor_name` = %s AND `version` = %s
+        """
+        return sql, (factor_name, factor_version)
+
+    @staticmethod
+    def _parse_factor_args(row):
+        """factor_args 列转换为 dict，行不存在返回 None"""
+        if row is None:
+            return None
+        args = row['factor_args']
+        return (json.loads(args) if isinstance(args, (str, bytes)) else args) or {}
+
     def factor_exists(self, factor_name: str, factor_version: str = None):
         """判断因子，以及对应的版本是否存在"""
-        with self.transaction() as conn:
+        # 只缓存存在的结果，避免刚提交的因子被误判为不存在
+        return self._cached(('exists', factor_name, factor_version),
+                            lambda: self._factor_exists(factor_name, factor_version))
+
+    def _factor_exists(self, factor_name: str, factor_version: str = None):
+        with self.connection() as conn:
             try:
-                sql = f"SELECT * FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_name` = %s"
-                params = [factor_name]
-                if factor_version is not None:
-                    sql += " AND `version` = %s"
-                    params.append(factor_version)
                 cursor = conn.cursor()
-                cursor.execute(sql, params)
-                results = cursor.fetchall()
-                if results:
-                    return True
-                return False
+                cursor.execute(*self._factor_exists_query(factor_name, factor_version))
+                return cursor.fetchone() is not None
             except Exception as e:
                 self.logging.error(f"函数{self.factor_exists.__name__} 内 获取指定因子失败， {e}")
                 raise
 
+    @staticmethod
+    def _factor_exists_query(factor_name: str, factor_version: str = None):
+        sql = f"SELECT 1 FROM {FACTOR_INFO_TABLE_NAME.get('factor_info')} WHERE `factor_name` = %s"
+        params = [factor_name]
+        if factor_version is not None:
+            sql += " AND `version` = %s"
+            params.append(factor_version)
+        return sql + " LIMIT 1", params
+
     def write_node_factor_data(self, factor_name: str, factor_version: str,
                                code: str, day: str, data_type: str, save_path: str,
                                data_status: str = 1, extra_info: dict = None
                                ):
         """将计算因子结果信息保存到数据库中"""
-        with self.transaction() as conn:
+        with self.connection() as conn:
             try:
-                sql = f"""
-                    INSERT INTO {FACTOR_INFO_TABLE_NAME.get('factor_result')} (
-                        factor_name, version, code, data_type, factor_path,
-                        calculated_date, data_status, extra_info
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                """
                 # path = os.path.join(save_path, day, code)
-                params = (
-                    factor_name,
-                    factor_version,
-                    code,
-                    data_type,
-                    save_path,
-                    day,
-                    data_status,
-                    json.dumps(extra_info)
-                )
-                conn.cursor().execute(sql, params)
+                params = self._factor_result_params({
+                    'factor_name': factor_name,
+                    'version': factor_version,
+                    'code': code,
+                    'data_type': data_type,
+                    'factor_path': save_path,
+                    'day': day,
+                    'data_status': data_status,
+                    'extra_info': extra_info,
+                })
+                start = time.perf_counter()
+                conn.cursor().execute(self._UPSERT_RESULT_SQL, params)
                 self.logging.info(f"{factor_name}因子 {factor_version} 版本计算{code} {day}结果入库成功")
+                self.logging.debug(f"db_insert 耗时 {(time.perf_counter() - start) * 1000:.3f} ms")
             except Exception as e:
                 self.logging.error(f"{factor_name}因子 {factor_version} 版本计算{code} {day}结果入库失败: {e}")
                 raise
 
+    # 已存在的 (factor_name, version, code, calculated_date) 覆盖更新
+    # 不涉及任务队列的列（migration 001），租约由 FactorJobQueue.complete / fail 释放，未升级的库也能写入
+    _UPSERT_RESULT_SQL = f"""
+        INSERT INTO {FACTOR_INFO_TABLE_NAME.get('factor_result')} (
+            factor_name, version, code, data_type, factor_path,
+            calculated_date, data_status, extra_info
+        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        ON DUPLICATE KEY UPDATE data_type = VALUES(data_type), factor_path = VALUES(factor_path),
+            data_status = VALUES(data_status), extra_info = VALUES(extra_info)
+    """
+
+    @staticmethod
+    def _factor_result_params(record: dict):
+        """将单条结果记录转换为 _UPSERT_RESULT_SQL 的参数"""
+        return (
+            record['factor_name'],
+            record['version'],
+            record['code'],
+            record['data_type'],
+            record['factor_path'],
+            str(record['day']).replace('-', ''),
+            record.get('data_status', 1),
+            json.dumps(record.get('extra_info'))
+        )
+
+    def write_node_factor_data_bulk(self, records, chunk_size: int = 500):
+        """
+        批量写入因子结果信息，已存在的 (factor_name, version, code, calculated_date) 覆盖更新
+        每个分块一个事务，返回与 records 一一对应的结果 [{'code', 'day', 'success', 'error'}]
+        """
+        records = list(records)
+        sql = self._UPSERT_RESULT_SQL
+        outcomes = []
+        for i in range(0, len(records), chunk_size):
+            chunk = records[i:i + chunk_size]
+            try:
+                with self.transaction() as conn:
+                    # pymysql 会把 executemany 改写为多行 INSERT
+                    conn.cursor().executemany(sql, [self._factor_result_params(r) for r in chunk])
+                outcomes.extend(
+                    {'code': r['code'], 'day': r['day'], 'success': True, 'error': None} for r in chunk
+                )
+            except Exception as e:
+                # 分块失败时逐行重写，定位出错的记录
+                self.logging.warning(f"批量写入 {len(chunk)} 条因子结果失败，改为逐行写入: {e}")
+                for r in chunk:
+                    try:
+                        with self.connection() as conn:
+                            conn.cursor().execute(sql, self._factor_result_params(r))
+                        outcomes.append({'code': r['code'], 'day': r['day'], 'success': True, 'error': None})
+                    except Exception as row_e:
+                        outcomes.append({'code': r['code'], 'day': r['day'], 'success': False, 'error': repr(row_e)})
+        success = sum(1 for o in outcomes if o['success'])
+        self.logging.info(f"批量写入因子结果 {success}/{len(records)} 条成功")
+        return outcomes
+
+    @staticmethod
+    def _failed_result_query(records):
+        """
+        write_node_factor_failures 的语句与参数，失败记录为 data_status = 2
+        已经计算成功的结果不会被覆盖；MySQL 按顺序赋值，extra_info 需要在 data_status 之前判断
+        VALUES 中全部是 %s（data_status 也作为参数），pymysql 才会把 executemany 改写为多行 INSERT
+        """
+        sql = f"""
+            INSERT INTO {FACTOR_INFO_TABLE_NAME.get('factor_result')} (
+                factor_name, version, code, data_type, factor_path,
+                calculated_date, data_status, extra_info
+            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+            ON DUPLICATE KEY UPDATE
+                extra_info = CASE WHEN data_status = 1 THEN extra_info ELSE VALUES(extra_info) END,
+                data_status = CASE WHEN data_status = 1 THEN data_status ELSE VALUES(data_status) END
+        """
+        params = [
+            (r['factor_name'], r['version'], r['code'], r['data_type'], r['factor_path'],
+             str(r['day']).replace('-', ''), 2, json.dumps({'error': r.get('error')}, ensure_ascii=False))
+            for r in records
+        ]
+        return sql, params
+
+    def write_node_factor_failures(self, records):
+        """
+        记录计算失败的结果（data_status = 2），增量更新时重算
+        records: [{'factor_name', 'version', 'code', 'day', 'data_type', 'factor_path', 'error'}]
+        """
+        records = list(records)
+        if not records:
+            return 0
+        sql, params = self._failed_result_query(records)
+        try:
+            with self.transaction() as conn:
+                conn.cursor().executemany(sql, params)
+        except Exception as e:
+            self.logging.error(f"函数 {self.write_node_factor_failures.__name__} 内 记录失败结果失败， {e}")
+            raise
+        self.logging.info(f"记录计算失败的因子结果 {len(records)} 条")
+        return len(records)
+
     def exists_source_code_data(self, factor_name: str, factor_version: str,
                                 code: str, day: str):
         """判定因子结果存在"""
-        with self.transaction() as conn:
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(*self._exists_source_code_data_query(factor_name, factor_version, code, day))
+                return cursor.fetchone() is not None
+            except Exception as e:
+                self.logging.error(f"{e}")
+                raise
+
+    @staticmethod
+    def _exists_source_code_data_query(factor_name: str, factor_version: str, code: str, day: str):
+        sql = f"""
+            SELECT 1 FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')} WHERE `factor_name` = %s
+            AND `version` = %s AND `code` = %s AND `calculated_date` = %s AND `data_status` = 1 LIMIT 1
+        """
+        return sql, (factor_name, factor_version, code, str(day).replace('-', ''))
+
+    def get_exists_node_factor_data(self, factor_name: str, factor_version: str, codes,
+                                    start_day: str, end_day: str, chunk_size: int = 1000):
+        """批量获取区间内已存在的因子结果，返回 {(code, 'YYYYMMDD')} 集合"""
+        codes = list(dict.fromkeys(codes))
+        start_day = str(start_day).replace('-', '')
+        end_day = str(end_day).replace('-', '')
+        exists = set()
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                # 按 code 分块，避免 IN 列表过长超过 max_allowed_packet
+                for i in range(0, len(codes), chunk_size):
+                    chunk = codes[i:i + chunk_size]
+                    cursor.execute(*self._node_factor_range_query(
+                        'code, calculated_date', factor_name, factor_version, chunk, start_day, end_day))
+                    for row in cursor.fetchall():
+                        exists.add((row['code'], row['calculated_date'].strftime('%Y%m%d')))
+                return exists
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_exists_node_factor_data.__name__} 内 批量查询因子结果失败， {e}")
+                raise
+
+    @staticmethod
+    def _node_factor_range_query(columns: str, factor_name: str, factor_version: str, codes,
+                                 start_day: str, end_day: str):
+        """区间内计算成功的结果，get_exists_node_factor_data / get_node_factor_paths 的单个 code 分块"""
+        sql = f"""
+            SELECT {columns} FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')}
+            WHERE `factor_name` = %s AND `version` = %s
+            AND `code` IN ({', '.join(['%s'] * len(codes))})
+            AND `calculated_date` BETWEEN %s AND %s AND `data_status` = 1
+        """
+        return sql, [factor_name, factor_version, *codes, start_day, end_day]
+
+    def get_node_factor_paths(self, factor_name: str, factor_version: str, codes,
+                              start_day: str, end_day: str, chunk_size: int = 1000):
+        """批量获取区间内计算成功的因子结果存储路径 [{'code', 'calculated_date', 'data_type', 'factor_path'}]"""
+        codes = list(dict.fromkeys(codes))
+        start_day = str(start_day).replace('-', '')
+        end_day = str(end_day).replace('-', '')
+        rows = []
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                for i in range(0, len(codes), chunk_size):
+                    chunk = codes[i:i + chunk_size]
+                    cursor.execute(*self._node_factor_range_query(
+                        'code, calculated_date, data_type, factor_path',
+                        factor_name, factor_version, chunk, start_day, end_day))
+                    rows.extend(cursor.fetchall())
+                return rows
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_node_factor_paths.__name__} 内 获取因子结果路径失败， {e}")
+                raise
+
+    def get_node_factor_fingerprints(self, factor_name: str, factor_version: str, page_size: int = 5000):
+        """
+        获取版本下计算成功的结果及其指纹（extra_info.fingerprint），按主键分页读取
+        返回 {(code, 'YYYYMMDD'): {'data_type', 'factor_path', 'fingerprint'}}，没有记录指纹的为 None
+        """
+        results = {}
+        last_id = 0
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                while True:
+                    cursor.execute(*self._fingerprint_query(factor_name, factor_version, last_id, page_size))
+                    rows = cursor.fetchall()
+                    results.update(self._fingerprint_entries(rows))
+                    if len(rows) < page_size:
+                        return results
+                    last_id = rows[-1]['id']
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_node_factor_fingerprints.__name__} 内 获取因子结果指纹失败， {e}")
+                raise
+
+    @staticmethod
+    def _fingerprint_query(factor_name: str, factor_version: str, last_id: int, page_size: int):
+        """get_node_factor_fingerprints 单页的查询语句与参数"""
+        sql = f"""
+            SELECT id, code, calculated_date, data_type, factor_path, extra_info
+            FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')}
+            WHERE `factor_name` = %s AND `version` = %s AND `data_status` = 1 AND `id` > %s
+            ORDER BY id LIMIT %s
+        """
+        return sql, (factor_name, factor_version, last_id, page_size)
+
+    @staticmethod
+    def _fingerprint_entries(rows):
+        """把结果行转换为 {(code, 'YYYYMMDD'): {'data_type', 'factor_path', 'fingerprint'}}"""
+        entries = {}
+        for row in rows:
+            info = row['extra_info']
+            info = json.loads(info) if isinstance(info, (str, bytes)) else info
+            entries[(row['code'], row['calculated_date'].strftime('%Y%m%d'))] = {
+                'data_type': row['data_type'],
+                'factor_path': row['factor_path'],
+                'fingerprint': info.get('fingerprint') if isinstance(info, dict) else None,
+            }
+        return entries
+
+    def get_factor_watermarks(self, factor_name: str, factor_version: str):
+        """获取每个 code 最新计算成功的日期 {code: 'YYYYMMDD'}"""
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(*self._factor_watermarks_query(factor_name, factor_version))
+                return {row['code']: row['watermark'].strftime('%Y%m%d') for row in cursor.fetchall()}
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_factor_watermarks.__name__} 内 获取因子水位失败， {e}")
+                raise
+
+    @staticmethod
+    def _factor_watermarks_query(factor_name: str, factor_version: str):
+        sql = f"""
+            SELECT code, MAX(calculated_date) AS watermark
+            FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')}
+            WHERE `factor_name` = %s AND `version` = %s AND `data_status` = 1
+            GROUP BY code
+        """
+        return sql, (factor_name, factor_version)
+
+    def get_failed_node_factor_data(self, factor_name: str, factor_version: str):
+        """获取计算失败（data_status = 2）的 [(code, 'YYYYMMDD')]"""
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(*self._failed_node_factor_query(factor_name, factor_version))
+                return [(row['code'], row['calculated_date'].strftime('%Y%m%d')) for row in cursor.fetchall()]
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_failed_node_factor_data.__name__} 内 获取失败因子结果失败， {e}")
+                raise
+
+    @staticmethod
+    def _failed_node_factor_query(factor_name: str, factor_version: str):
+        sql = f"""
+            SELECT code, calculated_date FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')}
+            WHERE `factor_name` = %s AND `version` = %s AND `data_status` = 2
+        """
+        return sql, (factor_name, factor_version)
+
+    @staticmethod
+    def _percentile(values, q: float):
+        """线性插值分位数，values 需已排序"""
+        if not values:
+            return None
+        pos = (len(values) - 1) * q
+        low = int(pos)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (pos - low)
+
+    @staticmethod
+    def _stage_stats_query(factor_name: str, factor_version: str = None,
+                           start_day: str = None, end_day: str = None):
+        """get_factor_stage_stats 的查询语句与参数"""
+        sql = f"""
+            SELECT version, extra_info FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')}
+            WHERE `factor_name` = %s AND `data_status` = 1 AND `extra_info` IS NOT NULL
+        """
+        params = [factor_name]
+        if factor_version is not None:
+            sql += " AND `version` = %s"
+            params.append(factor_version)
+        if start_day is not None:
+            sql += " AND `calculated_date` >= %s"
+            params.append(str(start_day).replace('-', ''))
+        if end_day is not None:
+            sql += " AND `calculated_date` <= %s"
+            params.append(str(end_day).replace('-', ''))
+        return sql, params
+
+    @classmethod
+    def _summarize_stage_stats(cls, rows):
+        """按版本汇总 extra_info 中的分阶段耗时"""
+        samples = {}
+        for row in rows:
+            info = row['extra_info']
+            info = json.loads(info) if isinstance(info, (str, bytes)) else info
+            if not isinstance(info, dict) or 'stages_ms' not in info:
+                continue
+            version = samples.setdefault(row['version'], {'stages': {}, 'total_ms': [], 'rss': [], 'rss_delta': []})
+            for stage, value in info['stages_ms'].items():
+                version['stages'].setdefault(stage, []).append(value)
+            if info.get('total_ms') is not None:
+                version['total_ms'].append(info['total_ms'])
+            for key in ('rss', 'rss_delta'):
+                if info.get(key) is not None:
+                    version[key].append(info[key])
+
+        stats = {}
+        for version, sample in samples.items():
+            stages = {}
+            for stage, values in sample['stages'].items():
+                values.sort()
+                stages[stage] = {'p50': cls._percentile(values, 0.5), 'p95': cls._percentile(values, 0.95)}
+            total = sorted(sample['total_ms'])
+            stats[version] = {
+                'count': len(total),
+                'stages': stages,
+                'total_p50': cls._percentile(total, 0.5),
+                'total_p95': cls._percentile(total, 0.95),
+                'rss_p95': cls._percentile(sorted(sample['rss']), 0.95),
+                'rss_delta_p95': cls._percentile(sorted(sample['rss_delta']), 0.95),
+            }
+        return stats
+
+    def get_factor_stage_stats(self, factor_name: str, factor_version: str = None,
+                               start_day: str = None, end_day: str = None):
+        """
+        汇总 extra_info 中的分阶段耗时，按版本返回各阶段 p50 / p95（毫秒）
+        {version: {'count': n, 'stages': {stage: {'p50': .., 'p95': ..}}, 'rss_p95': .., 'rss_delta_p95': ..}}
+        """
+        sql, params = self._stage_stats_query(factor_name, factor_version, start_day, end_day)
+        with self.connection() as conn:
             try:
-                sql = f"""
-                    SELECT * FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')} WHERE `factor_name` = %s
-                    AND `version` = %s AND `code` = %s AND `calculated_date` = %s
-                """
-                params = (factor_name, factor_version, code, day)
                 cursor = conn.cursor()
                 cursor.execute(sql, params)
-                results = cursor.fetchall()
+                rows = cursor.fetchall()
+            except Exception as e:
+                self.logging.error(f"函数 {self.get_factor_stage_stats.__name__} 内 汇总因子耗时失败， {e}")
+                raise
+        return self._summarize_stage_stats(rows)
 
-                if results:
-                    return True
-                return False
+    def get_exists_factor_versions(self, factor_versions: dict, code: str, day: str):
+        """
+        判定同一 (code, day) 下多个 {factor_name: version} 的结果是否存在
+        返回已存在的 {factor_name: factor_path}，复用旧版本结果的行 factor_path 指向旧版本
+        """
+        if not factor_versions:
+            return {}
+        with self.connection() as conn:
+            try:
+                cursor = conn.cursor()
+                cursor.execute(*self._exists_factor_versions_query(factor_versions, code, day))
+                return {row['factor_name']: row['factor_path'] for row in cursor.fetchall()}
             except Exception as e:
-                self.logging.error(f"{e}")
+                self.logging.error(f"函数 {self.get_exists_factor_versions.__name__} 内 批量查询因子结果失败， {e}")
                 raise
 
+    @staticmethod
+    def _exists_factor_versions_query(factor_versions: dict, code: str, day: str):
+        """(factor_name, version) 行构造器过滤，idx_code_date 定位后只回表读取命中行的 factor_path"""
+        pairs = list(factor_versions.items())
+        sql = f"""
+            SELECT factor_name, factor_path FROM {FACTOR_INFO_TABLE_NAME.get('factor_result')}
+            WHERE `code` = %s AND `calculated_date` = %s
+            AND (`factor_name`, `version`) IN ({', '.join(['(%s, %s)'] * len(pairs))})
+            AND `data_status` = 1
+        """
+        return sql, [code, str(day).replace('-', ''), *[value for pair in pairs for value in pair]]
+
+    def get_missing_node_factor_data(self, factor_name: str, factor_version: str, codes, days,
+                                     chunk_size: int = 1000):
+        """批量判定因子结果是否存在，返回缺失的 [(code, 'YYYYMMDD')] 列表"""
+        codes = list(dict.fromkeys(codes))
+        days = sorted({str(day).replace('-', '') for day in days})
+        if not codes or not days:
+            return []
+        exists = self.get_exists_node_factor_data(
+            factor_name, factor_version, codes, days[0], days[-1], chunk_size
+        )
+        return [(code, day) for day in days for code in codes if (code, day) not in exists]
+
     def close(self):
         self.db_manager.close_connection()
+
+
+
+class FactorResultBufferWriter:
+    """
+    因子结果缓冲写入器
+    计算循环不断 add 结果记录，达到条数阈值或时间阈值时批量 flush 入库
+    background=True 时后台线程按时间阈值检查，生产者停顿时缓冲的记录也会按时入库
+    """
+
+    def __init__(self, api: GetFactorDataAPI = None, max_rows: int = 500,
+                 max_interval: float = 5.0, chunk_size: int = 500, background: bool = True):
+        self.api = api or GetFactorDataAPI()
+        self.max_rows = max_rows
+        self.max_interval = max_interval
+        self.chunk_size = chunk_size
+        self.failures = []
+        self.written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        # 缓冲区中最早一条记录加入的时间，缓冲区为空时为 None
+        self._oldest = None
+        self._stop = threading.Event()
+        self._thread = None
+        if background and max_interval:
+            self._thread = threading.Thread(target=self._flush_loop, name='FactorResultBufferWriter', daemon=True)
+            self._thread.start()
+
+    def _due(self) -> bool:
+        # max_interval 为 0 / None 时只按条数写入
+        return (bool(self.max_interval) and self._oldest is not None
+                and time.monotonic() - self._oldest >= self.max_interval)
+
+    def add(self, record: dict):
+        """加入一条结果记录，必要时触发 flush"""
+        with self._lock:
+            if not self._buffer:
+                self._oldest = time.monotonic()
+            self._buffer.append(record)
+            should_flush = len(self._buffer) >= self.max_rows or self._due()
+        if should_flush:
+            return self.flush()
+        return []
+
+    def flush_if_due(self):
+        """最早的记录已经等待超过 max_interval 秒时 flush，background=False 时由调用方定期调用"""
+        with self._lock:
+            due = self._due()
+        if due:
+            return self.flush()
+        return []
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.max_interval / 2):
+            try:
+                self.flush_if_due()
+            except Exception as e:
+                self.api.logging.error(f"函数 {self._flush_loop.__name__} 内 定时写入因子结果失败， {e}")
+
+    def flush(self):
+        """写入缓冲区中所有记录，返回本次写入的结果"""
+        with self._lock:
+            records, self._buffer = self._buffer, []
+            self._oldest = None
+        if not records:
+            return []
+        outcomes = self.api.write_node_factor_data_bulk(records, self.chunk_size)
+        with self._lock:
+            self.written += sum(1 for o in outcomes if o['success'])
+            self.failures.extend(o for o in outcomes if not o['success'])
+        return outcomes
+
+    def close(self):
+        """停止后台线程并写入剩余记录"""
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        return self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,5 +1,6 @@
 import os
 import logging
+import tempfile
 from typing import Dict, Any
 
 # 生产环境数据库配置
@@ -50,6 +51,55 @@ CONNECTION_POOL_CONFIG = {
     'pool_pre_ping': True,                                    # 连接前ping检查
     'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 30)),    # 最大溢出连接数
     'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 3600)),  # 连接回收时间(秒)
+    'pool_timeout': float(os.getenv('DB_POOL_TIMEOUT', 30)),  # 取连接等待超时(秒)
+    'pool_ping_interval': float(os.getenv('DB_POOL_PING_INTERVAL', 30)),  # 空闲超过该时间才ping(秒)
+}
+
+# =================================================================
+# 因子元数据缓存配置
+# =================================================================
+
+FACTOR_CACHE_CONFIG = {
+    'enabled': os.getenv('FACTOR_CACHE_ENABLED', 'True').lower() == 'true',  # 是否启用缓存
+    'ttl': float(os.getenv('FACTOR_CACHE_TTL', 300)),        # 缓存有效期(秒)
+    'maxsize': int(os.getenv('FACTOR_CACHE_MAXSIZE', 4096)),  # 最大缓存条目数
+}
+
+# =================================================================
+# 因子结果缓存配置
+# =================================================================
+
+RESULT_CACHE_CONFIG = {
+    'enabled': os.getenv('RESULT_CACHE_ENABLED', 'False').lower() == 'true',  # 是否默认开启
+    'max_bytes': int(os.getenv('RESULT_CACHE_MAX_BYTES', 512 * 1024 ** 2)),    # 内存缓存上限(字节)
+    'spill_dir': os.getenv('RESULT_CACHE_SPILL_DIR'),                          # 本地落盘目录，为空不落盘
+    'spill_max_bytes': int(os.getenv('RESULT_CACHE_SPILL_MAX_BYTES', 4 * 1024 ** 3)),  # 落盘上限(字节)
+}
+
+# =================================================================
+# 原始数据缓存配置
+# =================================================================
+
+RAW_CACHE_CONFIG = {
+    'enabled': os.getenv('RAW_CACHE_ENABLED', 'False').lower() == 'true',  # 是否默认开启
+    # 本机缓存目录，同一台机器上的进程共用，建议放在本地盘或 /dev/shm
+    'dir': os.getenv('RAW_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'factor_raw_cache')),
+    'max_bytes': int(os.getenv('RAW_CACHE_MAX_BYTES', 8 * 1024 ** 3)),  # 目录上限(字节)
+}
+
+# =================================================================
+# 因子库配置
+# =================================================================
+
+FACTOR_LIB_CONFIG = {
+    # factor_framework.so 所在目录，默认是仓库下的 lib，各版本在 lib/{version} 下
+    'lib_dir': os.getenv('FACTOR_LIB_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'lib')),
+    # CMakeLists.txt 所在目录
+    'source_dir': os.getenv('FACTOR_SOURCE_DIR', os.path.dirname(os.path.abspath(__file__))),
+    # 编译目录，每个版本使用 build_dir/{version}
+    'build_dir': os.getenv('FACTOR_BUILD_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'build')),
+    # 为 True 时版本目录不存在直接报错，否则退回到 lib 下的默认库
+    'strict_version': os.getenv('FACTOR_LIB_STRICT_VERSION', 'False').lower() == 'true',
 }
 
 # =================================================================
@@ -1,3 +1,52 @@
-from .cli import add_cmake_factor, node_factor
+import importlib
 
-__all__ = ['add_cmake_factor', 'node_factor']
\ No newline at end of file
+# 公开接口所在的子模块，首次访问时才导入，import factor_cli 不加载 pandas / 数据库
+_EXPORTS = {
+    'add_cmake_factor': 'cli',
+    'add_cmake_factors': 'cli',
+    'node_factor': 'cli',
+    'node_factors': 'cli',
+    'FactorCalculationRunner': 'cli',
+    'enable_result_cache': 'cli',
+    'disable_result_cache': 'cli',
+    'enable_raw_cache': 'cli',
+    'disable_raw_cache': 'cli',
+    'load_raw_data': 'cli',
+    'set_storage': 'cli',
+    'set_trading_calendar': 'cli',
+    'get_trading_days': 'cli',
+    'load_factor_framework': 'framework',
+    'build_factor_libraries': 'framework',
+    'FactorLibraryRegistry': 'framework',
+    'FactorPipeline': 'pipeline',
+    'StreamingFactor': 'streaming',
+    'stream_factor': 'streaming',
+    'factor_lookback': 'streaming',
+    'load_factor_panel': 'panel',
+    'postprocess_factor': 'postprocess',
+    'plan_incremental_update': 'incremental',
+    'incremental_update': 'incremental',
+    'enqueue_factor_jobs': 'queue_worker',
+    'run_queue_worker': 'queue_worker',
+    'plan_version_reuse': 'fingerprint',
+    'alias_unchanged_results': 'fingerprint',
+    'FactorStorage': 'storage',
+    'RemoteStorage': 'storage',
+    'LocalDatasetStorage': 'storage',
+    'RawDataCache': 'raw_cache',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f'{__name__}.{module_name}'), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
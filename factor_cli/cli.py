@@ -1,11 +1,145 @@
+import inspect
 import os
-import subprocess
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING
 
-import pandas as pd
+from env import RESULT_CACHE_CONFIG, RAW_CACHE_CONFIG
+from factor_cli.framework import load_factor_framework, registry
+from factor_cli.instrumentation import StageTimer, NULL_TIMER
 
-from database.mysql_database import GetFactorDataAPI
+if TYPE_CHECKING:
+    import pandas as pd
 
-gt_api = GetFactorDataAPI()
+# 数据库接口与存储在首次使用时才创建，import 本模块不连接数据库、不加载 pandas
+_gt_api = None
+_storage = None
+_trading_calendar = None
+_init_lock = threading.Lock()
+result_cache = None
+raw_cache = None
+
+
+def get_api():
+    """GetFactorDataAPI 实例，首次调用时创建"""
+    global _gt_api
+    if _gt_api is None:
+        with _init_lock:
+            if _gt_api is None:
+                from database.mysql_database import GetFactorDataAPI
+                _gt_api = GetFactorDataAPI()
+    return _gt_api
+
+
+def get_storage():
+    """当前的因子结果存储后端，默认 RemoteStorage"""
+    global _storage
+    if _storage is None:
+        with _init_lock:
+            if _storage is None:
+                from factor_cli.storage import RemoteStorage
+                _storage = RemoteStorage()
+    return _storage
+
+
+def set_storage(factor_storage):
+    """切换因子结果存储后端，例如 LocalDatasetStorage"""
+    global _storage
+    _storage = factor_storage
+    return _storage
+
+
+def set_trading_calendar(calendar):
+    """
+    设置交易日历：交易日列表，或 calendar(start_day, end_day) 返回区间内交易日的函数
+    按日期区间生成任务时只使用交易日，节假日不会成为任务
+    """
+    global _trading_calendar
+    _trading_calendar = calendar
+    return _trading_calendar
+
+
+def get_trading_days(start_day: str, end_day: str, trading_days=None):
+    """
+    区间 [start_day, end_day] 内的交易日 ['YYYYMMDD']，trading_days 为空时使用 set_trading_calendar 设置的日历
+    两者都没有时报错，不用工作日代替交易日
+    """
+    start_day = str(start_day).replace('-', '')
+    end_day = str(end_day).replace('-', '')
+    if trading_days is None:
+        if _trading_calendar is None:
+            raise ValueError("没有交易日历，请先调用 set_trading_calendar 或传入 trading_days")
+        trading_days = (_trading_calendar(start_day, end_day) if callable(_trading_calendar)
+                        else _trading_calendar)
+    days = sorted({str(day).replace('-', '')[:8] for day in trading_days})
+    return [day for day in days if start_day <= day <= end_day]
+
+
+def __getattr__(name):
+    # 兼容 cli.gt_api / cli.storage 的旧写法
+    if name == 'gt_api':
+        return get_api()
+    if name == 'storage':
+        return get_storage()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def enable_result_cache(max_bytes: int = None, spill_dir: str = None):
+    """开启 node_factor 的进程内结果缓存"""
+    from factor_cli.result_cache import FactorResultCache
+
+    global result_cache
+    result_cache = FactorResultCache(
+        max_bytes=max_bytes or RESULT_CACHE_CONFIG['max_bytes'],
+        spill_dir=spill_dir or RESULT_CACHE_CONFIG['spill_dir'],
+        spill_max_bytes=RESULT_CACHE_CONFIG['spill_max_bytes'],
+    )
+    return result_cache
+
+
+def disable_result_cache():
+    """关闭 node_factor 的进程内结果缓存"""
+    global result_cache
+    result_cache = None
+
+
+if RESULT_CACHE_CONFIG['enabled']:
+    enable_result_cache()
+
+
+def enable_raw_cache(cache_dir: str = None, max_bytes: int = None):
+    """开启本机共享的原始数据缓存，同一台机器上的进程共用 cache_dir"""
+    from factor_cli.raw_cache import RawDataCache
+
+    global raw_cache
+    raw_cache = RawDataCache(
+        cache_dir or RAW_CACHE_CONFIG['dir'],
+        max_bytes=max_bytes or RAW_CACHE_CONFIG['max_bytes'],
+    )
+    return raw_cache
+
+
+def disable_raw_cache():
+    """关闭原始数据缓存，已经写入的文件保留"""
+    global raw_cache
+    raw_cache = None
+
+
+if RAW_CACHE_CONFIG['enabled']:
+    enable_raw_cache()
+
+
+def load_raw_data(code: str, day: str, getLS=None) -> 'pd.DataFrame':
+    """
+    读取 (code, day) 的原始数据，开启原始数据缓存时优先读取本机缓存
+    缓存命中返回的 DataFrame 是只读的内存映射，需要修改时先 copy
+    """
+    if getLS is None:
+        from dw_data.fastpai import getLS
+    if raw_cache is None:
+        return getLS.read_ls(code, day)
+    return raw_cache.get_or_load(code, day, getLS.read_ls)
 
 
 def add_cmake_factor(
@@ -14,8 +148,15 @@ def add_cmake_factor(
         factor_type: str,
         submitted_by: str,
         factor_args: dict = None,
-        review_by: str = None
+        review_by: str = None,
+        build: bool = True,
+        sources=None
 ):
+    """
+    编译 lib/{factor_version} 下的因子库并登记因子信息，build=False 时只登记
+    sources 为影响该因子结果的源文件（相对源码目录），登记后结果指纹只随这些文件变化，
+    同一个库里其他因子的修改不会让该因子的历史结果失效
+    """
     factor_info = {
         'factor_name': factor_name,  # 因子名称
         'version': factor_version,  # 因子版本
@@ -28,80 +169,149 @@ def add_cmake_factor(
     if review_by:
         factor_info.update({'review_by': review_by})
 
-    try:
-        # subprocess.run(["./build.sh", factor_version], check=True)
-        print(f"✅ 编译版本 {factor_version} 成功！")
+    if build:
+        try:
+            registry.build(factor_version)
+            print(f"✅ 编译版本 {factor_version} 成功！")
+        except Exception as e:
+            print(f"❌ 编译失败，错误码: {e}")
+            return False
+    if sources:
         try:
-            gt_api.create_factor_info(factor_info)
+            registry.record_sources(factor_version, factor_name, sources)
         except Exception as e:
-            print(f"❌ 因子信息入库失败，错误码: {e}")
+            print(f"❌ 源文件摘要记录失败，错误码: {e}")
+            return False
+    try:
+        get_api().create_factor_info(factor_info)
     except Exception as e:
-        print(f"❌ 编译失败，错误码: {e}")
+        print(f"❌ 因子信息入库失败，错误码: {e}")
+        return False
+    return True
+
+
+def add_cmake_factors(factors, max_workers: int = None):
+    """
+    并发编译多个版本后逐个入库
+    factors: add_cmake_factor 参数组成的 dict 列表，返回 {(factor_name, factor_version): 是否成功}
+    """
+    factors = list(factors)
+    built = registry.build_many([factor['factor_version'] for factor in factors], max_workers=max_workers)
+    results = {}
+    for factor in factors:
+        key = (factor['factor_name'], factor['factor_version'])
+        outcome = built[factor['factor_version']]
+        if isinstance(outcome, Exception):
+            print(f"❌ 编译版本 {factor['factor_version']} 失败，错误码: {outcome}")
+            results[key] = False
+            continue
+        print(f"✅ 编译版本 {factor['factor_version']} 成功！")
+        results[key] = add_cmake_factor(**factor, build=False)
+    return results
+
+
+def _result_fingerprint(factor_name: str, version: str, code: str, day: str):
+    """结果指纹，写入 extra_info 供新版本复用；计算失败不影响结果入库"""
+    from factor_cli.fingerprint import result_fingerprint
+
+    try:
+        return result_fingerprint(factor_name, version, code, day)
+    except Exception as e:
+        print(f"{factor_name} 因子 {version} 版本指纹计算失败，{e}")
+        return None
+
+
+def compute_factor(ff, factor_name: str, df: 'pd.DataFrame', timer=NULL_TIMER) -> 'pd.DataFrame':
+    """用 factor_framework 计算单个因子"""
+    from factor_cli.data_bridge import to_engine_frame, result_to_frame
+
+    factor = ff.create_factor(factor_name)
+    with timer.stage('set_data'):
+        factor.set_data(to_engine_frame(df))
+    factor.set_params([factor_name])
+    with timer.stage('run'):
+        factor.run()
+    with timer.stage('get_result'):
+        result = result_to_frame(factor.get_result())
+    timer.record('input_rows', len(df))
+    timer.record('result_rows', len(result))
+    # 结果 DataFrame 的内存大小，不是写入存储的字节数
+    timer.record('result_mem_bytes', int(result.memory_usage(index=True, deep=True).sum()))
+    return result
 
 
 def node_factor(code: str, day: str, factor_name: str, factor_type: str):
     day = str(day).replace('-', '')
+    storage = get_storage()
     try:
-        from dw_data.fastpai import getAPI, getLS, getOrig, putAPI
+        from dw_data.fastpai import getLS
     except Exception as e:
         print(f"❌ 引用获取数据包失败，检查环境是否安装： {e}")
         raise
 
+    timer = StageTimer()
     try:
-        result = gt_api.get_new_factor_name(factor_name)
+        with timer.stage('version_lookup'):
+            result = get_api().get_new_factor_name(factor_name)
         version = result.get('version')
         print(f"采用 {factor_name} 因子的 {version} 版本计算因子")
     except Exception as e:
         print(f"因子获取失败，{e}")
         raise
-    msg = gt_api.exists_source_code_data(
-            factor_name,
-            version,
-            code,
-            day
-    )
 
-    save_path = f"{factor_type}/{factor_name}/{day}/{code}.parquet"
-    if msg:
+    cache_key = (factor_name, version, code, day)
+    if result_cache is not None:
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    with timer.stage('exists_check'):
+        rows = get_api().get_node_factor_paths(factor_name, version, [code], day, day)
+
+    save_path = storage.path_for(factor_type, factor_name, version, code, day)
+    if rows:
         print(f"因子结果已经存在库中")
         try:
-            return getAPI.get_df(f"122/data2/{save_path}")
+            # 按记录的路径读取，复用旧版本的结果指向旧版本的文件
+            df = storage.read_path(rows[0]['factor_path'], code, day)
+            if result_cache is not None:
+                result_cache.put(cache_key, df)
+            return df
         except Exception as e:
             print(f"读取错误，{e}")
             return None
 
     try:
-        df = getLS.read_ls(code, day)
+        with timer.stage('raw_load'):
+            df = load_raw_data(code, day, getLS)
     except Exception as e:
         print(f"❌ 原始数据获取失败， {e}")
         raise
 
     try:
-        import sys
-        sys.path.append('../lib')
-        import factor_framework as ff
+        ff = load_factor_framework(version)
     except Exception as e:
         print("因子导入失败....")
         raise
     try:
-        factor = ff.create_factor(factor_name)
-        factor.set_data(df)
-        factor.set_params([factor_name])
-        factor.run()
-        result = factor.get_result()
-        df = pd.DataFrame(result)
+        df = compute_factor(ff, factor_name, df, timer)
 
         try:
-            result_status = putAPI.put_parquet(df, f"122/{save_path}", verbose=1)
-            if result_status.get('success', False):
-                gt_api.write_node_factor_data(
+            with timer.stage('upload'):
+                factor_path = storage.write(df, factor_type, factor_name, version, code, day)
+            if factor_path:
+                timer.record('fingerprint', _result_fingerprint(factor_name, version, code, day))
+                get_api().write_node_factor_data(
                     factor_name,
                     version,
                     code,
                     day,
                     factor_type,
-                    save_path
+                    factor_path,
+                    extra_info=timer.to_extra_info()
                 )
+                if result_cache is not None:
+                    result_cache.put(cache_key, df)
                 return df
             else:
                 print(f"数据保存失败")
@@ -114,8 +324,357 @@ def node_factor(code: str, day: str, factor_name: str, factor_type: str):
         raise
 
 
-# class FactorCalculationRunner:
-#     pass
+# 引擎的 run_all 是否接受 n_threads，按 FactorManager 类型缓存，只检测一次
+_RUN_ALL_THREADS_SUPPORT = {}
+
+
+def _supports_run_all_threads(manager) -> bool:
+    manager_type = type(manager)
+    supported = _RUN_ALL_THREADS_SUPPORT.get(manager_type)
+    if supported is None:
+        method = manager.run_all
+        try:
+            parameters = inspect.signature(method).parameters
+            supported = 'n_threads' in parameters or any(
+                parameter.kind is parameter.VAR_KEYWORD for parameter in parameters.values())
+        except (TypeError, ValueError):
+            # pybind11 绑定的函数没有签名信息，从生成的文档 run_all(self: FactorManager, n_threads: int = 1) 判断
+            supported = 'n_threads' in (method.__doc__ or '')
+        _RUN_ALL_THREADS_SUPPORT[manager_type] = supported
+    return supported
+
+
+def run_all(manager, n_threads: int = None):
+    """
+    FactorManager.run_all；n_threads > 1 时使用引擎的多线程 run_all(n_threads=...) 并行计算已添加的因子，
+    引擎不支持该参数时（按类型检测一次）单线程 run_all()，引擎内部抛出的 TypeError 照常向上抛出
+    """
+    if n_threads and n_threads > 1 and _supports_run_all_threads(manager):
+        return manager.run_all(n_threads=n_threads)
+    return manager.run_all()
+
+
+def _split_merged_results(manager, factor_names, merged):
+    """按因子拆分 FactorManager 的合并结果"""
+    from factor_cli.data_bridge import result_to_arrays, result_to_frame
+
+    merged = result_to_arrays(merged)
+    results = {}
+    for name in factor_names:
+        cols = [col for col in manager.get_factor_cols(name) if col in merged]
+        results[name] = result_to_frame({col: merged[col] for col in cols})
+    return results
+
+
+def node_factors(code: str, day: str, factor_names, factor_type: str, n_threads: int = None):
+    """
+    一次加载原始数据，用一个 FactorManager 计算多个因子
+    n_threads > 1 时同一版本的因子在引擎内多线程并行计算
+    返回 {factor_name: DataFrame}，没有审批通过版本的因子不返回
+    """
+    from factor_cli.data_bridge import to_engine_frame
+
+    day = str(day).replace('-', '')
+    factor_names = list(dict.fromkeys(factor_names))
+    storage = get_storage()
+    try:
+        from dw_data.fastpai import getLS
+    except Exception as e:
+        print(f"❌ 引用获取数据包失败，检查环境是否安装： {e}")
+        raise
+
+    timer = StageTimer()
+    with timer.stage('version_lookup'):
+        versions = get_api().get_new_factor_names(factor_names)
+    for name in factor_names:
+        if name not in versions:
+            print(f"{name} 因子没有审批通过的版本，跳过")
+
+    results = {}
+    if result_cache is not None:
+        for name, version in versions.items():
+            cached = result_cache.get((name, version, code, day))
+            if cached is not None:
+                results[name] = cached
+    pending = {name: version for name, version in versions.items() if name not in results}
+
+    # 已经计算过的因子直接读取结果
+    with timer.stage('exists_check'):
+        exists = get_api().get_exists_factor_versions(pending, code, day)
+    for name, factor_path in exists.items():
+        try:
+            df = storage.read_path(factor_path, code, day)
+            if result_cache is not None:
+                result_cache.put((name, pending[name], code, day), df)
+            results[name] = df
+        except Exception as e:
+            print(f"{name} 读取错误，{e}")
+            results[name] = None
+        del pending[name]
+    if not pending:
+        return results
+
+    try:
+        with timer.stage('raw_load'):
+            df = load_raw_data(code, day, getLS)
+    except Exception as e:
+        print(f"❌ 原始数据获取失败， {e}")
+        raise
+
+    # 不同版本来自不同的因子库，同一版本的因子用一个 FactorManager 计算
+    groups = {}
+    for name, version in pending.items():
+        groups.setdefault(version, []).append(name)
+
+    computed = {}
+    for version, names in groups.items():
+        try:
+            ff = load_factor_framework(version)
+        except Exception as e:
+            print("因子导入失败....")
+            raise
+        try:
+            manager = ff.create_manager()
+            manager.add_factors(names)
+            with timer.stage('set_data'):
+                manager.set_data(to_engine_frame(df))
+            manager.set_all_params({name: [name] for name in names})
+            with timer.stage('run'):
+                run_all(manager, n_threads)
+            with timer.stage('get_result'):
+                computed.update(_split_merged_results(manager, names, manager.get_merged_results()))
+        except Exception as e:
+            print(f"{names} 计算失败， {e}")
+            raise
+    timer.record('input_rows', len(df))
+    timer.record('group_size', len(pending))
+
+    records = []
+    shared_info = timer.to_extra_info()
+    for name, result_df in computed.items():
+        upload_start = time.perf_counter()
+        try:
+            factor_path = storage.write(result_df, factor_type, name, pending[name], code, day)
+        except Exception as e:
+            print(f"因子结果保存到{storage.path_for(factor_type, name, pending[name], code, day)}失败，{e}")
+            results[name] = None
+            continue
+        if not factor_path:
+            print(f"{name} 数据保存失败")
+            results[name] = None
+            continue
+        records.append({
+            'factor_name': name,
+            'version': pending[name],
+            'code': code,
+            'day': day,
+            'data_type': factor_type,
+            'factor_path': factor_path,
+            # 加载与计算阶段为整组因子共享的耗时
+            'extra_info': dict(
+                shared_info,
+                stages_ms=dict(shared_info['stages_ms'], upload=round((time.perf_counter() - upload_start) * 1000, 3)),
+                result_rows=len(result_df),
+                result_mem_bytes=int(result_df.memory_usage(index=True, deep=True).sum()),
+                fingerprint=_result_fingerprint(name, pending[name], code, day),
+            ),
+        })
+        results[name] = result_df
+
+    for outcome, record in zip(get_api().write_node_factor_data_bulk(records), records):
+        if outcome['success'] and result_cache is not None:
+            result_cache.put((record['factor_name'], record['version'], code, day), results[record['factor_name']])
+    return results
+
+
+_worker_ff = None
+
+
+def _runner_worker_init(version: str = None):
+    """进程池 worker 初始化：每个 worker 只导入一次对应版本的 factor_framework"""
+    global _worker_ff
+    # fork 出来的子进程不能复用父进程的数据库连接
+    get_api().db_manager.reset()
+    _worker_ff = load_factor_framework(version)
+
+
+def _worker_compute(factor_name: str, df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """在进程池 worker 内计算单个因子"""
+    return compute_factor(_worker_ff, factor_name, df)
+
+
+def _runner_worker_task(code: str, day: str, factor_name: str, factor_type: str, version: str):
+    """进程池 worker 内计算并上传单个 (code, day)"""
+    return _compute_task(_worker_ff, code, day, factor_name, factor_type, version)
+
+
+def _compute_task(ff, code: str, day: str, factor_name: str, factor_type: str, version: str):
+    """计算并上传单个 (code, day)，异常以结果形式返回而不是抛出"""
+    from dw_data.fastpai import getLS
+
+    storage = get_storage()
+    timer = StageTimer()
+    try:
+        with timer.stage('raw_load'):
+            df = load_raw_data(code, day, getLS)
+        df = compute_factor(ff, factor_name, df, timer)
+        with timer.stage('upload'):
+            factor_path = storage.write(df, factor_type, factor_name, version, code, day)
+        if not factor_path:
+            return {'code': code, 'day': day, 'status': 'failed', 'error': '数据保存失败'}
+        timer.record('fingerprint', _result_fingerprint(factor_name, version, code, day))
+        # 结果记录交给主进程批量入库
+        record = {
+            'factor_name': factor_name,
+            'version': version,
+            'code': code,
+            'day': day,
+            'data_type': factor_type,
+            'factor_path': factor_path,
+            'extra_info': timer.to_extra_info(),
+        }
+        return {'code': code, 'day': day, 'status': 'success', 'error': None, 'record': record}
+    except Exception as e:
+        return {'code': code, 'day': day, 'status': 'failed', 'error': repr(e)}
+
+
+class FactorCalculationRunner:
+    """
+    批量截面计算：一个因子在多个 code x 多个交易日上的计算
+    executor='process' 使用进程池，每个 worker 各自导入因子库；
+    executor='thread' 在当前进程内用线程池计算，因子库只导入一次、原始数据缓存等进程内状态共享，
+    需要因子库在 run 期间释放 GIL 才能用满多核（见基准测试 threads 部分）
+    """
+
+    def __init__(self, factor_name: str, factor_type: str, max_workers: int = None,
+                 progress_callback=None, write_batch_size: int = 500, executor: str = 'process'):
+        if executor not in ('process', 'thread'):
+            raise ValueError(f"executor 只能是 process 或 thread，实际是 {executor}")
+        self.factor_name = factor_name
+        self.factor_type = factor_type
+        self.executor = executor
+        self.max_workers = max_workers or os.cpu_count()
+        self.write_batch_size = write_batch_size
+        self.progress_callback = progress_callback
+        self.version = None
+        self.failures = []
+
+    def _resolve_version(self):
+        """只查询一次审批通过的最新版本"""
+        result = get_api().get_new_factor_name(self.factor_name)
+        if not result:
+            raise ValueError(f"{self.factor_name} 因子没有审批通过的版本")
+        self.version = result.get('version')
+        print(f"采用 {self.factor_name} 因子的 {self.version} 版本批量计算因子")
+        return self.version
+
+    def _pending_pairs(self, codes, days):
+        """过滤掉已经计算完成的 (code, day)"""
+        return get_api().get_missing_node_factor_data(self.factor_name, self.version, codes, days)
+
+    def run(self, codes, start_day: str, end_day: str = None, trading_days=None):
+        """
+        按日期区间批量计算，逐条产出每个 (code, day) 的结果
+        区间内的交易日取自 trading_days，为空时使用 set_trading_calendar 设置的交易日历
+        """
+        days = get_trading_days(start_day, end_day or start_day, trading_days)
+        yield from self.run_days(codes, days)
+
+    def run_days(self, codes, days):
+        """按指定交易日列表批量计算，逐条产出每个 (code, day) 的结果"""
+        days = [str(day).replace('-', '') for day in days]
+        codes = list(codes)
+        self._resolve_version()
+        pairs = self._pending_pairs(codes, days)
+        print(f"共 {len(codes) * len(days)} 个任务，待计算 {len(pairs)} 个")
+        yield from self._execute(pairs)
+
+    def run_pairs(self, pairs, version: str = None):
+        """直接计算给定的 (code, day) 列表，不做存在性过滤，用于增量更新和失败重算"""
+        if version is None:
+            self._resolve_version()
+        else:
+            self.version = version
+        yield from self._execute([(code, str(day).replace('-', '')) for code, day in pairs])
+
+    def _record_failures(self):
+        """计算失败的 (code, day) 记为 data_status = 2，增量更新时重算"""
+        storage = get_storage()
+        records = [
+            {
+                'factor_name': self.factor_name,
+                'version': self.version,
+                'code': failure['code'],
+                'day': failure['day'],
+                'data_type': self.factor_type,
+                'factor_path': storage.path_for(self.factor_type, self.factor_name, self.version,
+                                                failure['code'], failure['day']),
+                'error': failure['error'],
+            }
+            for failure in self.failures
+        ]
+        try:
+            get_api().write_node_factor_failures(records)
+        except Exception as e:
+            print(f"{self.factor_name} 因子失败结果记录失败，{e}")
+
+    def _execute(self, pairs):
+        total = len(pairs)
+        if not pairs:
+            return
+
+        self.failures = []
+        from database.mysql_database import FactorResultBufferWriter
+
+        if self.executor == 'thread':
+            # 线程共用当前进程导入的因子库
+            pool = ThreadPoolExecutor(max_workers=self.max_workers)
+            task, task_args = _compute_task, (load_factor_framework(self.version),)
+        else:
+            pool = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_runner_worker_init,
+                                       initargs=(self.version,))
+            task, task_args = _runner_worker_task, ()
+        writer = FactorResultBufferWriter(get_api(), max_rows=self.write_batch_size)
+        # 调用方提前结束（break / close）或异常退出时，也要把已缓冲的结果入库、记录已知的失败
+        try:
+            with pool as executor:
+                futures = {}
+                try:
+                    futures = {
+                        executor.submit(task, *task_args, code, day, self.factor_name, self.factor_type,
+                                        self.version): (code, day)
+                        for code, day in pairs
+                    }
+                    for done, future in enumerate(as_completed(futures), 1):
+                        try:
+                            result = future.result()
+                        except Exception as e:
+                            # worker 进程异常退出
+                            code, day = futures[future]
+                            result = {'code': code, 'day': day, 'status': 'failed', 'error': repr(e)}
+                        record = result.pop('record', None)
+                        if record:
+                            writer.add(record)
+                        if result['status'] != 'success':
+                            self.failures.append(result)
+                        if self.progress_callback:
+                            self.progress_callback(done, total, result)
+                        yield result
+                finally:
+                    # 还没开始的任务不再执行
+                    for future in futures:
+                        future.cancel()
+        finally:
+            try:
+                writer.close()
+            finally:
+                # 入库失败的记录同样计为失败
+                for outcome in writer.failures:
+                    self.failures.append({'code': outcome['code'], 'day': outcome['day'],
+                                          'status': 'failed', 'error': outcome['error']})
+                self._record_failures()
+
+        print(f"✅ 批量计算结束，成功 {total - len(self.failures)} 个，失败 {len(self.failures)} 个")
 
 
 if __name__ == '__main__':
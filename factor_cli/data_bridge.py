@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+
+def _as_engine_array(values) -> np.ndarray:
+    """转换为 C 连续数组，本身连续时不拷贝；保留原 dtype，避免整型时间戳转 float 丢精度"""
+    return np.ascontiguousarray(values)
+
+
+def to_engine_columns(df: pd.DataFrame, columns=None) -> dict:
+    """把 DataFrame 拆成 {列名: 连续数组}"""
+    if columns is None:
+        columns = df.columns
+    return {col: _as_engine_array(df[col].to_numpy(copy=False)) for col in columns}
+
+
+def to_engine_frame(df: pd.DataFrame, columns=None) -> pd.DataFrame:
+    """
+    生成传给 set_data 的 DataFrame
+    每列单独一个连续数组，原数据本身按列存储时与其共享内存
+    """
+    arrays = to_engine_columns(df, columns)
+    return pd.DataFrame(arrays, index=df.index, copy=False)
+
+
+def result_to_arrays(result) -> dict:
+    """把 get_result 的结果转换为 {列名: numpy 数组}，已经是数组时不拷贝"""
+    if isinstance(result, pd.DataFrame):
+        return {col: result[col].to_numpy(copy=False) for col in result.columns}
+    return {col: np.asarray(values) for col, values in dict(result).items()}
+
+
+def result_to_frame(result) -> pd.DataFrame:
+    """把 get_result 的结果包装成 DataFrame，不合并成二维块，避免拷贝"""
+    if isinstance(result, pd.DataFrame):
+        return result
+    return pd.DataFrame(result_to_arrays(result), copy=False)
+
+
+def result_to_arrow(result):
+    """把 get_result 的结果转换为 pyarrow.Table，无空值的数值列零拷贝"""
+    import pyarrow as pa
+
+    arrays = result_to_arrays(result)
+    return pa.table({col: pa.array(values) for col, values in arrays.items()})
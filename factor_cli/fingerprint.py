@@ -0,0 +1,128 @@
+import hashlib
+import json
+
+from factor_cli import cli
+from factor_cli.framework import registry
+
+# 原始数据的来源，与 code / day 一起组成输入标识；数据源变化时修改这里让历史指纹全部失效
+INPUT_SOURCE = 'getLS.read_ls'
+
+
+def args_fingerprint(factor_args) -> str:
+    """factor_args 的摘要，键顺序不影响结果"""
+    if isinstance(factor_args, (str, bytes)):
+        factor_args = json.loads(factor_args)
+    text = json.dumps(factor_args or {}, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def input_identity(code: str, day: str) -> str:
+    """原始数据的标识，历史 (code, day) 的数据视为不变"""
+    return f"{INPUT_SOURCE}:{code}:{str(day).replace('-', '')}"
+
+
+def _key(code_fp: str, args_fp: str, input_id: str) -> str:
+    return hashlib.sha256(f"{code_fp}|{args_fp}|{input_id}".encode('utf-8')).hexdigest()
+
+
+def version_fingerprint(factor_name: str, version: str) -> dict:
+    """版本级别的指纹：代码 + 参数，与具体的 (code, day) 无关"""
+    return {
+        'code': registry.code_fingerprint(factor_name, version),
+        'args': args_fingerprint(cli.get_api().get_factor_args(factor_name, version)),
+    }
+
+
+def result_fingerprint(factor_name: str, version: str, code: str, day: str, base: dict = None) -> dict:
+    """
+    单个 (code, day) 结果的指纹，随结果写入 factor_result.extra_info['fingerprint']
+    key 相同的两个结果可以互相替代
+    """
+    base = base or version_fingerprint(factor_name, version)
+    input_id = input_identity(code, day)
+    return dict(base, input=input_id, key=_key(base['code'], base['args'], input_id))
+
+
+def _base_version(factor_name: str, version: str, base_version: str = None) -> str:
+    if base_version is not None:
+        return base_version
+    result = cli.get_api().get_new_factor_name(factor_name)
+    if not result or result.get('version') == version:
+        raise ValueError(f"{factor_name} 因子没有可以对比的已审批版本，请指定 base_version")
+    return result.get('version')
+
+
+def plan_version_reuse(factor_name: str, version: str, base_version: str = None):
+    """
+    对比新版本与旧版本（默认最新审批通过版本）的指纹，统计版本升级实际失效的结果
+    返回 (报告, 可以复用的 {(code, day): 旧结果})
+    """
+    base_version = _base_version(factor_name, version, base_version)
+    base = version_fingerprint(factor_name, version)
+    existing = cli.get_api().get_node_factor_fingerprints(factor_name, base_version)
+    done = cli.get_api().get_node_factor_fingerprints(factor_name, version)
+
+    reusable, invalidated, unknown = {}, [], []
+    for (code, day), entry in existing.items():
+        old = entry['fingerprint']
+        if not isinstance(old, dict) or 'key' not in old:
+            unknown.append((code, day))
+        elif old['key'] == result_fingerprint(factor_name, version, code, day, base)['key']:
+            if (code, day) not in done:
+                reusable[(code, day)] = entry
+        else:
+            invalidated.append((code, day))
+
+    recorded = [entry['fingerprint'] for entry in existing.values() if isinstance(entry['fingerprint'], dict)]
+    old_codes = {fingerprint.get('code') for fingerprint in recorded}
+    old_args = {fingerprint.get('args') for fingerprint in recorded}
+    report = {
+        'factor_name': factor_name,
+        'version': version,
+        'base_version': base_version,
+        'code_changed': bool(old_codes) and base['code'] not in old_codes,
+        'args_changed': bool(old_args) and base['args'] not in old_args,
+        'total': len(existing),
+        'already_present': len(done),
+        'reusable': len(reusable),
+        'invalidated': len(invalidated),
+        # 旧结果没有记录指纹，只能重算
+        'unknown': len(unknown),
+        'invalidated_pairs': sorted(invalidated + unknown, key=lambda pair: (pair[1], pair[0])),
+    }
+    return report, reusable
+
+
+def alias_unchanged_results(factor_name: str, version: str, base_version: str = None,
+                            dry_run: bool = False) -> dict:
+    """
+    新版本中指纹与旧版本相同的 (code, day) 直接指向旧的结果文件，不重新计算
+    dry_run=True 只返回失效报告；报告中的 invalidated_pairs 可以交给 FactorCalculationRunner.run_pairs 重算
+    """
+    report, reusable = plan_version_reuse(factor_name, version, base_version)
+    print(f"{factor_name} 因子 {report['base_version']} -> {version}：共 {report['total']} 个结果，"
+          f"可复用 {report['reusable']} 个，失效 {report['invalidated']} 个，无指纹 {report['unknown']} 个")
+    if dry_run or not reusable:
+        report['aliased'] = 0
+        return report
+
+    base = version_fingerprint(factor_name, version)
+    records = [
+        {
+            'factor_name': factor_name,
+            'version': version,
+            'code': code,
+            'day': day,
+            'data_type': entry['data_type'],
+            'factor_path': entry['factor_path'],
+            'extra_info': {
+                'fingerprint': result_fingerprint(factor_name, version, code, day, base),
+                'aliased_from': report['base_version'],
+            },
+        }
+        for (code, day), entry in reusable.items()
+    ]
+    outcomes = cli.get_api().write_node_factor_data_bulk(records)
+    report['aliased'] = sum(1 for outcome in outcomes if outcome['success'])
+    print(f"✅ {factor_name} 因子 {version} 版本复用 {report['aliased']} 个结果")
+    return report
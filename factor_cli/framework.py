@@ -0,0 +1,241 @@
+import glob
+import hashlib
+import importlib
+import importlib.machinery
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from env import FACTOR_LIB_CONFIG
+
+MODULE_NAME = 'factor_framework'
+
+
+class FactorLibraryError(ImportError):
+    """因子库编译或加载失败"""
+
+
+def find_factor_framework(lib_dir: str = None):
+    """在 lib 目录下查找 factor_framework 扩展模块，找不到返回 None"""
+    lib_dir = lib_dir or FACTOR_LIB_CONFIG['lib_dir']
+    # 兼容 factor_framework.so 与 factor_framework.cpython-39-x86_64-linux-gnu.so 两种命名
+    candidates = sorted(glob.glob(os.path.join(lib_dir, f'{MODULE_NAME}*.so')))
+    return candidates[0] if candidates else None
+
+
+_digests = {}
+_digest_lock = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """文件内容的 sha256，按 (路径, 大小, 修改时间) 缓存"""
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    with _digest_lock:
+        digest = _digests.get(key)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(block)
+        digest = sha.hexdigest()
+        with _digest_lock:
+            _digests[key] = digest
+    return digest
+
+
+def _check_version(version: str):
+    if not version or os.sep in version or version in ('.', '..'):
+        raise ValueError(f"非法的因子库版本 {version!r}")
+
+
+class FactorLibraryRegistry:
+    """
+    按版本管理因子库：lib/{version}/factor_framework.so
+    编译：每个版本独立的 cmake 构建目录，不同版本可以并发编译
+    加载：每个版本只加载一次，多个版本可以同时常驻同一进程
+
+    注意：pybind11 默认把 C++ 类型注册到进程全局，不同版本导出同名类型时第二个版本会导入失败
+    （generic_type ... already registered），这种情况下需要在 C++ 侧使用 py::module_local()，
+    或者按版本分进程计算（FactorCalculationRunner / FactorPipeline 的 worker 只加载一个版本）
+    """
+
+    def __init__(self, lib_dir: str = None, source_dir: str = None, build_dir: str = None,
+                 strict_version: bool = None):
+        self.lib_dir = lib_dir or FACTOR_LIB_CONFIG['lib_dir']
+        self.source_dir = source_dir or FACTOR_LIB_CONFIG['source_dir']
+        self.build_dir = build_dir or FACTOR_LIB_CONFIG['build_dir']
+        self.strict_version = FACTOR_LIB_CONFIG['strict_version'] if strict_version is None else strict_version
+        self._modules = {}
+        self._lock = threading.Lock()
+        self._version_locks = {}
+
+    def _version_lock(self, version: str) -> threading.Lock:
+        with self._lock:
+            return self._version_locks.setdefault(version, threading.Lock())
+
+    def library_path(self, version: str = None):
+        """版本对应的 .so 路径；版本目录不存在且非严格模式时使用 lib 下的默认库"""
+        if version is not None:
+            _check_version(version)
+            path = find_factor_framework(os.path.join(self.lib_dir, version))
+            if path is not None or self.strict_version:
+                return path
+        return find_factor_framework(self.lib_dir)
+
+    def versions(self):
+        """lib 下已经编译好的版本"""
+        if not os.path.isdir(self.lib_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.lib_dir)
+            if find_factor_framework(os.path.join(self.lib_dir, name)) is not None
+        )
+
+    def build(self, version: str, jobs: int = None):
+        """编译单个版本，输出到 lib/{version}，返回 .so 路径"""
+        _check_version(version)
+        build_dir = os.path.join(self.build_dir, version)
+        jobs = str(jobs or os.cpu_count())
+        with self._version_lock(version):
+            try:
+                subprocess.run(['cmake', '-S', self.source_dir, '-B', build_dir, f'-DVERSION={version}'],
+                               check=True, capture_output=True, text=True)
+                subprocess.run(['cmake', '--build', build_dir, '-j', jobs],
+                               check=True, capture_output=True, text=True)
+            except subprocess.CalledProcessError as e:
+                raise FactorLibraryError(f"编译版本 {version} 失败：{e.stderr or e.stdout}") from e
+            except FileNotFoundError as e:
+                raise FactorLibraryError(f"编译版本 {version} 失败，未找到 cmake：{e}") from e
+        path = find_factor_framework(os.path.join(self.lib_dir, version))
+        if path is None:
+            raise FactorLibraryError(f"编译版本 {version} 后没有在 {self.lib_dir}/{version} 找到 {MODULE_NAME}")
+        return path
+
+    def build_many(self, versions, max_workers: int = None):
+        """并发编译多个版本，返回 {version: .so 路径 或 异常}"""
+        versions = list(dict.fromkeys(versions))
+        if not versions:
+            return {}
+        max_workers = max_workers or min(len(versions), os.cpu_count())
+        # 每个版本的 make 再分到的并行数
+        jobs = max(1, os.cpu_count() // max_workers)
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.build, version, jobs): version for version in versions}
+            for future, version in futures.items():
+                try:
+                    results[version] = future.result()
+                except Exception as e:
+                    results[version] = e
+        return results
+
+    def _import(self, path: str, version: str):
+        if version is None and MODULE_NAME in sys.modules:
+            return sys.modules[MODULE_NAME]
+        # 扩展模块按名字最后一段查找 PyInit_factor_framework，版本号放在前缀里区分不同的模块
+        name = MODULE_NAME if version is None else f"_factor_lib_{len(self._modules)}.{MODULE_NAME}"
+        loader = importlib.machinery.ExtensionFileLoader(name, path)
+        spec = importlib.util.spec_from_file_location(name, path, loader=loader)
+        module = importlib.util.module_from_spec(spec)
+        if version is None:
+            sys.modules[MODULE_NAME] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception as e:
+            if version is None:
+                del sys.modules[MODULE_NAME]
+            if 'already registered' in str(e):
+                raise FactorLibraryError(
+                    f"因子库 {path} 与已加载的版本注册了同名 C++ 类型，请按版本分进程计算：{e}") from e
+            raise
+        return module
+
+    def load(self, version: str = None):
+        """加载并缓存版本对应的因子库，version 为 None 时加载默认库"""
+        key = version
+        module = self._modules.get(key)
+        if module is not None:
+            return module
+        with self._version_lock(str(key)):
+            module = self._modules.get(key)
+            if module is not None:
+                return module
+            path = self.library_path(version)
+            if path is None:
+                if version is None:
+                    # 没有编译产物时使用 sys.path 上已安装的模块
+                    module = importlib.import_module(MODULE_NAME)
+                else:
+                    raise FactorLibraryError(f"没有找到版本 {version} 的因子库，请先编译")
+            else:
+                # 同一个 .so 文件只导入一次，非严格模式下缺失的版本与默认库共用模块
+                module = next((m for m in self._modules.values() if getattr(m, '__file__', None) == path), None)
+                if module is None:
+                    module = self._import(path, version if path != self.library_path() else None)
+            self._modules[key] = module
+            return module
+
+    def record_sources(self, version: str, factor_name: str, sources):
+        """
+        记录因子对应的源文件摘要到 lib/{version}/sources.json
+        sources 为相对 source_dir 的路径，只列出影响该因子结果的文件（因子 .cpp 与其依赖的公共代码）
+        """
+        _check_version(version)
+        sha = hashlib.sha256()
+        for source in sorted(sources):
+            sha.update(source.encode('utf-8'))
+            sha.update(file_digest(os.path.join(self.source_dir, source)).encode('utf-8'))
+        path = os.path.join(self.lib_dir, version, 'sources.json')
+        with self._version_lock(version):
+            recorded = {}
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    recorded = json.load(f)
+            recorded[factor_name] = sha.hexdigest()
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+                json.dump(recorded, f, ensure_ascii=False, indent=2)
+            os.replace(f"{path}.tmp", path)
+        return recorded[factor_name]
+
+    def code_fingerprint(self, factor_name: str, version: str = None) -> str:
+        """
+        因子代码的指纹：登记过源文件时用源文件摘要（只随该因子的代码变化），
+        否则用版本对应 .so 的摘要（同一个库里任何因子变化都会改变）
+        """
+        if version is not None:
+            _check_version(version)
+            path = os.path.join(self.lib_dir, version, 'sources.json')
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    digest = json.load(f).get(factor_name)
+                if digest:
+                    return f"src:{digest}"
+        path = self.library_path(version)
+        if path is None:
+            raise FactorLibraryError(f"没有找到版本 {version} 的因子库，无法计算指纹")
+        return f"lib:{file_digest(path)}"
+
+    def loaded_versions(self):
+        return [key for key in self._modules if key is not None]
+
+
+registry = FactorLibraryRegistry()
+
+
+def load_factor_framework(version: str = None):
+    """
+    导入 C++ 因子框架，每个进程每个版本只导入一次
+    version 对应 lib/{version} 下的编译产物；不传时加载 lib 下的默认库
+    """
+    return registry.load(version)
+
+
+def build_factor_libraries(versions, max_workers: int = None):
+    """并发编译多个版本的因子库，返回 {version: .so 路径 或 异常}"""
+    return registry.build_many(versions, max_workers=max_workers)
@@ -0,0 +1,65 @@
+import datetime
+
+from factor_cli import cli
+
+
+def plan_incremental_update(factor_name: str, codes, trading_days=None, version: str = None,
+                            per_code: bool = True, start_day: str = None, end_day: str = None):
+    """
+    根据 factor_result 的水位生成增量计算计划
+    per_code=True 按每个 code 自己的最新日期，False 按全局最新日期；
+    没有任何历史的 code 从 start_day 开始（为空则跳过这些 code）。
+    trading_days 为空时使用 set_trading_calendar 设置的交易日历，两者都没有时报错。
+    返回 (version, 新交易日的 [(code, day)], 需要重算的失败 [(code, day)])
+    """
+    if version is None:
+        result = cli.get_api().get_new_factor_name(factor_name)
+        if not result:
+            raise ValueError(f"{factor_name} 因子没有审批通过的版本")
+        version = result.get('version')
+
+    codes = list(dict.fromkeys(codes))
+    watermarks = cli.get_api().get_factor_watermarks(factor_name, version)
+    if trading_days is None:
+        # 按交易日历取日期，不能用工作日代替，否则节假日每次都会被当作缺失的任务
+        end_day = end_day or datetime.date.today().strftime('%Y%m%d')
+        first = start_day or min(watermarks.values(), default=end_day)
+        trading_days = cli.get_trading_days(first, end_day)
+    days = sorted({str(day).replace('-', '') for day in trading_days})
+    start_day = str(start_day).replace('-', '') if start_day else None
+    global_mark = max(watermarks.values(), default=None)
+
+    new_pairs = []
+    for code in codes:
+        mark = watermarks.get(code) if per_code else global_mark
+        if mark is None:
+            if start_day is None:
+                continue
+            new_pairs.extend((code, day) for day in days if day >= start_day)
+        else:
+            new_pairs.extend((code, day) for day in days if day > mark)
+
+    code_set = set(codes)
+    retries = [pair for pair in cli.get_api().get_failed_node_factor_data(factor_name, version)
+               if pair[0] in code_set]
+    return version, new_pairs, retries
+
+
+def incremental_update(factor_name: str, factor_type: str, codes, trading_days=None,
+                       per_code: bool = True, start_day: str = None, end_day: str = None,
+                       dry_run: bool = False, max_workers: int = None):
+    """
+    增量更新：只计算水位之后的新交易日，并重算 data_status = 2 的失败结果
+    dry_run=True 只打印计划的任务量，返回计划的 (code, day) 列表
+    """
+    version, new_pairs, retries = plan_incremental_update(
+        factor_name, codes, trading_days, per_code=per_code, start_day=start_day, end_day=end_day
+    )
+    pairs = list(dict.fromkeys(new_pairs + retries))
+    print(f"{factor_name} 因子 {version} 版本增量计划：新交易日 {len(new_pairs)} 个，失败重算 {len(retries)} 个，"
+          f"共 {len(pairs)} 个任务")
+    if dry_run:
+        return pairs
+
+    runner = cli.FactorCalculationRunner(factor_name, factor_type, max_workers=max_workers)
+    return list(runner.run_pairs(pairs, version=version))
@@ -0,0 +1,80 @@
+import os
+import time
+from contextlib import contextmanager
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):  # Windows 没有 sysconf
+    _PAGE_SIZE = None
+
+
+def current_rss_bytes():
+    """当前进程此刻的常驻内存（字节），读取 /proc/self/statm，平台不支持时返回 None"""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class StageTimer:
+    """
+    node_factor 各阶段耗时与资源统计，结果随结果行一起写入 factor_result.extra_info
+    阶段名：version_lookup, exists_check, raw_load, set_data, run, get_result, upload
+    入库本身的耗时在写入时还未知，由 GetFactorDataAPI 的日志记录
+    内存记录任务结束时的 rss，以及各阶段结束时采样到的最大 rss 相对任务开始时的增量 rss_delta；
+    ru_maxrss 是进程级的历史峰值，长驻 worker 中不能反映单个任务
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.metrics = {}
+        self._start = time.perf_counter()
+        self._rss_start = current_rss_bytes()
+        self._rss_max = self._rss_start
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + (time.perf_counter() - start) * 1000
+            self._sample_rss()
+
+    def _sample_rss(self):
+        rss = current_rss_bytes()
+        if rss is not None and (self._rss_max is None or rss > self._rss_max):
+            self._rss_max = rss
+        return rss
+
+    def record(self, name: str, value):
+        self.metrics[name] = value
+
+    def to_extra_info(self) -> dict:
+        """stage 单位毫秒，rss / rss_delta 单位字节"""
+        rss = self._sample_rss()
+        info = {
+            'stages_ms': {name: round(value, 3) for name, value in self.stages.items()},
+            'total_ms': round((time.perf_counter() - self._start) * 1000, 3),
+            'rss': rss,
+            'rss_delta': None if rss is None or self._rss_start is None else self._rss_max - self._rss_start,
+        }
+        info.update(self.metrics)
+        return info
+
+
+class _NullTimer:
+    """不统计时使用的空实现"""
+
+    @contextmanager
+    def stage(self, name: str):
+        yield
+
+    def record(self, name: str, value):
+        pass
+
+
+NULL_TIMER = _NullTimer()
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from factor_cli import cli
+
+
+def _column_dtype(dtypes, float32: bool):
+    """各 (code, day) 结果中同一列的 dtype 合并为输出列的 dtype，只有浮点列按 float32 降精度"""
+    if any(not isinstance(dtype, np.dtype) for dtype in dtypes):
+        # pandas 扩展类型（带时区的时间、可空整数等）各部分一致时保留，否则用 object
+        return dtypes[0] if all(dtype == dtypes[0] for dtype in dtypes) else np.dtype(object)
+    try:
+        dtype = np.result_type(*dtypes)
+    except TypeError:
+        return np.dtype(object)
+    if dtype.kind in 'OUS':
+        return np.dtype(object)
+    if float32 and dtype.kind == 'f':
+        return np.dtype(np.float32)
+    return dtype
+
+
+class _ColumnBuffer:
+    """
+    预分配的一列，保留原始 dtype（整数、布尔、时间不经过 float）
+    只有部分 (code, day) 有这一列时，缺失位置填 NaN / NaT / None，整数和布尔用可空类型 Int64 / boolean
+    """
+
+    def __init__(self, dtype, total: int, partial: bool):
+        self.dtype = dtype
+        self.mask = None
+        if not isinstance(dtype, np.dtype):
+            self.values = np.full(total, None, dtype=object)
+        elif dtype.kind in 'iub' and partial:
+            self.values = np.zeros(total, dtype=dtype)
+            self.mask = np.ones(total, dtype=bool)
+        elif dtype.kind in 'fc':
+            self.values = np.full(total, np.nan, dtype=dtype)
+        elif dtype.kind in 'mM':
+            self.values = np.full(total, np.datetime64('NaT'), dtype=dtype)
+        elif dtype.kind == 'O':
+            self.values = np.full(total, None, dtype=object)
+        else:
+            self.values = np.empty(total, dtype=dtype)
+
+    def put(self, start: int, end: int, series: pd.Series):
+        if isinstance(self.dtype, np.dtype):
+            self.values[start:end] = series.to_numpy(dtype=self.dtype)
+        else:
+            self.values[start:end] = series.astype(object).to_numpy()
+        if self.mask is not None:
+            self.mask[start:end] = False
+
+    def finish(self):
+        if not isinstance(self.dtype, np.dtype):
+            return pd.array(self.values, dtype=self.dtype)
+        if self.mask is None:
+            return self.values
+        if self.dtype.kind == 'b':
+            return pd.arrays.BooleanArray(self.values, self.mask)
+        return pd.arrays.IntegerArray(self.values, self.mask)
+
+
+def _assemble(parts, codes, float32: bool) -> pd.DataFrame:
+    """把 [(code, day, df)] 拼成一个预分配的长表，避免循环 append"""
+    parts = [(code, day, df) for code, day, df in parts if df is not None and len(df)]
+    if not parts:
+        return pd.DataFrame(columns=['code', 'day'])
+    categories = pd.Index(list(dict.fromkeys(codes)))
+    # 按 (day, code) 排序，结果与传入的 codes 顺序对齐
+    parts.sort(key=lambda part: (part[1], categories.get_loc(part[0])))
+    value_cols = list(dict.fromkeys(col for _, _, df in parts for col in df.columns))
+    total = sum(len(df) for _, _, df in parts)
+
+    code_idx = np.empty(total, dtype=np.int32)
+    day_values = np.empty(total, dtype='datetime64[ns]')
+    columns = {}
+    for col in value_cols:
+        dtypes = [df[col].dtype for _, _, df in parts if col in df.columns]
+        columns[col] = _ColumnBuffer(_column_dtype(dtypes, float32), total, partial=len(dtypes) < len(parts))
+
+    offset = 0
+    for code, day, df in parts:
+        end = offset + len(df)
+        code_idx[offset:end] = categories.get_loc(code)
+        day_values[offset:end] = np.datetime64(pd.Timestamp(day))
+        for col in df.columns:
+            columns[col].put(offset, end, df[col])
+        offset = end
+
+    frame = {
+        'code': pd.Categorical.from_codes(code_idx, categories=categories),
+        'day': day_values,
+    }
+    frame.update({col: buffer.finish() for col, buffer in columns.items()})
+    return pd.DataFrame(frame, copy=False)
+
+
+def load_factor_panel(factor_name: str, codes, start: str, end: str, version: str = None,
+                      float32: bool = False, max_workers: int = 16, storage=None) -> pd.DataFrame:
+    """
+    只读加载一个因子在多个 code、一段日期上的结果，返回长表 [code, day, 因子列...]
+    缺失的 (code, day) 不会触发计算；code 为 categorical，各列保留原始 dtype，float32=True 时浮点列用 float32
+    """
+    storage = storage or cli.get_storage()
+    if version is None:
+        result = cli.get_api().get_new_factor_name(factor_name)
+        if not result:
+            raise ValueError(f"{factor_name} 因子没有审批通过的版本")
+        version = result.get('version')
+
+    codes = list(dict.fromkeys(codes))
+    rows = cli.get_api().get_node_factor_paths(factor_name, version, codes, start, end)
+    if not rows:
+        return _assemble([], codes, float32)
+
+    # 本地数据集按路径分组扫描，远程截面文件只下载一次，见各存储的 read_paths
+    items = [(row['factor_path'], row['code'], row['calculated_date'].strftime('%Y%m%d')) for row in rows]
+    return _assemble(storage.read_paths(items, max_workers=max_workers), codes, float32)
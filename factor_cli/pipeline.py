@@ -0,0 +1,179 @@
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from database.mysql_database import FactorResultBufferWriter
+from factor_cli import cli
+from factor_cli.instrumentation import StageTimer
+
+_STOP = object()
+
+
+class FactorPipeline:
+    """
+    分阶段流水线：预取原始数据 -> 计算 -> 上传结果
+    各阶段之间用有界队列连接，队列满时上游阻塞（背压），每个阶段的并发数单独配置。
+    data_api 需提供 getLS.read_ls，默认使用 dw_data.fastpai，测试时可以传入本地实现；
+    结果写入 storage，默认与 node_factor 使用同一个存储后端。
+    """
+
+    def __init__(self, factor_name: str, factor_type: str, version: str = None,
+                 prefetch_workers: int = 4, compute_workers: int = 2, write_workers: int = 4,
+                 queue_size: int = 8, compute_processes: int = 0, data_api=None,
+                 api=None, write_batch_size: int = 500, storage=None):
+        self.factor_name = factor_name
+        self.factor_type = factor_type
+        self.version = version
+        self.prefetch_workers = prefetch_workers
+        self.compute_workers = compute_workers
+        self.write_workers = write_workers
+        self.queue_size = queue_size
+        # >0 时计算阶段把任务提交到进程池，真正并行使用多核
+        self.compute_processes = compute_processes
+        self.data_api = data_api
+        self.storage = storage
+        self.api = api or cli.get_api()
+        self.write_batch_size = write_batch_size
+        self.failures = []
+        self._stop = threading.Event()
+
+    def _get_data_api(self):
+        if self.data_api is None:
+            import dw_data.fastpai as fastpai
+            self.data_api = fastpai
+        return self.data_api
+
+    def _put(self, q: queue.Queue, item):
+        """带停止检查的阻塞 put，消费者提前退出时不会死锁"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _stage(self, in_q, out_q, func, n_workers: int, downstream_workers: int, results_q):
+        """启动一个阶段：n_workers 个线程从 in_q 取任务，func 的返回值放入 out_q"""
+        remaining = [n_workers]
+        lock = threading.Lock()
+
+        def worker():
+            while not self._stop.is_set():
+                try:
+                    item = in_q.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is _STOP:
+                    break
+                try:
+                    output = func(item)
+                except Exception as e:
+                    code, day = item[0], item[1]
+                    self._put(results_q, {'code': code, 'day': day, 'status': 'failed', 'error': repr(e)})
+                    continue
+                if output is not None:
+                    self._put(out_q, output)
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                # 本阶段全部结束，通知下游每个 worker
+                for _ in range(downstream_workers):
+                    self._put(out_q, _STOP)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(n_workers)]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def run(self, pairs):
+        """执行 (code, day) 列表，逐条产出每个任务的结果"""
+        data_api = self._get_data_api()
+        storage = self.storage or cli.get_storage()
+        if self.version is None:
+            result = self.api.get_new_factor_name(self.factor_name)
+            if not result:
+                raise ValueError(f"{self.factor_name} 因子没有审批通过的版本")
+            self.version = result.get('version')
+
+        self._stop.clear()
+        self.failures = []
+        task_q = queue.Queue(self.queue_size)
+        raw_q = queue.Queue(self.queue_size)
+        computed_q = queue.Queue(self.queue_size)
+        results_q = queue.Queue()
+
+        executor = None
+        if self.compute_processes > 0:
+            executor = ProcessPoolExecutor(max_workers=self.compute_processes,
+                                           initializer=cli._runner_worker_init, initargs=(self.version,))
+            ff = None
+        else:
+            ff = cli.load_factor_framework(self.version)
+
+        def prefetch(item):
+            code, day = item
+            timer = StageTimer()
+            with timer.stage('raw_load'):
+                df = cli.load_raw_data(code, day, data_api.getLS)
+            return code, day, df, timer
+
+        def compute(item):
+            code, day, df, timer = item
+            if executor is not None:
+                with timer.stage('run'):
+                    result = executor.submit(cli._worker_compute, self.factor_name, df).result()
+            else:
+                result = cli.compute_factor(ff, self.factor_name, df, timer)
+            return code, day, result, timer
+
+        writer = FactorResultBufferWriter(self.api, max_rows=self.write_batch_size)
+
+        def write(item):
+            code, day, df, timer = item
+            with timer.stage('upload'):
+                factor_path = storage.write(df, self.factor_type, self.factor_name, self.version, code, day)
+            if not factor_path:
+                return {'code': code, 'day': day, 'status': 'failed', 'error': '数据保存失败'}
+            timer.record('fingerprint', cli._result_fingerprint(self.factor_name, self.version, code, day))
+            writer.add({
+                'factor_name': self.factor_name,
+                'version': self.version,
+                'code': code,
+                'day': day,
+                'data_type': self.factor_type,
+                'factor_path': factor_path,
+                'extra_info': timer.to_extra_info(),
+            })
+            return {'code': code, 'day': day, 'status': 'success', 'error': None}
+
+        def feed():
+            for code, day in pairs:
+                if not self._put(task_q, (code, str(day).replace('-', ''))):
+                    return
+            for _ in range(self.prefetch_workers):
+                self._put(task_q, _STOP)
+
+        threading.Thread(target=feed, daemon=True).start()
+        self._stage(task_q, raw_q, prefetch, self.prefetch_workers, self.compute_workers, results_q)
+        self._stage(raw_q, computed_q, compute, self.compute_workers, self.write_workers, results_q)
+        self._stage(computed_q, results_q, write, self.write_workers, 1, results_q)
+
+        try:
+            while True:
+                result = results_q.get()
+                if result is _STOP:
+                    break
+                if result['status'] != 'success':
+                    self.failures.append(result)
+                yield result
+        finally:
+            self._stop.set()
+            # 提前结束迭代时也停止定时写入线程，并写入已缓冲的记录；入库失败的记录同样计为失败
+            writer.close()
+            for outcome in writer.failures:
+                self.failures.append({'code': outcome['code'], 'day': outcome['day'],
+                                      'status': 'failed', 'error': outcome['error']})
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,243 @@
+import warnings
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+from factor_cli import cli
+
+# MAD 换算为正态分布标准差的系数
+MAD_SCALE = 1.4826
+
+
+@contextmanager
+def _quiet():
+    """整行为空的交易日结果为空，不输出 RuntimeWarning"""
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        yield
+
+
+def cs_rank(matrix: np.ndarray, pct: bool = True) -> np.ndarray:
+    """按行（同一交易日的截面）排名，并列取平均名次，空值不参与排名；pct=True 时除以有效个数"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    n_rows, n_cols = matrix.shape
+    if matrix.size == 0:
+        return matrix.copy()
+    order = np.argsort(matrix, axis=1)  # 空值排在最后，并列值的先后不影响平均名次
+    ordered = np.take_along_axis(matrix, order, axis=1)
+    # 每行内取值变化的位置开始一个新的并列组，空值之间互不相等，各自成组
+    starts = np.ones_like(ordered, dtype=bool)
+    starts[:, 1:] = ordered[:, 1:] != ordered[:, :-1]
+    group = np.cumsum(starts.ravel()) - 1
+    ordinal = np.tile(np.arange(1, n_cols + 1, dtype=np.float64), n_rows)
+    average = np.bincount(group, weights=ordinal) / np.bincount(group)
+
+    ranks = np.empty_like(matrix)
+    np.put_along_axis(ranks, order, average[group].reshape(n_rows, n_cols), axis=1)
+    valid = ~np.isnan(matrix)
+    ranks[~valid] = np.nan
+    if pct:
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ranks /= valid.sum(axis=1, keepdims=True)
+    return ranks
+
+
+def cs_zscore(matrix: np.ndarray, ddof: int = 1) -> np.ndarray:
+    """按行标准化，与 pandas 的 std 一致默认 ddof=1"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    with _quiet():
+        mean = np.nanmean(matrix, axis=1, keepdims=True)
+        std = np.nanstd(matrix, axis=1, ddof=ddof, keepdims=True)
+        return (matrix - mean) / std
+
+
+def cs_winsorize_mad(matrix: np.ndarray, n: float = 3.0, scale: float = MAD_SCALE) -> np.ndarray:
+    """MAD 去极值：按行截断到 中位数 ± n * scale * MAD"""
+    matrix = np.asarray(matrix, dtype=np.float64)
+    # 没有空值时 np.median 比 np.nanmedian 快
+    median_func = np.nanmedian if np.isnan(matrix).any() else np.median
+    with _quiet():
+        median = median_func(matrix, axis=1, keepdims=True)
+        mad = median_func(np.abs(matrix - median), axis=1, keepdims=True)
+    width = n * scale * mad
+    return np.clip(matrix, median - width, median + width)
+
+
+def cs_neutralize(matrix: np.ndarray, exposures: np.ndarray, intercept: bool = True) -> np.ndarray:
+    """
+    按行对暴露做线性回归取残差，exposures 形状为 (日期, code, 暴露个数)
+    因子或任一暴露为空的 code 不参与回归，残差为空；所有交易日的回归一次批量求解
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    exposures = np.asarray(exposures, dtype=np.float64)
+    if exposures.ndim == 2:
+        exposures = exposures[:, :, None]
+    if intercept:
+        exposures = np.concatenate([np.ones(matrix.shape + (1,)), exposures], axis=2)
+    valid = ~np.isnan(matrix) & ~np.isnan(exposures).any(axis=2)
+    x = np.where(valid[:, :, None], exposures, 0.0)
+    y = np.where(valid, matrix, 0.0)
+    xt = x.transpose(0, 2, 1)
+    # 批量矩阵乘法走 BLAS
+    xtx = xt @ x
+    xty = xt @ y[:, :, None]
+    # 伪逆兼容样本不足或暴露共线的交易日
+    beta = np.linalg.pinv(xtx) @ xty
+    residual = matrix - (np.nan_to_num(exposures) @ beta)[:, :, 0]
+    residual[~valid] = np.nan
+    return residual
+
+
+TRANSFORMS = {
+    'rank': cs_rank,
+    'zscore': cs_zscore,
+    'winsorize': cs_winsorize_mad,
+    'neutralize': cs_neutralize,
+}
+
+# 派生版本号中每个变换的缩写
+_TRANSFORM_CODES = {'rank': 'r', 'zscore': 'z', 'winsorize': 'w', 'neutralize': 'n'}
+
+
+def _normalize_steps(steps):
+    """steps 元素为变换名或 (变换名, 参数 dict)"""
+    normalized = []
+    for step in steps:
+        name, params = (step, {}) if isinstance(step, str) else (step[0], dict(step[1]))
+        if name not in TRANSFORMS:
+            raise ValueError(f"未知的后处理变换 {name}，可选 {list(TRANSFORMS)}")
+        normalized.append((name, params))
+    return normalized
+
+
+def apply_transforms(matrix: np.ndarray, steps, exposures: np.ndarray = None) -> np.ndarray:
+    """按顺序对 日期 x code 矩阵应用变换，neutralize 使用 exposures"""
+    for name, params in _normalize_steps(steps):
+        if name == 'neutralize':
+            if exposures is None:
+                raise ValueError("neutralize 需要传入 exposures")
+            matrix = cs_neutralize(matrix, exposures, **params)
+        else:
+            matrix = TRANSFORMS[name](matrix, **params)
+    return matrix
+
+
+def to_matrix(panel: pd.DataFrame, column: str, agg: str = 'last'):
+    """
+    把 load_factor_panel 的长表转换为稠密的 日期 x code 矩阵
+    每个 (code, day) 的日内结果按 agg（last / first / mean）取一个值，返回 (矩阵, days, codes)
+    """
+    if agg not in ('last', 'first', 'mean'):
+        raise ValueError(f"不支持的聚合方式 {agg}")
+    codes = pd.Index(panel['code'].cat.categories if isinstance(panel['code'].dtype, pd.CategoricalDtype)
+                     else pd.unique(panel['code']))
+    day_idx, days = pd.factorize(panel['day'], sort=True)
+    code_idx = codes.get_indexer(panel['code'])
+    values = panel[column].to_numpy(dtype=np.float64)
+
+    # 长表按 (day, code) 连续排列，每段是一个 (code, day) 的日内结果
+    key = day_idx.astype(np.int64) * len(codes) + code_idx
+    if len(key) and not (np.diff(key) >= 0).all():
+        order = np.argsort(key, kind='stable')
+        key, values = key[order], values[order]
+    boundaries = np.flatnonzero(np.diff(key)) + 1
+    starts = np.concatenate([[0], boundaries]) if len(key) else np.array([], dtype=np.int64)
+    ends = np.concatenate([boundaries, [len(key)]]) if len(key) else np.array([], dtype=np.int64)
+    if agg == 'last':
+        reduced = values[ends - 1]
+    elif agg == 'first':
+        reduced = values[starts]
+    else:
+        valid = ~np.isnan(values)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            reduced = (np.add.reduceat(np.where(valid, values, 0.0), starts) /
+                       np.add.reduceat(valid.astype(np.float64), starts)) if len(starts) else values[:0]
+
+    matrix = np.full((len(days), len(codes)), np.nan)
+    matrix.flat[key[starts]] = reduced
+    return matrix, [pd.Timestamp(day).strftime('%Y%m%d') for day in days], list(codes)
+
+
+def align_exposures(exposures: dict, days, codes) -> np.ndarray:
+    """把 {暴露名: DataFrame(index=YYYYMMDD 日期, columns=code)} 对齐为 (日期, code, 暴露个数) 数组"""
+    arrays = []
+    for name, frame in exposures.items():
+        frame = frame.copy()
+        frame.index = [str(day).replace('-', '')[:8] for day in frame.index]
+        arrays.append(frame.reindex(index=days, columns=codes).to_numpy(dtype=np.float64))
+    return np.stack(arrays, axis=2)
+
+
+def derived_version_name(version: str, steps) -> str:
+    """派生版本号：基础版本-变换缩写，例如 v1.1-wzn，需满足 factor_info.version 的 16 个字符限制"""
+    name = f"{version}-{''.join(_TRANSFORM_CODES[step] for step, _ in _normalize_steps(steps))}"
+    if len(name) > 16:
+        raise ValueError(f"派生版本号 {name} 超过 16 个字符，请通过 derived_version 指定")
+    return name
+
+
+def postprocess_factor(factor_name: str, factor_type: str, codes, start: str, end: str, steps,
+                       version: str = None, exposures: dict = None, column: str = None, agg: str = 'last',
+                       derived_version: str = None, store: bool = True, submitted_by: str = 'postprocess',
+                       storage=None) -> pd.DataFrame:
+    """
+    截面后处理：读取一段日期的因子结果，组成 日期 x code 矩阵后批量做排名 / 标准化 / 去极值 / 中性化
+    store=True 时结果作为派生版本登记到 factor_info（factor_status='3'，不进入审批，不会被 node_factor 选中），
+    一个交易日的截面写成一个文件，每个 (code, day) 一行记录写入 factor_result，可以用 load_factor_panel(version=派生版本) 读取。
+    返回长表 [day, code, 因子列]
+    """
+    from factor_cli.panel import load_factor_panel
+
+    api = cli.get_api()
+    storage = storage or cli.get_storage()
+    if version is None:
+        result = api.get_new_factor_name(factor_name)
+        if not result:
+            raise ValueError(f"{factor_name} 因子没有审批通过的版本")
+        version = result.get('version')
+    steps = _normalize_steps(steps)
+
+    panel = load_factor_panel(factor_name, codes, start, end, version=version, storage=storage)
+    if panel.empty:
+        print(f"{factor_name} 因子 {version} 版本在 {start} - {end} 没有结果")
+        return pd.DataFrame(columns=['day', 'code'])
+    column = column or next(col for col in panel.columns if col not in ('code', 'day'))
+    matrix, days, codes = to_matrix(panel, column, agg)
+    exposure_array = align_exposures(exposures, days, codes) if exposures else None
+    matrix = apply_transforms(matrix, steps, exposure_array)
+
+    day_idx, code_idx = np.nonzero(~np.isnan(matrix))
+    result = pd.DataFrame({
+        'day': np.asarray(days)[day_idx],
+        'code': np.asarray(codes)[code_idx],
+        column: matrix[day_idx, code_idx],
+    })
+    if not store:
+        return result
+
+    derived_version = derived_version or derived_version_name(version, steps)
+    api.create_factor_info({
+        'factor_name': factor_name,
+        'version': derived_version,
+        'factor_type': factor_type,
+        'submitted_by': submitted_by,
+        'derived_from': version,
+        'factor_args': {'derived_from': version, 'steps': steps, 'column': column, 'agg': agg,
+                        'exposures': list(exposures) if exposures else []},
+    })
+    # 一个交易日的截面写成一个文件
+    paths = {}
+    for day, group in result.groupby('day', sort=False):
+        day_paths = storage.write_cross_section(group[['code', column]].reset_index(drop=True),
+                                                factor_type, factor_name, derived_version, day)
+        paths.update({(code, day): path for code, path in day_paths.items()})
+    outcomes = api.write_node_factor_data_bulk([
+        {'factor_name': factor_name, 'version': derived_version, 'code': code, 'day': day,
+         'data_type': factor_type, 'factor_path': path,
+         'extra_info': {'derived_from': version, 'steps': [name for name, _ in steps]}}
+        for (code, day), path in paths.items()
+    ])
+    success = sum(1 for outcome in outcomes if outcome['success'])
+    print(f"✅ {factor_name} 因子派生版本 {derived_version} 写入 {success}/{len(result)} 个结果")
+    return result
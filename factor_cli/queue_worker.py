@@ -0,0 +1,80 @@
+import time
+
+from database.job_queue import FactorJobQueue
+from factor_cli import cli
+from factor_cli.instrumentation import StageTimer
+
+
+def enqueue_factor_jobs(factor_name: str, factor_type: str, codes, days, version: str = None,
+                        queue: FactorJobQueue = None):
+    """把 codes x days 作为待计算任务写入 factor_result，返回 (version, 新入队数量)"""
+    queue = queue or FactorJobQueue(cli.get_api())
+    if version is None:
+        result = cli.get_api().get_new_factor_name(factor_name)
+        if not result:
+            raise ValueError(f"{factor_name} 因子没有审批通过的版本")
+        version = result.get('version')
+    storage = cli.get_storage()
+    records = [
+        {
+            'factor_name': factor_name,
+            'version': version,
+            'code': code,
+            'day': str(day).replace('-', ''),
+            'data_type': factor_type,
+            'factor_path': storage.path_for(factor_type, factor_name, version, code, str(day).replace('-', '')),
+        }
+        for day in days for code in codes
+    ]
+    return version, queue.enqueue(records)
+
+
+def run_queue_worker(factor_name: str, factor_type: str, version: str = None, batch_size: int = 20,
+                     queue: FactorJobQueue = None, idle_sleep: float = 5.0, exit_when_idle: bool = True):
+    """
+    队列 worker：循环领取任务、计算、回写状态
+    可以在多台机器上同时启动多个，不需要中心调度；exit_when_idle=True 时队列空了就退出
+    """
+    from dw_data.fastpai import getLS
+
+    queue = queue or FactorJobQueue(cli.get_api())
+    if version is None:
+        result = cli.get_api().get_new_factor_name(factor_name)
+        if not result:
+            raise ValueError(f"{factor_name} 因子没有审批通过的版本")
+        version = result.get('version')
+    ff = cli.load_factor_framework(version)
+    storage = cli.get_storage()
+    print(f"worker {queue.worker_id} 开始处理 {factor_name} 因子 {version} 版本任务")
+
+    done, failed = 0, 0
+    while True:
+        jobs = queue.claim(factor_name, version, batch_size)
+        if not jobs:
+            if exit_when_idle:
+                break
+            time.sleep(idle_sleep)
+            continue
+        lease_start = time.monotonic()
+        for job in jobs:
+            # 处理时间接近租约一半时续约，避免被其他 worker 重复领取
+            if time.monotonic() - lease_start > queue.lease_seconds / 2:
+                queue.renew(jobs)
+                lease_start = time.monotonic()
+            timer = StageTimer()
+            try:
+                with timer.stage('raw_load'):
+                    df = cli.load_raw_data(job['code'], job['day'], getLS)
+                df = cli.compute_factor(ff, factor_name, df, timer)
+                with timer.stage('upload'):
+                    factor_path = storage.write(df, factor_type, factor_name, version, job['code'], job['day'])
+                if not factor_path:
+                    raise IOError("数据保存失败")
+                timer.record('fingerprint', cli._result_fingerprint(factor_name, version, job['code'], job['day']))
+                queue.complete(job, factor_path, timer.to_extra_info())
+                done += 1
+            except Exception as e:
+                queue.fail(job, repr(e))
+                failed += 1
+    print(f"✅ worker {queue.worker_id} 结束，成功 {done} 个，失败 {failed} 个")
+    return done, failed
@@ -0,0 +1,203 @@
+import fcntl
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import pyarrow as pa
+
+
+def _check_key(value: str):
+    if not value or os.sep in value or value in ('.', '..'):
+        raise ValueError(f"非法的缓存键 {value!r}")
+
+
+class RawDataCache:
+    """
+    本机共享的原始数据缓存，键为 (code, day)，每个键保存为 cache_dir/{day}/{code}.arrow（Arrow IPC 文件）
+    读取时内存映射，返回的 DataFrame 直接引用映射的页（只读、零拷贝），同一台机器上的进程共享同一份页缓存。
+    同一个键只有一个进程下载，其余进程在文件锁上等待后直接读取；目录超出 max_bytes 时删除最久未访问的文件。
+    """
+
+    # 锁按键的哈希分桶，锁文件数量固定，淘汰数据文件时不需要处理锁文件
+    LOCK_STRIPES = 256
+    # 命中时最多每隔这么久更新一次 mtime，作为淘汰顺序
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, cache_dir: str, max_bytes: int = 8 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock_dir = os.path.join(cache_dir, '.locks')
+        os.makedirs(self._lock_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self.current_bytes = self._scan()[1]
+        # 统计信息（本进程）
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.fills = 0
+        self.evictions = 0
+        self.write_errors = 0
+
+    def path_for(self, code: str, day: str) -> str:
+        _check_key(code)
+        _check_key(day)
+        return os.path.join(self.cache_dir, day, f"{code}.arrow")
+
+    @contextmanager
+    def _file_lock(self, name: str, blocking: bool = True):
+        """跨进程的排他锁，blocking=False 且锁被占用时产出 False"""
+        fd = os.open(os.path.join(self._lock_dir, name), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+    def _fill_lock(self, code: str, day: str):
+        stripe = zlib.crc32(f"{code}|{day}".encode('utf-8')) % self.LOCK_STRIPES
+        return self._file_lock(f"{stripe}.lock")
+
+    def _read(self, path: str):
+        """内存映射读取，文件不存在返回 None"""
+        try:
+            source = pa.memory_map(path, 'r')
+        except FileNotFoundError:
+            return None
+        table = pa.ipc.open_file(source).read_all()
+        try:
+            stat = os.stat(path)
+            if time.time() - stat.st_mtime > self.TOUCH_INTERVAL:
+                os.utime(path)
+        except OSError:
+            pass
+        # split_blocks 让每列单独成块，没有空值的数值列直接引用映射的内存
+        return table.to_pandas(split_blocks=True)
+
+    def _write(self, path: str, df) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        table = pa.Table.from_pandas(df, preserve_index=None)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with pa.OSFile(tmp_path, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return os.path.getsize(path)
+
+    def get(self, code: str, day: str):
+        """命中返回只读 DataFrame，未命中返回 None"""
+        df = self._read(self.path_for(code, day))
+        with self._lock:
+            if df is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return df
+
+    def get_or_load(self, code: str, day: str, loader):
+        """
+        命中直接返回；未命中时持有文件锁调用 loader(code, day) 并写入缓存
+        其他进程等待同一个键时不会重复调用 loader
+        """
+        path = self.path_for(code, day)
+        df = self._read(path)
+        if df is not None:
+            with self._lock:
+                self.hits += 1
+            return df
+
+        with self._fill_lock(code, day):
+            # 等锁期间可能已经被其他进程写入
+            df = self._read(path)
+            if df is not None:
+                with self._lock:
+                    self.waits += 1
+                return df
+            with self._lock:
+                self.misses += 1
+            df = loader(code, day)
+            try:
+                size = self._write(path, df)
+            except Exception:
+                # 缓存写入失败不影响计算
+                with self._lock:
+                    self.write_errors += 1
+                return df
+        with self._lock:
+            self.fills += 1
+            self.current_bytes += size
+            over = self.current_bytes > self.max_bytes
+        if over:
+            self.trim()
+        # 返回映射的版本，与命中时的结果一致，也不再持有下载得到的副本
+        mapped = self._read(path)
+        return df if mapped is None else mapped
+
+    def _scan(self):
+        """返回 ([(mtime, size, path)], 总字节数)"""
+        files = []
+        for root, _, names in os.walk(self.cache_dir):
+            if root == self._lock_dir:
+                continue
+            for name in names:
+                if not name.endswith('.arrow'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files, sum(size for _, size, _ in files)
+
+    def trim(self, max_bytes: int = None):
+        """删除最久未访问的文件直到目录不超过 max_bytes，已经映射该文件的进程不受影响"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._file_lock('evict.lock', blocking=False) as locked:
+            if not locked:
+                # 其他进程正在淘汰
+                return
+            files, total = self._scan()
+            files.sort()
+            for _, size, path in files:
+                if total <= max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                    total -= size
+                    with self._lock:
+                        self.evictions += 1
+                except OSError:
+                    pass
+            with self._lock:
+                self.current_bytes = total
+
+    def clear(self):
+        self.trim(0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'fills': self.fills,
+                'evictions': self.evictions,
+                'write_errors': self.write_errors,
+            }
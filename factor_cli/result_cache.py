@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class FactorResultCache:
+    """
+    进程内因子结果缓存，键为 (factor_name, version, code, day)
+    按内存字节数而不是条目数淘汰（LRU），可选把淘汰的结果落到本地目录作为二级缓存
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 ** 2, spill_dir: str = None,
+                 spill_max_bytes: int = 4 * 1024 ** 3):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.spill_bytes = 0
+        # 统计信息
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.spill_hits = 0
+        self.spill_writes = 0
+        self.spill_evictions = 0
+
+    @staticmethod
+    def _sizeof(df: pd.DataFrame) -> int:
+        return int(df.memory_usage(index=True, deep=True).sum())
+
+    def _spill_path(self, key) -> str:
+        name = hashlib.sha1('|'.join(map(str, key)).encode('utf-8')).hexdigest()
+        return os.path.join(self.spill_dir, f"{name}.parquet")
+
+    def get(self, key):
+        """命中返回结果副本，未命中返回 None"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return item[0].copy()
+        if self.spill_dir:
+            path = self._spill_path(key)
+            if os.path.exists(path):
+                try:
+                    df = pd.read_parquet(path)
+                except Exception:
+                    df = None
+                if df is not None:
+                    with self._lock:
+                        self.spill_hits += 1
+                    # 重新放回内存层
+                    self.put(key, df)
+                    return df.copy()
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, df: pd.DataFrame):
+        """写入结果副本，调用方之后修改 df 不影响缓存；超出内存预算时淘汰最久未使用的结果"""
+        if df is None:
+            return
+        size = self._sizeof(df)
+        if size > self.max_bytes:
+            return
+        df = df.copy()
+        evicted = []
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.current_bytes -= old[1]
+            self._data[key] = (df, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                old_key, (old_df, old_size) = self._data.popitem(last=False)
+                self.current_bytes -= old_size
+                self.evictions += 1
+                evicted.append((old_key, old_df))
+        if self.spill_dir:
+            for old_key, old_df in evicted:
+                self._spill(old_key, old_df)
+
+    def _spill(self, key, df: pd.DataFrame):
+        """淘汰的结果写入本地目录，目录超出预算时删除最早写入的文件"""
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            df.to_parquet(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception:
+            return
+        with self._lock:
+            self.spill_writes += 1
+            self.spill_bytes += os.path.getsize(path)
+            if self.spill_bytes <= self.spill_max_bytes:
+                return
+        self._trim_spill_dir()
+
+    def _trim_spill_dir(self):
+        files = []
+        for name in os.listdir(self.spill_dir):
+            if name.endswith('.parquet'):
+                path = os.path.join(self.spill_dir, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.spill_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                with self._lock:
+                    self.spill_evictions += 1
+            except OSError:
+                pass
+        with self._lock:
+            self.spill_bytes = total
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.current_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'spill_hits': self.spill_hits,
+                'spill_writes': self.spill_writes,
+                'spill_evictions': self.spill_evictions,
+                'spill_bytes': self.spill_bytes,
+            }
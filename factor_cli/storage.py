@@ -0,0 +1,292 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+class FactorStorage:
+    """
+    因子结果存储接口，node_factor 的读写都通过它完成
+    路径包含版本，新版本重算不会覆盖旧版本的结果；读取已有结果时优先用 factor_result 中记录的 factor_path，
+    复用旧版本结果（alias_unchanged_results）的行指向的是旧版本的路径
+    """
+
+    def path_for(self, factor_type: str, factor_name: str, version: str, code: str, day: str) -> str:
+        """结果在存储中的位置，写入 factor_result.factor_path"""
+        raise NotImplementedError
+
+    def write(self, df: pd.DataFrame, factor_type: str, factor_name: str, version: str, code: str, day: str):
+        """写入单个 (code, day) 的结果，成功返回 factor_path，失败返回 None"""
+        raise NotImplementedError
+
+    def read_path(self, factor_path: str, code: str, day: str) -> pd.DataFrame:
+        """按记录的 factor_path 读取单个 (code, day) 的结果"""
+        raise NotImplementedError
+
+    def read(self, factor_type: str, factor_name: str, version: str, code: str, day: str) -> pd.DataFrame:
+        """读取单个 (code, day) 的结果"""
+        return self.read_path(self.path_for(factor_type, factor_name, version, code, day), code, day)
+
+    def write_batch(self, frames: dict, factor_type: str, factor_name: str, version: str) -> dict:
+        """批量写入 {(code, day): df}，返回 {(code, day): factor_path}，失败的不返回"""
+        paths = {}
+        for (code, day), df in frames.items():
+            path = self.write(df, factor_type, factor_name, version, code, day)
+            if path:
+                paths[(code, day)] = path
+        return paths
+
+    def write_cross_section(self, df: pd.DataFrame, factor_type: str, factor_name: str, version: str,
+                            day: str) -> dict:
+        """
+        写入一个交易日的截面结果（df 带 code 列），返回 {code: factor_path}，失败的不返回
+        默认按 (code, day) 拆开交给 write_batch
+        """
+        frames = {(code, day): group.drop(columns=['code']) for code, group in df.groupby('code', sort=False)}
+        return {code: path for (code, _), path in self.write_batch(frames, factor_type, factor_name, version).items()}
+
+    def read_paths(self, items, max_workers: int = 16) -> list:
+        """批量读取 [(factor_path, code, day)]，返回 [(code, day, df)]"""
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(lambda item: (item[1], item[2], self.read_path(*item)), items))
+
+    def read_range(self, factor_type: str, factor_name: str, version: str, codes, days) -> pd.DataFrame:
+        """读取多个 code、多个交易日的结果，带 code / day 列"""
+        frames = []
+        for day in days:
+            for code in codes:
+                df = self.read(factor_type, factor_name, version, code, day)
+                frames.append(df.assign(code=code, day=day))
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+class RemoteStorage(FactorStorage):
+    """
+    dw_data.fastpai 远程存储，一个 (code, day) 一个 parquet 文件
+    截面结果一个交易日一个文件（带 code 列），factor_path 形如 {文件路径}#code=000001
+    """
+
+    def __init__(self, data_api=None, prefix: str = '122'):
+        self.data_api = data_api
+        self.prefix = prefix
+
+    def _api(self):
+        if self.data_api is None:
+            import dw_data.fastpai as fastpai
+            self.data_api = fastpai
+        return self.data_api
+
+    def path_for(self, factor_type: str, factor_name: str, version: str, code: str, day: str) -> str:
+        return f"{factor_type}/{factor_name}/{version}/{day}/{code}.parquet"
+
+    def write(self, df: pd.DataFrame, factor_type: str, factor_name: str, version: str, code: str, day: str):
+        save_path = self.path_for(factor_type, factor_name, version, code, day)
+        result_status = self._api().putAPI.put_parquet(df, f"{self.prefix}/{save_path}", verbose=0)
+        if result_status.get('success', False):
+            return save_path
+        return None
+
+    def cross_section_path(self, factor_type: str, factor_name: str, version: str, day: str) -> str:
+        return f"{factor_type}/{factor_name}/{version}/{day}.parquet"
+
+    def write_cross_section(self, df: pd.DataFrame, factor_type: str, factor_name: str, version: str,
+                            day: str) -> dict:
+        save_path = self.cross_section_path(factor_type, factor_name, version, day)
+        result_status = self._api().putAPI.put_parquet(df, f"{self.prefix}/{save_path}", verbose=0)
+        if not result_status.get('success', False):
+            return {}
+        return {code: f"{save_path}#code={code}" for code in df['code'].unique()}
+
+    def _get_df(self, path: str) -> pd.DataFrame:
+        return self._api().getAPI.get_df(f"{self.prefix}/data2/{path}")
+
+    @staticmethod
+    def _select_code(df: pd.DataFrame, factor_path: str, code: str) -> pd.DataFrame:
+        """截面文件中取出一个 code 的结果"""
+        if '#' not in factor_path:
+            return df
+        return df[df['code'] == code].drop(columns=['code']).reset_index(drop=True)
+
+    def read_path(self, factor_path: str, code: str, day: str) -> pd.DataFrame:
+        return self._select_code(self._get_df(factor_path.split('#', 1)[0]), factor_path, code)
+
+    def read_paths(self, items, max_workers: int = 16) -> list:
+        """同一个截面文件只下载一次，再按 code 拆分"""
+        files = {}
+        for factor_path, code, day in items:
+            files.setdefault(factor_path.split('#', 1)[0], []).append((factor_path, code, day))
+
+        def read_file(path):
+            df = self._get_df(path)
+            return [(code, day, self._select_code(df, factor_path, code)) for factor_path, code, day in files[path]]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return [part for parts in executor.map(read_file, list(files)) for part in parts]
+
+
+class LocalDatasetStorage(FactorStorage):
+    """
+    本地文件系统上的分区 parquet 数据集
+    一个因子版本一个数据集 {root}/{factor_type}/{factor_name}/{version}，按 day 或 code 做 hive 分区，
+    一次批量写入的整个截面（或整段历史）落成一个文件，行按分区外的键排序，
+    配合 row group 统计信息，读取时按 code / 日期范围做谓词下推。
+    重复写入同一个 (code, day) 时先删除分区内的旧结果，与数据库的 upsert 一致，重算不会产生重复行。
+    factor_path 形如 {数据集路径}#day=20250701
+    """
+
+    def __init__(self, root: str, partition_by: str = 'day', row_group_size: int = 64 * 1024):
+        if partition_by not in ('day', 'code'):
+            raise ValueError(f"partition_by 只支持 day 或 code，实际是 {partition_by}")
+        self.root = root
+        self.partition_by = partition_by
+        self.sort_by = 'code' if partition_by == 'day' else 'day'
+        self.row_group_size = row_group_size
+
+    def dataset_path(self, factor_type: str, factor_name: str, version: str) -> str:
+        return os.path.join(self.root, str(factor_type), factor_name, str(version))
+
+    def _partition_value(self, code: str, day: str) -> str:
+        return day if self.partition_by == 'day' else code
+
+    def path_for(self, factor_type: str, factor_name: str, version: str, code: str, day: str) -> str:
+        partition = self._partition_value(code, day)
+        return f"{self.dataset_path(factor_type, factor_name, version)}#{self.partition_by}={partition}"
+
+    @contextmanager
+    def _partition_lock(self, directory: str):
+        """同一分区的写入串行执行（跨进程），避免并发重写同一批键时互相覆盖"""
+        import fcntl
+
+        fd = os.open(os.path.join(directory, '.lock'), os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _write_table(self, table, path: str):
+        import pyarrow.parquet as pq
+
+        directory, file_name = os.path.split(path)
+        # 以 . 开头的临时文件不会被数据集扫描到
+        tmp_path = os.path.join(directory, f".{file_name}.{uuid.uuid4().hex}.tmp")
+        pq.write_table(table, tmp_path, row_group_size=self.row_group_size, write_statistics=True)
+        os.replace(tmp_path, path)
+
+    def _remove_keys(self, directory: str, keys: set, keep: str):
+        """
+        删除分区内其他文件中 keys 的旧结果，重复写入同一个 (code, day) 时覆盖而不是追加
+        单个结果的文件名就是它的键，直接删除；批量写入的 part- 文件去掉这些键后重写
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        for name in os.listdir(directory):
+            if name.startswith('.') or not name.endswith('.parquet') or name == keep:
+                continue
+            path = os.path.join(directory, name)
+            if not name.startswith('part-'):
+                if name[:-len('.parquet')] in keys:
+                    os.remove(path)
+                continue
+            # 单独读取文件，不从目录名推断分区列
+            parquet_file = pq.ParquetFile(path)
+            stored = parquet_file.read(columns=[self.sort_by]).column(self.sort_by)
+            if keys.isdisjoint(stored.to_pylist()):
+                continue
+            table = parquet_file.read()
+            table = table.filter(pc.invert(pc.is_in(table.column(self.sort_by), value_set=pa.array(sorted(keys)))))
+            if table.num_rows:
+                self._write_table(table, path)
+            else:
+                os.remove(path)
+
+    def _write_partition(self, df: pd.DataFrame, dataset_path: str, partition: str, file_name: str):
+        import pyarrow as pa
+
+        directory = os.path.join(dataset_path, f"{self.partition_by}={partition}")
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pandas(df.sort_values(self.sort_by, kind='stable'), preserve_index=False)
+        keys = {str(key) for key in df[self.sort_by].unique()}
+        with self._partition_lock(directory):
+            self._remove_keys(directory, keys, file_name)
+            self._write_table(table, os.path.join(directory, file_name))
+
+    def write(self, df: pd.DataFrame, factor_type: str, factor_name: str, version: str, code: str, day: str):
+        df = df.assign(code=code, day=day).drop(columns=[self.partition_by])
+        file_name = f"{code if self.partition_by == 'day' else day}.parquet"
+        self._write_partition(df, self.dataset_path(factor_type, factor_name, version),
+                              self._partition_value(code, day), file_name)
+        return self.path_for(factor_type, factor_name, version, code, day)
+
+    def write_batch(self, frames: dict, factor_type: str, factor_name: str, version: str) -> dict:
+        """同一分区的结果合并写成一个文件"""
+        groups = {}
+        for (code, day), df in frames.items():
+            groups.setdefault(self._partition_value(code, day), []).append(df.assign(code=code, day=day))
+        dataset_path = self.dataset_path(factor_type, factor_name, version)
+        paths = {}
+        for partition, group in groups.items():
+            df = pd.concat(group, ignore_index=True)
+            self._write_partition(df.drop(columns=[self.partition_by]), dataset_path,
+                                  partition, f"part-{uuid.uuid4().hex}.parquet")
+            for code, day in df[['code', 'day']].drop_duplicates().itertuples(index=False):
+                paths[(code, day)] = self.path_for(factor_type, factor_name, version, code, day)
+        return paths
+
+    def _scan(self, dataset_path: str, expression) -> pd.DataFrame:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        partitioning = ds.partitioning(pa.schema([(self.partition_by, pa.string())]), flavor='hive')
+        dataset = ds.dataset(dataset_path, format='parquet', partitioning=partitioning)
+        return dataset.to_table(filter=expression).to_pandas()
+
+    def read_path(self, factor_path: str, code: str, day: str) -> pd.DataFrame:
+        import pyarrow.dataset as ds
+
+        dataset_path = factor_path.split('#', 1)[0]
+        df = self._scan(dataset_path, (ds.field('code') == code) & (ds.field('day') == day))
+        return df.drop(columns=['code', 'day']).reset_index(drop=True)
+
+    def read_paths(self, items, max_workers: int = 16) -> list:
+        """按记录的路径分组，每个数据集一次扫描，过滤条件下推；复用旧版本的结果在旧版本的数据集中"""
+        datasets = {}
+        for factor_path, code, day in items:
+            datasets.setdefault(factor_path.split('#', 1)[0], set()).add((code, day))
+        parts = []
+        for dataset_path, pairs in datasets.items():
+            df = self.read_dataset(dataset_path, codes=sorted({code for code, _ in pairs}),
+                                   days=sorted({day for _, day in pairs}))
+            parts.extend((code, day, group.drop(columns=['code', 'day']))
+                         for (code, day), group in df.groupby(['code', 'day'], sort=False)
+                         if (code, day) in pairs)
+        return parts
+
+    def read_dataset(self, dataset_path: str, codes=None, days=None,
+                     start_day: str = None, end_day: str = None) -> pd.DataFrame:
+        """按 code 列表、交易日列表或日期区间读取一个数据集，过滤条件下推到分区和 row group"""
+        import pyarrow.dataset as ds
+
+        expression = None
+        conditions = []
+        if codes is not None:
+            conditions.append(ds.field('code').isin(list(codes)))
+        if days is not None:
+            conditions.append(ds.field('day').isin([str(day).replace('-', '') for day in days]))
+        if start_day is not None:
+            conditions.append(ds.field('day') >= str(start_day).replace('-', ''))
+        if end_day is not None:
+            conditions.append(ds.field('day') <= str(end_day).replace('-', ''))
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+        return self._scan(dataset_path, expression)
+
+    def read_range(self, factor_type: str, factor_name: str, version: str, codes=None, days=None,
+                   start_day: str = None, end_day: str = None) -> pd.DataFrame:
+        """读取一个因子版本的数据集，参数同 read_dataset"""
+        return self.read_dataset(self.dataset_path(factor_type, factor_name, version), codes=codes, days=days,
+                                 start_day=start_day, end_day=end_day)
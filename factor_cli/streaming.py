@@ -0,0 +1,116 @@
+import pandas as pd
+
+from factor_cli.data_bridge import to_engine_frame, result_to_arrays
+
+
+def _as_frame(chunk) -> pd.DataFrame:
+    """DataFrame 原样返回，pyarrow.RecordBatch / Table 转换为 DataFrame"""
+    if isinstance(chunk, pd.DataFrame):
+        return chunk
+    return chunk.to_pandas()
+
+
+def iter_chunks(df: pd.DataFrame, chunk_rows: int):
+    """把一天的数据按行切成多个块，模拟盘中分批到达的数据"""
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+class StreamingFactor:
+    """
+    盘中流式计算单个因子：逐块输入盘口数据，每块产出该块对应的因子结果
+    C++ 因子只提供整段计算的 run()，这里在块之间保留最近 lookback 行作为状态，
+    每块用 (保留的历史 + 新块) 计算后只取新块的结果，内存只与 lookback 和块大小有关，与全天长度无关。
+    要求因子每个点只依赖最近 lookback 行（滚动窗口类因子），此时与整天 run() 的结果一致；
+    依赖全天历史的因子（例如从开盘累计）不能流式计算。
+    """
+
+    def __init__(self, ff, factor_name: str, lookback: int, params=None):
+        if lookback < 0:
+            raise ValueError(f"lookback 不能为负数：{lookback}")
+        self.ff = ff
+        self.factor_name = factor_name
+        self.lookback = lookback
+        self.params = [factor_name] if params is None else params
+        self._tail = None
+        # 已经产出的行数，结果的索引与整天计算时一致
+        self.rows = 0
+
+    def reset(self):
+        """清空状态，开始新的一天"""
+        self._tail = None
+        self.rows = 0
+
+    def update(self, chunk) -> pd.DataFrame:
+        """输入一个新块，返回新块每一行的因子结果"""
+        chunk = _as_frame(chunk)
+        n = len(chunk)
+        if n == 0:
+            return pd.DataFrame()
+        if self._tail is None or len(self._tail) == 0:
+            window = chunk.reset_index(drop=True)
+        else:
+            window = pd.concat([self._tail, chunk], ignore_index=True)
+
+        factor = self.ff.create_factor(self.factor_name)
+        factor.set_data(to_engine_frame(window))
+        factor.set_params(self.params)
+        factor.run()
+        arrays = result_to_arrays(factor.get_result())
+        for col, values in arrays.items():
+            if len(values) != len(window):
+                raise ValueError(f"{self.factor_name} 的结果列 {col} 与输入行数不一致，不能流式计算")
+        result = pd.DataFrame({col: values[-n:] for col, values in arrays.items()},
+                              index=pd.RangeIndex(self.rows, self.rows + n), copy=True)
+
+        # 只保留下一块需要的历史，拷贝出来以释放整块的内存
+        self._tail = window.iloc[len(window) - min(self.lookback, len(window)):].copy() if self.lookback else None
+        self.rows += n
+        return result
+
+    def stream(self, chunks):
+        """逐块计算，chunks 为 DataFrame / RecordBatch 的可迭代对象，逐块产出结果"""
+        for chunk in chunks:
+            result = self.update(chunk)
+            if len(result):
+                yield result
+
+    async def astream(self, chunks):
+        """stream 的异步版本，chunks 为异步迭代器"""
+        async for chunk in chunks:
+            result = self.update(chunk)
+            if len(result):
+                yield result
+
+
+def factor_lookback(factor_name: str, version: str) -> int:
+    """
+    因子版本登记的 lookback：factor_args['lookback']，因子计算一个点需要的历史行数
+    没有登记或不是非负整数时报错，依赖全天历史（lookback 无界）的因子不能流式计算
+    """
+    from factor_cli import cli
+
+    factor_args = cli.get_api().get_factor_args(factor_name, version)
+    if factor_args is None:
+        raise ValueError(f"{factor_name} 因子 {version} 版本不存在")
+    lookback = factor_args.get('lookback')
+    if isinstance(lookback, bool) or not isinstance(lookback, int) or lookback < 0:
+        raise ValueError(f"{factor_name} 因子 {version} 版本没有在 factor_args 中声明有界的 lookback，不能流式计算")
+    return lookback
+
+
+def stream_factor(factor_name: str, chunks, version: str = None):
+    """
+    用审批通过的最新版本（或指定版本）流式计算因子，返回逐块产出结果的迭代器
+    lookback 取因子版本登记的 factor_args['lookback']，没有登记的因子在调用时直接报错
+    """
+    from factor_cli import cli
+
+    if version is None:
+        result = cli.get_api().get_new_factor_name(factor_name)
+        if not result:
+            raise ValueError(f"{factor_name} 因子没有审批通过的版本")
+        version = result.get('version')
+    lookback = factor_lookback(factor_name, version)
+    ff = cli.load_factor_framework(version)
+    return StreamingFactor(ff, factor_name, lookback).stream(chunks)